@@ -0,0 +1,300 @@
+"""
+массовый импорт и экспорт аккаунтов с артефактами
+
+зачем:
+    register_user перечитывает весь users.txt на каждую
+    регистрацию — заполнение хранилища по одному аккаунту
+    стоит O(n²); здесь файл пользователей читается один раз,
+    а записи идут потоком
+
+формат записей:
+    CSV   — заголовок login,password,artifacts;
+            artifacts — ID через «;» (может быть пустым)
+    JSONL — {"login": …, "password": …, "artifacts": [ID, …]}
+    формат выбирается по расширению файла (.csv / .jsonl)
+
+импорт (import_accounts):
+    - записи читаются потоком, без загрузки файла целиком
+    - логин и пароль проверяются как при регистрации
+      (auth.credentials_error), неизвестные и повторные
+      ID артефактов отбрасываются
+    - повторы отсекаются одним множеством логинов: в него
+      заранее попадают пользователи из users.txt, затем —
+      каждый принятый логин (первая запись выигрывает)
+    - принятые записи пишутся пачками по BATCH_SIZE:
+      сначала файлы артефактов пачки, затем строки
+      пользователей — одной записью в users.txt с fsync;
+      аккаунт появляется в игре, только когда его
+      артефакты уже на диске
+
+экспорт (export_accounts):
+    users.txt читается построчно (auth.iter_users), артефакты —
+    по одному пользователю; память не зависит от числа аккаунтов
+
+запуск:
+    python accounts_bulk.py import <файл.csv|файл.jsonl>
+    python accounts_bulk.py export <файл.csv|файл.jsonl>
+
+функции модуля:
+    read_records     — поток записей из CSV / JSONL
+    import_accounts  — импорт с проверкой и отсевом повторов
+    export_accounts  — потоковый экспорт
+"""
+
+
+import csv
+import json
+import os
+import time
+
+from artifacts import get_artifact_by_id
+from auth import USERS_FILE, credentials_error, ensure_users_file, iter_users
+from artifact_storage import get_user_file, load_artifacts_ids
+
+
+# записей в одной пачке записи
+BATCH_SIZE = 10_000
+
+ARTIFACT_SEPARATOR = ";"
+
+CSV_FIELDS = ("login", "password", "artifacts")
+
+
+def _format(path):
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension not in (".csv", ".jsonl"):
+        raise ValueError(f"{path}: ожидался файл .csv или .jsonl")
+
+    return extension[1:]
+
+
+# ЧТЕНИЕ
+def read_records(path):
+    """
+    поток записей файла
+
+    returns:
+        iterator — (номер строки, логин, пароль, список ID)
+                   или (номер строки, None, None, описание ошибки)
+    """
+
+    kind = _format(path)
+
+    with open(path, "r", encoding="utf-8", newline="") as f:
+
+        if kind == "csv":
+            for line, row in enumerate(csv.DictReader(f), start=2):
+                if row.get("login") is None or row.get("password") is None:
+                    yield line, None, None, "нет логина или пароля"
+                    continue
+
+                ids = [a for a in (row.get("artifacts") or "").split(ARTIFACT_SEPARATOR) if a]
+
+                yield line, row["login"], row["password"], ids
+
+            return
+
+        for line, text in enumerate(f, start=1):
+            if not text.strip():
+                continue
+
+            try:
+                record = json.loads(text)
+                ids = record.get("artifacts") or []
+
+                if not isinstance(ids, list):
+                    raise ValueError
+
+                yield line, str(record["login"]), str(record["password"]), ids
+
+            except (ValueError, KeyError, TypeError, AttributeError):
+                yield line, None, None, "повреждённая запись"
+
+
+# ИМПОРТ
+def _write_batch(batch, needs_newline):
+    """
+    пишет пачку: файлы артефактов, затем строки пользователей
+    """
+
+    for login, _, ids in batch:
+        if ids:
+            with open(get_user_file(login), "w", encoding="utf-8") as f:
+                json.dump(ids, f, ensure_ascii=False, indent=4)
+
+    data = "".join(f"{login} {password}\n" for login, password, _ in batch)
+
+    if needs_newline:
+        data = "\n" + data
+
+    fd = os.open(USERS_FILE, os.O_WRONLY | os.O_APPEND)
+
+    try:
+        os.write(fd, data.encode("utf-8"))
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def import_accounts(path, batch_size=BATCH_SIZE):
+    """
+    импортирует аккаунты из CSV / JSONL
+
+    returns:
+        dict — счётчики: imported / existing / duplicates /
+               invalid (по причинам) / dropped_artifacts /
+               users_before
+    """
+
+    ensure_users_file()
+
+    # последняя строка без перевода — иначе первая запись склеится с ней
+    needs_newline = False
+
+    with open(USERS_FILE, "rb") as f:
+        if f.seek(0, os.SEEK_END):
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+
+    known = {login for login, _ in iter_users()}
+    existing_count = len(known)
+
+    stats = {
+        "imported": 0,
+        "existing": 0,
+        "duplicates": 0,
+        "invalid": {},
+        "dropped_artifacts": 0
+    }
+
+    seen_new = set()
+    batch = []
+
+    for _, login, password, ids in read_records(path):
+
+        if login is None:
+            error = ids
+        else:
+            error = credentials_error(login, password)
+
+        if error is not None:
+            stats["invalid"][error] = stats["invalid"].get(error, 0) + 1
+            continue
+
+        if login in known:
+            stats["duplicates" if login in seen_new else "existing"] += 1
+            continue
+
+        known.add(login)
+        seen_new.add(login)
+
+        valid_ids = []
+
+        for a_id in ids:
+            if get_artifact_by_id(a_id) and a_id not in valid_ids:
+                valid_ids.append(a_id)
+            else:
+                stats["dropped_artifacts"] += 1
+
+        batch.append((login, password, valid_ids))
+
+        if len(batch) >= batch_size:
+            _write_batch(batch, needs_newline)
+            needs_newline = False
+
+            stats["imported"] += len(batch)
+            batch = []
+
+    if batch:
+        _write_batch(batch, needs_newline)
+        stats["imported"] += len(batch)
+
+    stats["users_before"] = existing_count
+
+    return stats
+
+
+# ЭКСПОРТ
+def export_accounts(path):
+    """
+    потоково выгружает всех пользователей с артефактами
+
+    returns:
+        int — число выгруженных аккаунтов
+    """
+
+    kind = _format(path)
+    exported = 0
+
+    tmp_path = path + ".tmp"
+
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f) if kind == "csv" else None
+
+        if writer is not None:
+            writer.writerow(CSV_FIELDS)
+
+        for login, password in iter_users():
+            ids = load_artifacts_ids(login)
+
+            if writer is not None:
+                writer.writerow((login, password, ARTIFACT_SEPARATOR.join(ids)))
+            else:
+                f.write(json.dumps(
+                    {"login": login, "password": password, "artifacts": ids},
+                    ensure_ascii=False
+                ))
+                f.write("\n")
+
+            exported += 1
+
+    os.replace(tmp_path, path)
+
+    return exported
+
+
+def main(argv=None):
+    import sys
+
+    argv = sys.argv[1:] if argv is None else argv
+
+    if len(argv) != 2 or argv[0] not in ("import", "export"):
+        print("использование: python accounts_bulk.py import|export <файл.csv|файл.jsonl>")
+        return 2
+
+    command, path = argv
+    start = time.perf_counter()
+
+    try:
+        if command == "export":
+            total = export_accounts(path)
+            print(f"выгружено аккаунтов: {total}")
+
+        else:
+            stats = import_accounts(path)
+            total = stats["imported"]
+
+            print(f"пользователей было: {stats['users_before']}")
+            print(f"импортировано:      {stats['imported']}")
+            print(f"уже существуют:     {stats['existing']}")
+            print(f"повторы в файле:    {stats['duplicates']}")
+            print(f"отброшено ID артефактов: {stats['dropped_artifacts']}")
+
+            for reason, value in stats["invalid"].items():
+                print(f"отклонено ({reason}): {value}")
+
+    except (OSError, ValueError) as error:
+        print("ошибка:", error)
+        return 1
+
+    elapsed = time.perf_counter() - start
+
+    print(f"время: {elapsed:.2f} с ({total / elapsed:,.0f} записей в секунду)"
+          .replace(",", " "))
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,235 @@
+"""
+советник ветки 3 (what-if оценка вариантов хода)
+
+идея:
+    - текущее состояние игрока и соперника снимается один раз
+      (simulation.fork_branch3) и разделяется всеми прогонами
+    - для каждого варианта хода (подождать / начать проект /
+      продать проект) выполняются сотни прогонов Монте-Карло
+    - прогоны раздаются пачками в пул процессов, результаты
+      собираются до истечения бюджета времени (по умолчанию 200 мс)
+    - в пуле одновременно не больше пачек, чем процессов: новая
+      пачка отправляется, когда готова предыдущая; срок передаётся
+      в пачку, и она сама останавливается на нём, поэтому после
+      подсказки процессы не заняты лишней работой
+    - процессы пула запускаются при входе в ветку 3
+      (simulation.warm_pool), а не внутри бюджета первой подсказки
+
+результат по каждому варианту:
+    mean — ожидаемый итоговый бюджет
+    ruin — доля прогонов, закончившихся банкротством
+    n    — сколько прогонов успело выполниться
+
+функции модуля:
+    candidate_actions — варианты хода для состояния
+    evaluate_actions  — оценить варианты в пределах бюджета времени
+    show_advice       — вывести таблицу советника в ветке 3
+"""
+
+
+import os
+import random
+import time
+
+from concurrent.futures import wait, FIRST_COMPLETED
+
+from balance import get_balance
+from random_pool import RandomPool
+from simulation import WAIT, get_pool, fork_branch3, rollout_branch3
+
+
+# бюджет времени на одну подсказку, секунды
+ADVICE_TIME_BUDGET = 0.2
+
+# прогонов в одной пачке и максимум на вариант
+ROLLOUTS_PER_BATCH = 50
+MAX_ROLLOUTS = 400
+
+# горизонт прогона в ходах
+ADVICE_HORIZON = 20
+
+# сколько после срока ждать пачки, которые сами останавливаются
+ADVICE_GRACE = 0.02
+
+
+def candidate_actions(state):
+    """
+    returns:
+        list[tuple] — действия в формате simulation.apply_action
+    """
+
+    actions = [WAIT]
+
+    for project_type in get_balance()["branch3"]["project_types"]:
+        actions.append(("start", project_type))
+
+    for index in range(len(state.deals)):
+        actions.append(("abandon", index))
+
+    return actions
+
+
+def run_batch(state, action, count, seed, win_target, horizon, deadline=None):
+    """
+    пачка прогонов одного варианта (выполняется в процессе пула)
+
+    parameters:
+        deadline — срок по time.time(): после него пачка
+                   останавливается и возвращает то, что успела
+
+    returns:
+        tuple (сумма итоговых бюджетов, число банкротств, число прогонов)
+    """
+
+    rng = RandomPool(seed)
+
+    total = 0
+    ruins = 0
+    done = 0
+
+    while done < count:
+        if deadline is not None and time.time() >= deadline:
+            break
+
+        budget, bankrupt = rollout_branch3(state, action, rng, win_target, horizon)
+        total += budget
+        ruins += bankrupt
+        done += 1
+
+    return total, ruins, done
+
+
+def _batches(actions, seed):
+    """
+    пачки по кругу между вариантами, чтобы при нехватке
+    времени все варианты получили примерно поровну прогонов
+    """
+
+    rounds = MAX_ROLLOUTS // ROLLOUTS_PER_BATCH
+
+    for r in range(rounds):
+        for i, action in enumerate(actions):
+            yield action, seed + r * len(actions) + i
+
+
+def evaluate_actions(state, win_target, time_budget=ADVICE_TIME_BUDGET,
+                     horizon=ADVICE_HORIZON, seed=None):
+    """
+    оценивает все варианты хода в пределах бюджета времени
+
+    returns:
+        dict {действие: {"mean": ..., "ruin": ..., "n": ...}}
+    """
+
+    # срок по time.time() — общий для процессов пула
+    deadline = time.time() + time_budget
+
+    if seed is None:
+        seed = random.getrandbits(32)
+
+    actions = candidate_actions(state)
+    totals = {action: [0, 0, 0] for action in actions}
+
+    def merge(action, result):
+        acc = totals[action]
+        for i, value in enumerate(result):
+            acc[i] += value
+
+    batches = _batches(actions, seed)
+    pool = get_pool()
+
+    if pool is not None:
+        workers = os.cpu_count() or 1
+        pending = {}
+
+        def submit():
+            for action, batch_seed in batches:
+                future = pool.submit(
+                    run_batch, state, action, ROLLOUTS_PER_BATCH,
+                    batch_seed, win_target, horizon, deadline
+                )
+                pending[future] = action
+                return
+
+        for _ in range(workers):
+            submit()
+
+        while pending:
+            # после срока пачки останавливаются сами — недолго ждём их итоги
+            remaining = deadline + ADVICE_GRACE - time.time()
+
+            if remaining <= 0:
+                break
+
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                merge(pending.pop(future), future.result())
+
+                if time.time() < deadline:
+                    submit()
+
+        for future in pending:
+            future.cancel()
+
+    else:
+        for action, batch_seed in batches:
+            if time.time() >= deadline:
+                break
+
+            merge(action, run_batch(
+                state, action, ROLLOUTS_PER_BATCH,
+                batch_seed, win_target, horizon, deadline
+            ))
+
+    report = {}
+
+    for action, (total, ruins, count) in totals.items():
+        report[action] = {
+            "mean": total / count if count else None,
+            "ruin": ruins / count if count else None,
+            "n": count
+        }
+
+    return report
+
+
+def describe_action(action, state):
+    kind, arg = action
+    types = get_balance()["branch3"]["project_types"]
+
+    if kind == "start":
+        return "начать: " + types[arg]["name"]
+
+    if kind == "abandon":
+        deal_type = state.deals[arg][0]
+        return f"продать проект {arg + 1} ({types[deal_type]['name']})"
+
+    return "подождать продвижения работ"
+
+
+def show_advice(player, rival, market=None):
+    """
+    печатает оценку вариантов хода для текущего состояния ветки 3
+    """
+
+    state = fork_branch3(player, rival, market)
+    report = evaluate_actions(state, player.win_target)
+
+    print("\n[советник] прогноз на", ADVICE_HORIZON, "ходов:")
+
+    ranked = sorted(
+        report.items(),
+        key=lambda item: -(item[1]["mean"] or 0)
+    )
+
+    for action, result in ranked:
+        if not result["n"]:
+            continue
+
+        print(f"- {describe_action(action, state)}")
+        print(
+            f"  ожидаемый бюджет: {int(result['mean'])}"
+            f", риск банкротства: {result['ruin'] * 100:.1f} %"
+            f" (прогонов: {result['n']})"
+        )
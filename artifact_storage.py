@@ -30,16 +30,26 @@ import json
 from json import JSONDecodeError
 
 from artifacts import get_artifact_by_id
+from metrics import timed, count
 
 
 STORAGE_DIR = "storage"
 
+# директория создаётся один раз за процесс
+_storage_ready = False
+
 
 def ensure_storage_dir():
     """
     Гарантирует существование директории хранения артефактов
     """
+    global _storage_ready
+
+    if _storage_ready:
+        return
+
     os.makedirs(STORAGE_DIR, exist_ok=True)
+    _storage_ready = True
 
 
 def get_user_file(username):
@@ -84,13 +94,12 @@ def save_artifacts_ids(username, ids):
 
     file_path = get_user_file(username)
 
-    ensure_storage_dir()
-
     with open(file_path, "w", encoding="utf-8") as f:
         json.dump(ids, f, ensure_ascii=False, indent=4)
 
 
 # ВЫДАЧА АРТЕФАКТА
+@timed("storage.give_artifact")
 def give_artifact(username, artifact_id):
     """
     Выдаёт артефакт конкретному игроку,
@@ -101,7 +110,15 @@ def give_artifact(username, artifact_id):
         False — если уже был получен
     """
 
-    ids = load_artifacts_ids(username)
+    # профиль сессии уже знает артефакты игрока — файл не читаем
+    from session_profile import get_profile
+
+    profile = get_profile(username)
+
+    if profile is not None:
+        ids = list(profile.artifact_ids)
+    else:
+        ids = load_artifacts_ids(username)
 
     # Уже есть — повторно не выдаём
     if artifact_id in ids:
@@ -114,6 +131,11 @@ def give_artifact(username, artifact_id):
     ids.append(artifact_id)
     save_artifacts_ids(username, ids)
 
+    if profile is not None:
+        profile.add_artifact(artifact)
+
+    count("artifacts.granted")
+
     print("\n[достижение получено]")
     print(artifact.name)
     print(artifact.desc)
@@ -122,6 +144,7 @@ def give_artifact(username, artifact_id):
 
 
 # ВОССТАНОВЛЕНИЕ ОБЪЕКТОВ
+@timed("storage.load_player_artifacts_objects")
 def load_player_artifacts_objects(username):
     """
     Загружает артефакты игрока как ОБЪЕКТЫ,
@@ -17,6 +17,7 @@
     try_ten_deals(player, username)
     try_big_profit(amount, username)
     try_long_project(deal, username)
+    try_long_freeze(freeze_turns, username)
     try_risky_abort(username)
     try_lucky_event(username)
 
@@ -61,6 +62,14 @@ def try_long_project(deal, username):
         give_artifact(username, "long_project")
 
 
+def try_long_freeze(freeze_turns, username):
+    """
+    Выдаётся за затянувшуюся сделку ветки 2 (заморозка от 3 ходов)
+    """
+    if freeze_turns >= 3:
+        give_artifact(username, "long_project")
+
+
 def try_risky_abort(username):
     """
     Проект был досрочно продан с риском
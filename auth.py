@@ -18,16 +18,21 @@
 
     3) после успешного входа:
         - имя игрока сохраняется как текущий пользователь сессии
-        - загружаются его персональные артефакты
-        - выполняется их активация в рамках текущей игры
+        - собирается профиль сессии (session_profile): артефакты
+          и сохранённая партия читаются один раз и дальше
+          берутся из него
+        - выполняется активация артефактов в рамках текущей игры
 
 вспомогательные функции:
     set_current_username / get_current_username —
         управление текущим активным пользователем
 
-    load_users / save_user —
+    load_users / iter_users / save_user —
         работа с файлом хранения пользователей
 
+    credentials_error / validate_credentials —
+        проверка логина и пароля (без вывода / с выводом)
+
 совместимость:
     функция get_or_create_user сохранена для старых версий проекта
     и выполняет регистрацию или вход в зависимости от наличия игрока
@@ -37,12 +42,14 @@
 import os
 
 from pathlib import Path
-from artifacts import show_artifacts_on_login
-from artifact_storage import load_player_artifacts_objects
+from metrics import timed
 
 
 USERS_FILE = Path("storage/users.txt")
 
+# файл пользователей проверяется один раз за процесс
+_users_file_ready = False
+
 
 def ensure_users_file():
     """
@@ -54,6 +61,11 @@ def ensure_users_file():
     returns:
         none
     """
+    global _users_file_ready
+
+    if _users_file_ready:
+        return
+
     # создаём директорию storage при необходимости
     os.makedirs("storage", exist_ok=True)
 
@@ -62,33 +74,57 @@ def ensure_users_file():
         with open(USERS_FILE, "w", encoding="utf-8"):
             pass
 
+    _users_file_ready = True
 
-def validate_credentials(login, password):
+
+def credentials_error(login, password):
     """
-    выполняет простую валидацию логина и пароля
+    проверка логина и пароля без вывода на экран
 
     parameters:
-        login — введённый логин
-        password — введённый пароль
+        login — логин
+        password — пароль
 
     returns:
-        bool — True если данные допустимы, иначе False
+        str — описание ошибки или None, если данные допустимы
     """
 
     if not login:
-        print("логин не может быть пустым")
-        return False
+        return "логин не может быть пустым"
 
     if not password:
-        print("пароль не может быть пустым")
-        return False
+        return "пароль не может быть пустым"
 
-    if " " in login or " " in password:
-        print("логин и пароль не должны содержать пробелы")
-        return False
+    # пробелы и переводы строк ломают формат users.txt
+    if any(c.isspace() for c in login) or any(c.isspace() for c in password):
+        return "логин и пароль не должны содержать пробелы"
+
+    # логин — часть имени файла артефактов (storage/artifacts_<логин>.json)
+    if "/" in login or "\\" in login:
+        return "логин не должен содержать символы / и \\"
 
     if len(password) < 3:
-        print("пароль слишком короткий (минимум 3 символа)")
+        return "пароль слишком короткий (минимум 3 символа)"
+
+    return None
+
+
+def validate_credentials(login, password):
+    """
+    выполняет простую валидацию логина и пароля
+
+    parameters:
+        login — введённый логин
+        password — введённый пароль
+
+    returns:
+        bool — True если данные допустимы, иначе False
+    """
+
+    error = credentials_error(login, password)
+
+    if error is not None:
+        print(error)
         return False
 
     return True
@@ -114,6 +150,7 @@ def get_current_username():
     return CURRENT_USER
 
 
+@timed("auth.load_users")
 def load_users():
     """
     загружает пользователей из файла
@@ -125,9 +162,18 @@ def load_users():
         dict — словарь формата {логин: пароль}
     """
 
-    ensure_users_file()
+    return dict(iter_users())
 
-    users = {}
+
+def iter_users():
+    """
+    читает файл пользователей построчно, не собирая его в память
+
+    returns:
+        iterator — пары (логин, пароль) в порядке файла
+    """
+
+    ensure_users_file()
 
     with open(USERS_FILE, "r", encoding="utf-8") as f:
 
@@ -143,11 +189,7 @@ def load_users():
             if len(parts) != 2:
                 continue
 
-            login, password = parts
-
-            users[login] = password
-
-    return users
+            yield parts[0], parts[1]
 
 
 def save_user(login, password):
@@ -230,14 +272,22 @@ def login_user(login, password):
         bool — True если вход выполнен успешно
     """
 
-    if not authenticate_user(login, password):
+    # профиль сессии: пароль, артефакты и сохранение — одним проходом
+    from session_profile import load_profile
+
+    profile, error = load_profile(login, password)
+
+    if profile is None:
+        print(error)
         return False
 
     print("успешный вход в игру")
 
     set_current_username(login)
 
-    artifacts = load_player_artifacts_objects(login)
+    from artifacts import show_artifacts_on_login
+
+    artifacts = profile.artifacts
 
     if artifacts:
         print("\nактивация сохранённых артефактов...")
@@ -0,0 +1,433 @@
+"""
+модуль баланса игры (таблицы чисел всех веток)
+
+назначение:
+    - все балансные таблицы веток лежат в одном файле balance.json
+    - файл читается один раз, проверяется и «компилируется»
+      в неизменяемые таблицы (MappingProxyType + кортежи)
+    - интерактивная игра подхватывает правки файла без перезапуска:
+      get_balance() раз в RELOAD_INTERVAL секунд сверяет время
+      изменения файла и перечитывает его
+    - процессы-симуляторы не разбирают файл заново: главный процесс
+      публикует скомпилированные таблицы в разделяемую память
+      (publish_shared), рабочие процессы подключаются к ней
+      (attach_shared) и перечитывают таблицы только при смене поколения
+    - запись в разделяемую память защищена seqlock: поколение
+      нечётное, пока идёт запись, и чётное после неё; читатель
+      копирует данные и сверяет поколение до и после копии —
+      при несовпадении (запись во время чтения) читает заново
+
+структура файла:
+    version  — версия содержимого баланса (целое число)
+    branch1  — переговоры: стартовый бюджет, цель, OUTCOME_VALUES,
+               матрица исходов, стили соперника,
+               многораундовый торг (negotiation)
+    branch2  — рынок: качество машин, шансы и длительности заморозки,
+               диапазоны прибыли, цены, стили соперников,
+               книга заявок общего рынка (order_book),
+               ценовой индекс уровней (price_index)
+    branch3  — портфель: типы проектов, события, убыток выхода,
+               рынок соперников и их поведение
+
+функции модуля:
+    load_balance     — прочитать, проверить и скомпилировать файл
+    validate_balance — проверка структуры (ValueError при ошибке)
+    get_balance      — текущие таблицы (с горячей перезагрузкой)
+    thaw             — изменяемая копия таблиц (для балансировки)
+    publish_shared / attach_shared — таблицы в разделяемой памяти
+"""
+
+
+import hashlib
+import json
+import marshal
+import os
+import struct
+import time
+
+from pathlib import Path
+from types import MappingProxyType
+
+
+BALANCE_FILE = Path(__file__).with_name("balance.json")
+
+# как часто проверять, не изменился ли файл баланса (секунды)
+RELOAD_INTERVAL = 1.0
+
+# разделяемая память: заголовок (поколение, длина) + данные
+SHARED_CAPACITY = 1 << 20
+_HEADER = struct.Struct("<QQ")
+
+# сколько раз читатель повторяет чтение, пока идёт запись
+SHARED_RETRIES = 1000
+
+
+_balance = None
+_mtime = None
+_checked_at = 0.0
+
+_shared = None
+_shared_generation = 0
+
+_published = None
+
+
+# ПРОВЕРКА
+def _check_range(value, where):
+    if (not isinstance(value, list) or len(value) != 2
+            or not all(isinstance(v, int) for v in value)):
+        raise ValueError(f"{where}: ожидался диапазон [min, max] из целых")
+
+    if value[0] > value[1]:
+        raise ValueError(f"{where}: min больше max")
+
+
+def _check_chance(value, where):
+    if not isinstance(value, (int, float)) or not 0 <= value <= 1:
+        raise ValueError(f"{where}: вероятность должна быть от 0 до 1")
+
+
+def _check_keys(table, keys, where):
+    if set(table) != set(keys):
+        raise ValueError(f"{where}: ожидались ключи {sorted(keys)}")
+
+
+def validate_balance(data):
+    """
+    проверяет структуру файла баланса
+
+    raises:
+        ValueError — с описанием первой найденной ошибки
+    """
+
+    try:
+        _validate(data)
+    except KeyError as error:
+        raise ValueError(f"нет ключа {error}") from None
+    except (TypeError, AttributeError) as error:
+        raise ValueError(f"неверная структура: {error}") from None
+
+
+def _validate(data):
+    if not isinstance(data.get("version"), int):
+        raise ValueError("version: ожидалось целое число")
+
+    for section in ("branch1", "branch2", "branch3"):
+        if section not in data:
+            raise ValueError(f"нет раздела {section}")
+
+        for key in ("start_budget", "win_target"):
+            if not isinstance(data[section].get(key), int):
+                raise ValueError(f"{section}.{key}: ожидалось целое число")
+
+    b1 = data["branch1"]
+
+    for code, value in b1["outcome_values"].items():
+        _check_range(value, f"branch1.outcome_values.{code}")
+
+    for action, row in b1["outcome_matrix"].items():
+        _check_keys(row, b1["rival_styles"], f"branch1.outcome_matrix.{action}")
+
+        for outcome in row.values():
+            if outcome != 0 and str(outcome) not in b1["outcome_values"]:
+                raise ValueError(f"branch1.outcome_matrix.{action}: неизвестный исход {outcome}")
+
+    talks = b1["negotiation"]
+
+    for key in ("rounds", "levels"):
+        if not isinstance(talks[key], int) or talks[key] < 2:
+            raise ValueError(f"branch1.negotiation.{key}: ожидалось целое не меньше 2")
+
+    _check_chance(talks["player_patience"], "branch1.negotiation.player_patience")
+    _check_keys(talks["styles"], b1["rival_styles"], "branch1.negotiation.styles")
+
+    for style, info in talks["styles"].items():
+        _check_chance(info["patience"], f"branch1.negotiation.styles.{style}.patience")
+        _check_chance(info["walk_chance"], f"branch1.negotiation.styles.{style}.walk_chance")
+
+    b2 = data["branch2"]
+    qualities = b2["quality_names"]
+
+    for table in ("freeze_chance", "freeze_durations", "profit_ranges"):
+        _check_keys(b2[table], qualities, f"branch2.{table}")
+
+    for q in qualities:
+        _check_chance(b2["freeze_chance"][q], f"branch2.freeze_chance.{q}")
+        _check_range(b2["freeze_durations"][q], f"branch2.freeze_durations.{q}")
+        _check_range(b2["profit_ranges"][q], f"branch2.profit_ranges.{q}")
+
+    for key in ("car_price", "urgent_sale_loss", "rival_budget"):
+        _check_range(b2[key], f"branch2.{key}")
+
+    for style, info in b2["rival_styles"].items():
+        _check_range(info["profit"], f"branch2.rival_styles.{style}.profit")
+
+    book = b2["order_book"]
+    _check_chance(book["spread"], "branch2.order_book.spread")
+    _check_chance(book["price_weight"], "branch2.order_book.price_weight")
+
+    for key in ("rival_orders", "rival_traders", "order_ttl", "checkpoint_every"):
+        if not isinstance(book[key], int) or book[key] < 1:
+            raise ValueError(f"branch2.order_book.{key}: ожидалось целое больше 0")
+
+    index = b2["price_index"]
+
+    for key in ("reversion", "impact", "volatility", "profit_weight"):
+        _check_chance(index[key], f"branch2.price_index.{key}")
+
+    for key in ("floor", "cap", "chance_elasticity"):
+        if not isinstance(index[key], (int, float)) or index[key] < 0:
+            raise ValueError(f"branch2.price_index.{key}: ожидалось неотрицательное число")
+
+    if not index["floor"] <= 1 <= index["cap"]:
+        raise ValueError("branch2.price_index: floor ≤ 1 ≤ cap")
+
+    if not isinstance(index["rival_flow"], int) or index["rival_flow"] < 0:
+        raise ValueError("branch2.price_index.rival_flow: ожидалось целое не меньше 0")
+
+    b3 = data["branch3"]
+
+    for t, info in b3["project_types"].items():
+        for key in ("buy", "profit", "freeze"):
+            _check_range(info[key], f"branch3.project_types.{t}.{key}")
+
+        if info["freeze"][0] < 1:
+            raise ValueError(f"branch3.project_types.{t}.freeze: минимум 1 ход")
+
+    events = b3["events"]
+    _check_chance(events["boost_chance"], "branch3.events.boost_chance")
+    _check_chance(events["delay_chance"], "branch3.events.delay_chance")
+
+    if events["boost_chance"] > events["delay_chance"]:
+        raise ValueError("branch3.events: порог delay_chance включает boost_chance")
+
+    _check_range(events["boost_bonus"], "branch3.events.boost_bonus")
+    _check_range(events["delay_penalty"], "branch3.events.delay_penalty")
+    _check_range(b3["abandon_loss"], "branch3.abandon_loss")
+    _check_range(b3["rival_budget"], "branch3.rival_budget")
+    _check_chance(b3["saturation_weight"], "branch3.saturation_weight")
+
+    _check_keys(b3["rival_policy"], b3["rival_styles"], "branch3.rival_policy")
+
+    for style, policy in b3["rival_policy"].items():
+        for key in ("start", "reserve", "abandon"):
+            _check_chance(policy[key], f"branch3.rival_policy.{style}.{key}")
+
+        if len(policy["weights"]) != len(b3["project_types"]):
+            raise ValueError(f"branch3.rival_policy.{style}.weights: по весу на тип проекта")
+
+
+# КОМПИЛЯЦИЯ
+def _plain(data):
+    """
+    JSON → обычные словари с целыми ключами и кортежами
+    """
+
+    if isinstance(data, dict):
+        return {
+            (int(k) if isinstance(k, str) and k.lstrip("-").isdigit() else k): _plain(v)
+            for k, v in data.items()
+        }
+
+    if isinstance(data, (list, tuple)):
+        return tuple(_plain(v) for v in data)
+
+    return data
+
+
+def _freeze(data):
+    if isinstance(data, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in data.items()})
+
+    return data
+
+
+def compile_balance(data, digest=None):
+    """
+    проверенный JSON → неизменяемые таблицы
+
+    к таблицам добавляется digest — отпечаток содержимого,
+    по нему кэшируются производные расчёты
+    """
+
+    plain = _plain(data)
+
+    if digest is None:
+        digest = hashlib.sha1(marshal.dumps(plain)).hexdigest()
+
+    plain["digest"] = digest
+
+    return _freeze(plain)
+
+
+def thaw(balance):
+    """
+    изменяемая копия таблиц (dict), например для перебора параметров
+    """
+
+    if isinstance(balance, (dict, MappingProxyType)):
+        return {k: thaw(v) for k, v in balance.items() if k != "digest"}
+
+    return balance
+
+
+def load_balance(path=BALANCE_FILE):
+    """
+    читает, проверяет и компилирует файл баланса
+
+    raises:
+        ValueError — файл повреждён или не прошёл проверку
+    """
+
+    with open(path, "rb") as f:
+        raw = f.read()
+
+    data = json.loads(raw.decode("utf-8"))
+    validate_balance(data)
+
+    return compile_balance(data, hashlib.sha1(raw).hexdigest())
+
+
+def get_balance():
+    """
+    текущие таблицы баланса
+
+    в рабочем процессе — из разделяемой памяти,
+    в основном — из файла с проверкой изменений
+    """
+
+    global _balance, _mtime, _checked_at
+
+    if _shared is not None:
+        return _read_shared()
+
+    now = time.monotonic()
+
+    if _balance is not None and now - _checked_at < RELOAD_INTERVAL:
+        return _balance
+
+    _checked_at = now
+    mtime = os.stat(BALANCE_FILE).st_mtime_ns
+
+    if _balance is None:
+        _balance = load_balance()
+        _mtime = mtime
+
+    elif mtime != _mtime:
+        _mtime = mtime
+
+        try:
+            _balance = load_balance()
+        except (OSError, ValueError) as error:
+            print("\n[баланс] изменения не применены:", error)
+            return _balance
+
+        print("\n[баланс] таблицы обновлены, версия", _balance["version"])
+
+        # рабочие процессы увидят новое поколение таблиц
+        if _published is not None:
+            publish_shared(_balance)
+
+    return _balance
+
+
+# РАЗДЕЛЯЕМАЯ ПАМЯТЬ
+def publish_shared(balance=None):
+    """
+    записывает таблицы в разделяемую память для рабочих процессов
+
+    returns:
+        str — имя сегмента для attach_shared
+    """
+
+    from multiprocessing import shared_memory
+
+    global _published
+
+    if balance is None:
+        balance = get_balance()
+
+    payload = marshal.dumps(thaw(balance) | {"digest": balance["digest"]})
+
+    if len(payload) + _HEADER.size > SHARED_CAPACITY:
+        raise ValueError("таблицы баланса не помещаются в разделяемую память")
+
+    if _published is None:
+        _published = shared_memory.SharedMemory(create=True, size=SHARED_CAPACITY)
+
+        import atexit
+        atexit.register(_release_published)
+
+    generation, size = _HEADER.unpack_from(_published.buf, 0)
+
+    # seqlock: нечётное поколение — запись идёт, данные не читать
+    _HEADER.pack_into(_published.buf, 0, generation + 1, size)
+    _published.buf[_HEADER.size:_HEADER.size + len(payload)] = payload
+    _HEADER.pack_into(_published.buf, 0, generation + 2, len(payload))
+
+    return _published.name
+
+
+def _release_published():
+    global _published
+
+    if _published is not None:
+        _published.close()
+        _published.unlink()
+        _published = None
+
+
+def attach_shared(name):
+    """
+    подключает рабочий процесс к таблицам в разделяемой памяти
+    (используется как initializer пула процессов)
+    """
+
+    from multiprocessing import shared_memory
+
+    global _shared, _shared_generation, _balance
+
+    # сегментом владеет главный процесс, он же удаляет его при выходе
+    _shared = shared_memory.SharedMemory(name=name)
+
+    _shared_generation = 0
+    _balance = None
+
+
+def _read_shared():
+    """
+    таблицы из разделяемой памяти (seqlock, см. publish_shared)
+
+    raises:
+        RuntimeError — запись не завершается, а прежних таблиц нет
+    """
+
+    global _shared_generation, _balance
+
+    buf = _shared.buf
+
+    for _ in range(SHARED_RETRIES):
+        generation, size = _HEADER.unpack_from(buf, 0)
+
+        if generation == _shared_generation and _balance is not None:
+            return _balance
+
+        if generation % 2:
+            time.sleep(0.0001)
+            continue
+
+        payload = bytes(buf[_HEADER.size:_HEADER.size + size])
+
+        # поколение сменилось во время копии — данные смешанные
+        if _HEADER.unpack_from(buf, 0)[0] != generation:
+            continue
+
+        _balance = _freeze(marshal.loads(payload))
+        _shared_generation = generation
+
+        return _balance
+
+    if _balance is None:
+        raise RuntimeError("таблицы баланса в разделяемой памяти не дописаны")
+
+    return _balance
@@ -0,0 +1,316 @@
+"""
+инструмент балансировки: перебор параметров игры
+
+идея:
+    - берётся базовая конфигурация (таблицы balance.json,
+      simulation.default_config)
+    - задаётся пространство поиска: путь к значению → варианты,
+      например "branch2.win_target" или "branch3.project_types.3.profit"
+    - сетка (все сочетания) или случайный поиск (n точек)
+    - для каждой точки и ветки играется games безголовых партий
+      в пуле процессов
+    - результат точки кэшируется на диске по хэшу
+      (раздел ветки + ветка + число партий + зерно + версия правил),
+      поэтому повторные и пересекающиеся переборы считают
+      только новые точки
+
+результат:
+    поверхность «доля побед / средняя длина партии»
+    по каждой ветке для каждой точки перебора
+
+запуск:
+    python balance_sweep.py --set branch2.win_target=300000,350000 \\
+        --set "branch2.profit_ranges.4=[25000,70000],[20000,90000]" \\
+        --branches 1,2,3 --games 200
+
+    --random N — вместо сетки взять N случайных точек
+"""
+
+
+import argparse
+import copy
+import hashlib
+import itertools
+import json
+import os
+import random
+
+from artifact_storage import STORAGE_DIR
+from random_pool import BACKEND, RandomPool
+from simulation import (
+    SIM_VERSION,
+    SIMULATORS,
+    get_pool,
+    default_config,
+    normalize_config
+)
+
+
+CACHE_DIR = os.path.join(STORAGE_DIR, "sweep_cache")
+
+
+# ПРОСТРАНСТВО ПОИСКА
+def set_path(config, path, value):
+    """
+    записывает значение по пути вида "branch3.project_types.3.profit"
+    """
+
+    keys = [int(k) if k.isdigit() else k for k in path.split(".")]
+    node = config
+
+    for key in keys[:-1]:
+        node = node[key]
+
+    node[keys[-1]] = normalize_config(value)
+
+
+def apply_overrides(base, overrides):
+    """
+    returns:
+        dict — копия базовой конфигурации с подменёнными значениями
+    """
+
+    config = copy.deepcopy(base)
+
+    for path, value in overrides.items():
+        set_path(config, path, value)
+
+    return config
+
+
+def grid(space):
+    """
+    все сочетания значений пространства поиска
+
+    parameters:
+        space — dict {путь: [варианты]}
+    """
+
+    paths = list(space)
+
+    for values in itertools.product(*(space[p] for p in paths)):
+        yield dict(zip(paths, values))
+
+
+def random_points(space, count, seed=0):
+    """
+    count случайных точек пространства поиска
+    """
+
+    rng = random.Random(seed)
+
+    for _ in range(count):
+        yield {path: rng.choice(values) for path, values in space.items()}
+
+
+# КЭШ
+def branch_view(config, branch):
+    """
+    часть конфигурации, от которой зависит ветка
+    (точки, отличающиеся только чужими таблицами, берутся из кэша)
+    """
+
+    return config[f"branch{branch}"]
+
+
+def point_key(config, branch, games, seed):
+    """
+    хэш точки перебора для кэша
+
+    генератор (random_pool.BACKEND) входит в ключ: numpy и random
+    дают разные партии при том же зерне, поэтому кэш, набранный
+    на другой машине, не выдаётся за свой
+    """
+
+    payload = json.dumps(
+        {
+            "config": branch_view(config, branch),
+            "branch": branch,
+            "games": games,
+            "seed": seed,
+            "version": SIM_VERSION,
+            "backend": BACKEND
+        },
+        sort_keys=True
+    )
+
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def cache_load(key):
+    path = os.path.join(CACHE_DIR, key + ".json")
+
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def cache_save(key, result):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+
+    tmp_path = os.path.join(CACHE_DIR, key + ".tmp")
+
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+    os.replace(tmp_path, os.path.join(CACHE_DIR, key + ".json"))
+
+
+# СИМУЛЯЦИЯ ТОЧКИ
+def run_point(task):
+    """
+    games партий одной ветки для одной конфигурации
+    (выполняется в процессе пула)
+
+    parameters:
+        task — (config, branch, games, seed)
+
+    returns:
+        dict — wins / bankrupt / win_rate / mean_turns
+    """
+
+    config, branch, games, seed = task
+    simulate = SIMULATORS[branch]
+
+    wins = 0
+    bankrupt = 0
+    turns = 0
+
+    for i in range(games):
+        result = simulate(config, RandomPool(seed + i))
+
+        wins += result.win
+        bankrupt += result.bankrupt
+        turns += result.turns
+
+    return {
+        "games": games,
+        "wins": wins,
+        "bankrupt": bankrupt,
+        "win_rate": wins / games,
+        "bankrupt_rate": bankrupt / games,
+        "mean_turns": turns / games
+    }
+
+
+def sweep(points, branches=(1, 2, 3), games=200, seed=0, base=None):
+    """
+    считает поверхность результатов по точкам перебора
+
+    returns:
+        list[dict] — {"overrides", "branch", "cached", ...результат}
+    """
+
+    if base is None:
+        base = default_config()
+
+    rows = []
+    missing = {}
+
+    for overrides in points:
+        config = apply_overrides(base, overrides)
+
+        for branch in branches:
+            key = point_key(config, branch, games, seed)
+            row = {"overrides": overrides, "branch": branch, "key": key}
+
+            cached = cache_load(key)
+
+            if cached is not None:
+                row.update(cached, cached=True)
+            else:
+                row["cached"] = False
+                missing.setdefault(key, (config, branch, games, seed))
+
+            rows.append(row)
+
+    keys = list(missing)
+    tasks = [missing[key] for key in keys]
+
+    pool = get_pool() if len(tasks) > 1 else None
+    results = pool.map(run_point, tasks) if pool is not None else map(run_point, tasks)
+
+    computed = {}
+
+    for key, result in zip(keys, results):
+        cache_save(key, result)
+        computed[key] = result
+
+    for row in rows:
+        if not row["cached"]:
+            row.update(computed[row["key"]])
+
+    return rows
+
+
+def print_surface(rows):
+    """
+    таблица: точка перебора × ветка → доля побед / средняя длина
+    """
+
+    print(f"{'ветка':>5} {'побед':>7} {'банкр.':>7} {'ходов':>8}  кэш  точка")
+
+    for row in rows:
+        point = ", ".join(f"{k}={json.dumps(v)}" for k, v in row["overrides"].items())
+
+        print(
+            f"{row['branch']:>5} "
+            f"{row['win_rate'] * 100:>6.1f}% "
+            f"{row['bankrupt_rate'] * 100:>6.1f}% "
+            f"{row['mean_turns']:>8.1f}  "
+            f"{'да ' if row['cached'] else 'нет'}  {point or '(база)'}"
+        )
+
+
+def parse_space(items):
+    """
+    ["branch2.win_target=300000,350000"] → {"branch2.win_target": [300000, 350000]}
+    значения разбираются как JSON-список
+    """
+
+    space = {}
+
+    for item in items:
+        path, _, values = item.partition("=")
+        space[path.strip()] = json.loads(f"[{values}]")
+
+    return space
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="перебор параметров баланса")
+    parser.add_argument("--set", action="append", default=[],
+                        help="путь=вариант1,вариант2 (значения в JSON)")
+    parser.add_argument("--branches", default="1,2,3")
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--random", type=int, default=0,
+                        help="число случайных точек вместо сетки")
+    parser.add_argument("--json", help="сохранить поверхность в файл")
+
+    args = parser.parse_args(argv)
+
+    space = parse_space(args.set)
+    branches = tuple(int(b) for b in args.branches.split(","))
+
+    if args.random:
+        points = list(random_points(space, args.random, args.seed))
+    else:
+        points = list(grid(space))
+
+    rows = sweep(points, branches, args.games, args.seed)
+
+    print_surface(rows)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+бенчмарк памяти сущностей: соперники и сделки
+
+что измеряется:
+    сколько байт занимает один соперник (Rival) и одна
+    сделка (Deal) в популяции из миллиона объектов —
+    в текущей модели со __slots__ и в прежней модели
+    на словарях атрибутов (классы Legacy* ниже повторяют
+    прежние Player / Rival / Portfolio / Deal из исходной версии
+    player.py: completed_deals — список сумм сделок, owner
+    и bonus_profit сделке задавала ветка 3)
+
+    отдельно — статистика сделок игрока: прежний список сумм
+    против DealStats (буфер последних сделок и разбивка
+    по веткам, как у игрока) после 0 / 10 / 100 / 1000 сделок
+
+как работает:
+    - популяция создаётся под tracemalloc, байты на объект —
+      прирост памяти, делённый на число объектов
+    - у соперников — режим 3 (проекты) с портфелем,
+      у сделок — владелец и бонус события, как в ветке 3
+    - печатается таблица «было / стало» и экономия
+
+запуск:
+    python bench_entities.py [число объектов]
+"""
+
+
+import gc
+import sys
+import time
+import tracemalloc
+
+from player import Deal, DealStats, Portfolio, Rival
+
+
+# ПРЕЖНЯЯ МОДЕЛЬ (исходные классы player.py, словари атрибутов)
+class LegacyPlayer:
+    def __init__(self, name, budget=0, role=1):
+        self.name = name
+        self.budget = budget
+        self.role = role
+
+        self.is_bankrupt = False
+        self.win_target = None
+
+        self.completed_deals = []
+        self.artifacts = []
+
+
+class LegacyRival(LegacyPlayer):
+    def __init__(self, name, style, mode, budget=0, profit_range=None):
+        super().__init__(name=name, budget=budget, role=0)
+
+        self.style = style
+        self.mode = mode
+
+        self.state = 0
+        self.profit_range = profit_range
+        self.profit = 0
+
+        self.portfolio = None
+
+
+class LegacyPortfolio:
+    def __init__(self):
+        self.deals = []
+
+
+class LegacyDeal:
+    def __init__(self, deal_type, buy_price, freeze_turns):
+        self.type = deal_type
+        self.buy_price = buy_price
+        self.freeze_turns = freeze_turns
+        self.passed = 0
+
+
+# ЗАМЕР
+def measure(factory, count):
+    """
+    returns:
+        tuple (байт на объект, секунд на создание популяции)
+    """
+
+    gc.collect()
+    tracemalloc.start()
+
+    start = time.perf_counter()
+    population = [factory(i) for i in range(count)]
+    elapsed = time.perf_counter() - start
+
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    del population
+    gc.collect()
+
+    return size / count, elapsed
+
+
+def new_rival(i):
+    rival = Rival(name=f"r{i}", style=i % 3, mode=3, budget=i)
+    rival.portfolio = Portfolio()
+    return rival
+
+
+def new_legacy_rival(i):
+    rival = LegacyRival(name=f"r{i}", style=i % 3, mode=3, budget=i)
+    rival.portfolio = LegacyPortfolio()
+    return rival
+
+
+def make_deal(cls, owner):
+    def factory(i):
+        deal = cls(i % 3, 100_000 + i, 2)
+        deal.owner = owner
+        deal.bonus_profit = 0
+        return deal
+
+    return factory
+
+
+def _amount(k):
+    # суммы сделок — вне кэша малых целых, как в игре
+    return 10_000 + 37 * k if k % 3 else -5_000 - k
+
+
+def legacy_stats(deals):
+    def factory(i):
+        return [_amount(k) for k in range(deals)]
+
+    return factory
+
+
+def current_stats(deals):
+    def factory(i):
+        stats = DealStats(recent_size=20, track_branches=True)
+
+        for k in range(deals):
+            stats.record(_amount(k), branch=3)
+
+        return stats
+
+    return factory
+
+
+def run(count=1_000_000):
+    """
+    печатает байты на объект для обеих моделей
+    """
+
+    cases = (
+        ("соперник", new_legacy_rival, new_rival),
+        ("сделка", make_deal(LegacyDeal, None), make_deal(Deal, None)),
+    )
+
+    print(f"память сущностей, байт на объект ({count} объектов)")
+
+    for title, legacy, current in cases:
+        before, before_time = measure(legacy, count)
+        after, after_time = measure(current, count)
+
+        print(f"  {title}:")
+        print(f"    было:     {before:.0f} ({before_time:.2f} с)")
+        print(f"    стало:    {after:.0f} ({after_time:.2f} с)")
+        print(f"    экономия: {1 - after / before:.0%}")
+
+    # статистика игрока — популяция поменьше: у старой модели
+    # память растёт с числом сделок
+    stats_count = min(count, 1000)
+
+    print(f"\nстатистика сделок игрока, байт на игрока ({stats_count} игроков)")
+    print(f"  {'сделок':>7} {'список сумм':>12} {'DealStats':>10}")
+
+    for deals in (0, 10, 100, 1000):
+        before, _ = measure(legacy_stats(deals), stats_count)
+        after, _ = measure(current_stats(deals), stats_count)
+
+        print(f"  {deals:>7} {before:>12.0f} {after:>10.0f}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
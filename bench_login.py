@@ -0,0 +1,136 @@
+"""
+бенчмарк входа в игру: от ввода пароля до меню веток
+
+что измеряется:
+    ввод-вывод хранилища за один вход при N пользователях
+    в users.txt — до меню выбора веток и вопроса о продолжении
+    сохранённой партии
+
+    прежний порядок вызовов:
+        authenticate_user (весь users.txt в словарь)
+        load_player_artifacts_objects (вход)
+        load_player_artifacts_objects (main → load_player_progress)
+        read_session (ask_resume)
+
+    профиль сессии:
+        load_profile (один проход), затем load_player_progress
+        и load_session берут данные из профиля
+
+как работает:
+    - во временном каталоге создаётся storage/ с N пользователями,
+      артефактами и журналом сохранения входящего игрока
+    - каждый вариант повторяется, выводятся min / медиана / max
+
+запуск:
+    python bench_login.py [число пользователей] [повторов]
+"""
+
+
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+
+LOGIN = "bench_player"
+PASSWORD = "secret"
+
+
+def prepare_storage(users):
+    """
+    storage/ во временном каталоге (текущий каталог процесса)
+    """
+
+    os.makedirs("storage", exist_ok=True)
+
+    with open(os.path.join("storage", "users.txt"), "w", encoding="utf-8") as f:
+        for i in range(users - 1):
+            f.write(f"user{i} pass{i}\n")
+
+        f.write(f"{LOGIN} {PASSWORD}\n")
+
+    with open(os.path.join("storage", f"artifacts_{LOGIN}.json"), "w", encoding="utf-8") as f:
+        json.dump(["first_deal", "big_profit", "long_project"], f)
+
+    with open(os.path.join("storage", f"session_{LOGIN}.jsonl"), "w", encoding="utf-8") as f:
+        f.write(json.dumps({"v": 2, "branch": 1, "full": {"player": {"budget": 1}}}) + "\n")
+
+
+def legacy_login():
+    from auth import authenticate_user
+    from artifact_storage import load_player_artifacts_objects
+    from save_system import read_session
+
+    assert authenticate_user(LOGIN, PASSWORD)
+
+    load_player_artifacts_objects(LOGIN)
+    load_player_artifacts_objects(LOGIN)
+    read_session(LOGIN)
+
+
+def profile_login():
+    from auth import set_current_username
+    from session_profile import clear_profile, load_profile
+    from save_system import load_player_progress, load_session
+
+    clear_profile()
+
+    profile, _ = load_profile(LOGIN, PASSWORD)
+    assert profile is not None
+
+    set_current_username(LOGIN)
+
+    load_player_progress()
+    load_session(LOGIN)
+
+
+def measure(func, repeats):
+    samples = []
+
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+
+    return samples
+
+
+def run(users=100_000, repeats=20):
+    """
+    замер обоих вариантов и сводка
+    """
+
+    here = os.getcwd()
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+
+        try:
+            prepare_storage(users)
+
+            results = {
+                "прежний вход": measure(legacy_login, repeats),
+                "профиль сессии": measure(profile_login, repeats)
+            }
+
+        finally:
+            os.chdir(here)
+
+    print(f"вход до меню веток, мс (пользователей: {users}, запусков: {repeats})")
+
+    for title, samples in results.items():
+        print(f"  {title:<15} min {min(samples) * 1000:8.2f}   "
+              f"медиана {statistics.median(samples) * 1000:8.2f}   "
+              f"max {max(samples) * 1000:8.2f}")
+
+    return results
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    )
@@ -0,0 +1,84 @@
+"""
+бенчмарк холодного старта игры
+
+что измеряется:
+    время от запуска процесса python main.py
+    до появления первого меню (пункт «1 — войти»)
+
+как работает:
+    - игра запускается отдельным процессом с небуферизованным выводом
+    - stdout читается построчно до первой строки меню
+    - после этого процессу отправляется «3» (выход из программы)
+    - замер повторяется несколько раз, выводятся min / медиана / max
+
+запуск:
+    python bench_startup.py [количество запусков]
+"""
+
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+FIRST_MENU_LINE = "1 — войти"
+
+
+def measure_once(script="main.py"):
+    """
+    один холодный старт
+
+    returns:
+        float — секунды от запуска процесса до первого меню
+    """
+
+    env = dict(os.environ, PYTHONIOENCODING="utf-8")
+
+    start = time.perf_counter()
+
+    proc = subprocess.Popen(
+        [sys.executable, "-u", script],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        env=env,
+        text=True,
+        encoding="utf-8"
+    )
+
+    elapsed = None
+
+    for line in proc.stdout:
+        if FIRST_MENU_LINE in line:
+            elapsed = time.perf_counter() - start
+            break
+
+    proc.communicate("3\n")
+
+    if elapsed is None:
+        raise RuntimeError("меню не появилось — проверьте main.py")
+
+    return elapsed
+
+
+def run(repeats=10):
+    """
+    выполняет серию замеров и печатает сводку
+    """
+
+    samples = [measure_once() for _ in range(repeats)]
+
+    print("холодный старт до первого меню, мс")
+    print(f"  запусков: {repeats}")
+    print(f"  min:      {min(samples) * 1000:.1f}")
+    print(f"  медиана:  {statistics.median(samples) * 1000:.1f}")
+    print(f"  max:      {max(samples) * 1000:.1f}")
+
+    return samples
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    run(count)
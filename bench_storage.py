@@ -0,0 +1,436 @@
+"""
+бенчмарк хранилища: как растёт цена операций с числом игроков
+
+что измеряется:
+    операции слоя хранения при 10^2, 10^4 и 10^6 пользователей
+    во временном каталоге storage/:
+        load_users, register_user, authenticate_user — auth
+        give_artifact, load_artifacts_ids,
+        load_player_artifacts_objects               — artifact_storage
+    для каждой операции и размера:
+        - операций в секунду
+        - задержки: перцентили metrics.PERCENTILES
+          (гистограмма metrics.Histogram)
+        - системные вызовы и байты чтения / записи на операцию
+          (/proc/self/io: syscr, syscw, rchar, wchar; на
+          платформах без /proc — не считаются)
+    в конце — рост медианы от меньшего размера к большему
+    и показатель степени k в оценке «цена ~ n^k»
+
+как работает:
+    - хранилище наполняется бэкендом (BACKENDS): сейчас один —
+      files (users.txt + artifacts_<логин>.json на игрока);
+      после каждой операции бэкенд возвращает популяцию
+      к исходной (reset), чтобы записи одной операции
+      не удорожали следующие
+    - каждая операция повторяется, пока не истечёт BUDGET секунд
+      (не меньше MIN_OPS и не больше MAX_OPS раз); вывод игры
+      во время замера уходит в буфер, а не в файл, чтобы не
+      добавлять системных вызовов
+    - результат можно сохранить в JSON (--out) с именем бэкенда
+      и файловой системы; --compare сравнивает два таких файла —
+      так переход на другое хранилище обосновывается числами
+
+    наполнение хранилища на 10^6 игроков (миллион файлов
+    артефактов) занимает около минуты, весь замер — несколько
+
+запуск:
+    python bench_storage.py [--sizes 100,10000,1000000] [--out файл.json]
+    python bench_storage.py --compare было.json стало.json
+"""
+
+
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+
+# размеры популяции по умолчанию
+SIZES = (100, 10_000, 1_000_000)
+
+# время на одну операцию одного размера, с
+BUDGET = 1.0
+
+MIN_OPS = 5
+MAX_OPS = 2000
+
+OPERATIONS = (
+    "load_users",
+    "register_user",
+    "authenticate_user",
+    "give_artifact",
+    "load_artifacts_ids",
+    "load_player_artifacts_objects",
+)
+
+# счётчики /proc/self/io на операцию
+IO_FIELDS = ("syscr", "syscw", "rchar", "wchar")
+
+
+# БЭКЕНДЫ
+class FileBackend:
+    """
+    текущее хранилище: storage/users.txt и файл артефактов
+    на каждого игрока (auth, artifact_storage)
+    """
+
+    name = "files"
+
+    def populate(self, users):
+        """
+        наполняет storage/ текущего каталога: users игроков,
+        у каждого — файл с одним артефактом
+        """
+
+        os.makedirs("storage", exist_ok=True)
+
+        with open(os.path.join("storage", "users.txt"), "w", encoding="utf-8") as f:
+            f.writelines(f"user{i} pass{i}\n" for i in range(users))
+
+        for i in range(users):
+            with open(os.path.join("storage", f"artifacts_user{i}.json"), "w", encoding="utf-8") as f:
+                f.write('["first_deal"]')
+
+        self._users_size = os.path.getsize(os.path.join("storage", "users.txt"))
+
+    def reset(self):
+        """
+        убирает зарегистрированных замером игроков, чтобы
+        следующие операции шли на той же популяции
+        """
+
+        os.truncate(os.path.join("storage", "users.txt"), self._users_size)
+
+    def operations(self, users, rng):
+        """
+        returns:
+            dict — {операция: (функция номера вызова, предел вызовов)}
+        """
+
+        from auth import authenticate_user, load_users, register_user
+        from artifact_storage import (
+            give_artifact,
+            load_artifacts_ids,
+            load_player_artifacts_objects
+        )
+
+        def login():
+            i = rng.randrange(users)
+            return f"user{i}", f"pass{i}"
+
+        return {
+            "load_users": (lambda i: load_users(), MAX_OPS),
+            # не больше 10 % новых игроков: замер не меняет размер популяции
+            "register_user": (
+                lambda i: register_user(f"new{i}", "secret"), max(MIN_OPS + 1, users // 10)
+            ),
+            "authenticate_user": (lambda i: authenticate_user(*login()), MAX_OPS),
+            # каждому игроку — новый для него артефакт
+            "give_artifact": (lambda i: give_artifact(f"user{i}", "big_profit"), users),
+            "load_artifacts_ids": (lambda i: load_artifacts_ids(login()[0]), MAX_OPS),
+            "load_player_artifacts_objects": (
+                lambda i: load_player_artifacts_objects(login()[0]), MAX_OPS
+            ),
+        }
+
+
+BACKENDS = {
+    FileBackend.name: FileBackend,
+}
+
+
+# ЗАМЕР
+def io_counters():
+    """
+    returns:
+        dict — счётчики IO_FIELDS процесса
+        None — /proc/self/io недоступен
+    """
+
+    try:
+        with open("/proc/self/io", "r", encoding="ascii") as f:
+            data = dict(line.split(":") for line in f if ":" in line)
+    except OSError:
+        return None
+
+    return {field: int(data[field]) for field in IO_FIELDS}
+
+
+def _io_delta(before, after, overhead):
+    if before is None or after is None:
+        return None
+
+    return {field: after[field] - before[field] - overhead[field] for field in IO_FIELDS}
+
+
+def _io_overhead():
+    """
+    цена самого чтения /proc/self/io (вычитается из замера)
+    """
+
+    first = io_counters()
+    second = io_counters()
+
+    if first is None:
+        return None
+
+    return {field: second[field] - first[field] for field in IO_FIELDS}
+
+
+def filesystem(path):
+    """
+    тип файловой системы каталога (по /proc/mounts) или "?"
+    """
+
+    path = os.path.realpath(path)
+    best, kind = "", "?"
+
+    try:
+        with open("/proc/mounts", "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+
+                if len(parts) > 2 and path.startswith(parts[1]) and len(parts[1]) > len(best):
+                    best, kind = parts[1], parts[2]
+
+    except OSError:
+        pass
+
+    return kind
+
+
+def measure(func, limit, overhead):
+    """
+    повторяет func(номер вызова) в пределах BUDGET секунд
+
+    returns:
+        dict — ops, ops_per_sec, перцентили (мкс), IO на операцию
+    """
+
+    from metrics import PERCENTILES, Histogram
+
+    histogram = Histogram()
+    limit = min(limit, MAX_OPS)
+
+    # прогрев: импорт, кэши ОС
+    with contextlib.redirect_stdout(io.StringIO()):
+        func(limit - 1)
+
+    output = io.StringIO()
+    before = io_counters()
+    started = time.perf_counter_ns()
+    deadline = started + int(BUDGET * 1e9)
+    ops = 0
+
+    with contextlib.redirect_stdout(output):
+        while ops < limit - 1 and (ops < MIN_OPS or time.perf_counter_ns() < deadline):
+            start = time.perf_counter_ns()
+            func(ops)
+            histogram.record(time.perf_counter_ns() - start)
+            ops += 1
+
+            # вывод операций копится в буфере — не держим его весь
+            if output.tell() > 1 << 20:
+                output.seek(0)
+                output.truncate()
+
+    elapsed = (time.perf_counter_ns() - started) / 1e9
+    delta = _io_delta(before, io_counters(), overhead)
+
+    return {
+        "ops": ops,
+        "ops_per_sec": ops / elapsed if elapsed else 0.0,
+        "percentiles_us": {
+            str(p): histogram.percentile(p) / 1000 for p in PERCENTILES
+        },
+        "io_per_op": None if delta is None else {
+            field: value / ops for field, value in delta.items()
+        }
+    }
+
+
+def run_size(backend, users, seed=0):
+    """
+    все операции для одного размера популяции
+    (в текущем каталоге — он должен быть пустым)
+    """
+
+    from session_profile import clear_profile
+
+    # профиль сессии перехватил бы чтение артефактов
+    clear_profile()
+
+    start = time.perf_counter()
+    backend.populate(users)
+    print(f"  хранилище на {users} пользователей: {time.perf_counter() - start:.1f} с")
+
+    overhead = _io_overhead()
+    rng = random.Random(seed)
+
+    results = {}
+
+    for name, (func, limit) in backend.operations(users, rng).items():
+        results[name] = measure(func, limit, overhead)
+        backend.reset()
+
+    return results
+
+
+def run(backend_name="files", sizes=SIZES, directory=None, seed=0):
+    """
+    замер всех размеров, каждый — в своём временном каталоге
+
+    returns:
+        dict — результат (формат --out)
+    """
+
+    backend = BACKENDS[backend_name]()
+
+    here = os.getcwd()
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    result = {
+        "backend": backend.name,
+        "filesystem": filesystem(directory or tempfile.gettempdir()),
+        "python": sys.version.split()[0],
+        "budget": BUDGET,
+        "sizes": {}
+    }
+
+    print(f"хранилище {result['backend']} ({result['filesystem']})")
+
+    for users in sizes:
+        with tempfile.TemporaryDirectory(dir=directory) as tmp:
+            os.chdir(tmp)
+
+            try:
+                result["sizes"][str(users)] = run_size(backend, users, seed)
+            finally:
+                os.chdir(here)
+
+    return result
+
+
+# ОТЧЁТ
+def _size(value):
+    return f"{value:.0f}Б" if value < 10240 else f"{value / 1024:.0f}К"
+
+
+def _format_io(io_per_op):
+    if io_per_op is None:
+        return "—"
+
+    return (f"r {io_per_op['syscr']:.0f}/{_size(io_per_op['rchar'])} "
+            f"w {io_per_op['syscw']:.0f}/{_size(io_per_op['wchar'])}")
+
+
+def report(result):
+    from metrics import PERCENTILES
+
+    sizes = list(result["sizes"])
+
+    print(f"\nхранилище {result['backend']} ({result['filesystem']}), "
+          f"задержки в мкс, системные вызовы / байты на операцию")
+
+    for name in OPERATIONS:
+        print(f"\n  {name}")
+        print(f"    {'игроков':>9} {'оп/с':>10} "
+              + " ".join(f"{'p' + str(p):>10}" for p in PERCENTILES)
+              + "   ввод-вывод")
+
+        for users in sizes:
+            row = result["sizes"][users].get(name)
+
+            if row is None:
+                continue
+
+            print(f"    {users:>9} {row['ops_per_sec']:>10.0f} "
+                  + " ".join(f"{row['percentiles_us'][str(p)]:>10.1f}" for p in PERCENTILES)
+                  + f"   {_format_io(row['io_per_op'])}")
+
+    if len(sizes) < 2:
+        return
+
+    small, large = sizes[0], sizes[-1]
+    scale = math.log(int(large) / int(small))
+
+    print(f"\n  рост медианы от {small} до {large} игроков (цена ~ n^k)")
+
+    for name in OPERATIONS:
+        low = result["sizes"][small][name]["percentiles_us"]["50"]
+        high = result["sizes"][large][name]["percentiles_us"]["50"]
+
+        if low <= 0 or high <= 0:
+            continue
+
+        print(f"    {name:<31} ×{high / low:<10.1f} k = {math.log(high / low) / scale:.2f}")
+
+
+def compare(old, new):
+    """
+    сравнение двух сохранённых результатов: оп/с и медиана
+    """
+
+    print(f"было:  {old['backend']} ({old['filesystem']})")
+    print(f"стало: {new['backend']} ({new['filesystem']})")
+    print(f"\n  {'операция':<31} {'игроков':>9} {'оп/с было':>11} {'стало':>11} {'ускорение':>10}")
+
+    for users in old["sizes"]:
+        if users not in new["sizes"]:
+            continue
+
+        for name in OPERATIONS:
+            before = old["sizes"][users].get(name)
+            after = new["sizes"][users].get(name)
+
+            if before is None or after is None or not before["ops_per_sec"]:
+                continue
+
+            print(f"  {name:<31} {users:>9} {before['ops_per_sec']:>11.0f} "
+                  f"{after['ops_per_sec']:>11.0f} {after['ops_per_sec'] / before['ops_per_sec']:>9.2f}×")
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="бенчмарк слоя хранения")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="files")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)))
+    parser.add_argument("--dir", help="где создавать временные каталоги")
+    parser.add_argument("--out", help="сохранить результат в JSON")
+    parser.add_argument("--compare", nargs=2, metavar=("БЫЛО", "СТАЛО"))
+
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        results = []
+
+        for path in args.compare:
+            with open(path, "r", encoding="utf-8") as f:
+                results.append(json.load(f))
+
+        compare(*results)
+        return 0
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+
+    result = run(args.backend, sizes, args.dir)
+    report(result)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=4)
+
+        print(f"\nрезультат сохранён: {args.out}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
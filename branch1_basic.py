@@ -6,6 +6,9 @@
     - игрок выбирает стратегию поведения в переговорах
     - соперник реагирует в зависимости от стиля общения
     - итог сделки определяется числовой моделью взаимодействия
+    - сумма итога решается торгом в несколько раундов:
+      соперник и игрок по очереди делают предложения,
+      соперник отвечает по решению дерева игры (negotiation)
     - результат может дать прибыль, ноль или убыток
 
 игровые сущности:
@@ -22,21 +25,32 @@
     ACTION_TEXT        — стратегии игрока
     RIVAL_STYLE_TEXT   — поведение соперника
     OUTCOME_TEXT       — текстовое описание исходов
-    OUTCOME_VALUES     — числовые диапазоны прибыли / убытка
+
+    числа ветки (balance.json, раздел branch1):
+    outcome_values     — числовые диапазоны прибыли / убытка
+    outcome_matrix     — действие игрока → стиль соперника → код исхода
+    rival_styles       — имена стилей соперника
+    negotiation        — раунды, уровни и терпение сторон в торге
 
 унифицированные функции:
     generate_rival   — создать соперника переговоров
     choose_action    — запросить стратегию игрока
     calc_outcome     — рассчитать исход встречи
+    negotiate        — торг за сумму исхода
     apply_outcome    — применить финансовый результат
     play_branch1     — основной игровой цикл ветки
 """
 
 
-import random
 from player import Rival, safe_int
 from player import check_force_exit
 from auth import get_current_username
+from save_system import SessionJournal, snapshot_player, restore_player
+from balance import get_balance
+from random_pool import get_random_pool
+from metrics import timed
+from negotiation import RIVAL, get_negotiation
+from event_log import log_event
 from artifacts_hooks import (
     try_first_deal,
     try_ten_deals,
@@ -69,32 +83,23 @@ OUTCOME_TEXT = {
     6: "почти без изменений"
 }
 
-# диапазоны прибыли / убытка
-OUTCOME_VALUES = {
-    1: (3000, 10000),
-    2: (12000, 30000),
-    3: (-8000, -3000),
-    4: (-30000, -15000),
-    5: (35000, 65000),
-    6: (-2000, 2000)
-}
-
 
-def generate_rival():
+def generate_rival(style_id=None):
     """
     создаёт соперника для переговорной сделки
 
+    parameters:
+        style_id — стиль соперника (None — случайный,
+                   задаётся при восстановлении сохранения)
+
     returns:
         Rival — объект npc соперника
     """
 
-    styles = {
-        0: "спокойный перекуп",
-        1: "хитрый перекуп",
-        2: "агрессивный переговорщик"
-    }
+    styles = get_balance()["branch1"]["rival_styles"]
 
-    style_id = random.randint(0, 2)
+    if style_id is None:
+        style_id = get_random_pool().randint(0, 2)
 
     rival = Rival(
         name="перекуп с авито",
@@ -120,57 +125,125 @@ def choose_action():
 
     action = safe_int("\nВаш выбор: ")
 
-    if action is None:
+    if action not in ACTION_TEXT:
         print("ход пропущен")
         return 0
 
     return action
 
 
+@timed("branch1.calc_outcome")
 def calc_outcome(player_action, rival_style):
     """
     рассчитывает исход сделки
 
-    используем числовую матрицу поведения
+    используем числовую матрицу поведения (balance.json);
+    неизвестная стратегия (пропуск хода) — сделка сорвалась
+    """
+
+    row = get_balance()["branch1"]["outcome_matrix"].get(player_action)
+
+    if row is None:
+        return 0
+
+    return row[rival_style]
+
+
+def _ask_counter(game, node):
+    """
+    встречное предложение игрока — уровень торга
+    """
+
+    _, _, kp, kr = node
+
+    low, high = game.amount(kr), game.amount(kp)
+    hint = game.amount(game.offer(node))
+
+    print(f"\nВаше предложение — от {low} до {high} (расчёт советует {hint})")
+
+    value = safe_int("Сумма: ")
+
+    if value is None:
+        print("ход пропущен — прежнее требование")
+        return kp
+
+    span = game.high - game.low
+    k = round((value - game.low) * game.top / span) if span else kp
+
+    return min(kp, max(kr, k))
+
+
+def negotiate(rival, outcome_code):
     """
+    многораундовый торг за сумму исхода
+
+    соперник предлагает и отвечает по решению дерева игры
+    (negotiation.get_negotiation) для своего стиля
 
-    outcome_matrix = {
-
-        # 1 — жёсткий торг
-        1: {
-            0: 2,   # против спокойного — хороший плюс
-            1: 1,   # против хитрого — небольшой плюс
-            2: 3    # против агрессивного — небольшой минус
-        },
-
-        # 2 — забрать быстро
-        2: {
-            0: 6,   # нейтрально
-            1: 1,   # иногда небольшой плюс
-            2: 4    # против агрессивного — риск крупного минуса
-        },
-
-        # 3 — перехитрить
-        3: {
-            0: 1,
-            1: 0,   # хитрый соперник ломает схему
-            2: 4
-        },
-
-        # 4 — уйти и вернуться
-        4: {
-            0: 6,
-            1: 2,  # иногда рынок играет на руку
-            2: 0
-        }
-    }
-
-    return outcome_matrix[player_action][rival_style]
-
-
-def apply_outcome(player, outcome_code):
+    returns:
+        int  — итоговая сумма для игрока
+        None — сделка сорвалась без денег
+    """
+
+    game = get_negotiation(outcome_code, rival.style)
+    rng = get_random_pool()
+
+    node = game.root()
+
+    print(f"\nТорг: сумма от {game.low} до {game.high}, раундов не больше {game.rounds}")
+
+    while node is not None:
+
+        if node[1] == RIVAL:
+            k = game.offer(node)
+
+            print(f"\nСоперник предлагает: {game.amount(k)}")
+            print("подсказка расчёта:", "принять" if game.accepts(node, k) else "торговаться")
+            print("1 — принять\n2 — встречное предложение\n3 — уйти")
+
+            choice = safe_int("\nВаш выбор: ")
+
+            if choice == 1:
+                print("по рукам")
+                return game.amount(k)
+
+            if choice == 3:
+                print("вы ушли от сделки")
+                return game.breakdown or None
+
+            if choice != 2:
+                print("ход пропущен — предложение отклонено")
+
+        else:
+            k = _ask_counter(game, node)
+
+            print("вы предлагаете:", game.amount(k))
+
+            if game.accepts(node, k):
+                print("соперник согласился")
+                return game.amount(k)
+
+            print("соперник отказался")
+
+        if rng.random() < game.walk_chance:
+            print("соперник ушёл — сделка сорвалась")
+            return game.breakdown or None
+
+        node = game.counter(node, k)
+
+    print("время торга вышло — сделка сорвалась")
+
+    return game.breakdown or None
+
+
+@timed("branch1.apply_outcome")
+def apply_outcome(player, outcome_code, amount=None):
     """
     применяет финансовый результат к бюджету игрока
+
+    parameters:
+        amount — сумма по итогам торга (None — случайная
+                 из диапазона исхода)
     """
 
     username = get_current_username()
@@ -179,15 +252,16 @@ def apply_outcome(player, outcome_code):
         print("\nСделка сорвалась — денег не заработано")
         return
 
-    low, high = OUTCOME_VALUES[outcome_code]
-    amount = random.randint(low, high)
+    if amount is None:
+        low, high = get_balance()["branch1"]["outcome_values"][outcome_code]
+        amount = get_random_pool().randint(low, high)
 
     print("\nФинансовый результат:", OUTCOME_TEXT[outcome_code])
     print("Изменение бюджета:", amount)
 
     player.change_budget(amount)
 
-    player.completed_deals.append(amount)
+    player.completed_deals.record(amount, branch=1)
 
     # первая успешная сделка
     try_first_deal(player, username)
@@ -195,37 +269,78 @@ def apply_outcome(player, outcome_code):
     try_ten_deals(player, username)
 
 
-def play_branch1(player):
+def play_branch1(player, resume=None):
     """
     запуск ветки переговоров с перекупом
+
+    parameters:
+        player — объект игрока
+        resume — сохранённое состояние ветки (save_system.load_session)
     """
 
     print("\n=== Ветка 1 — Переговоры за машину ===\n")
 
-    player.budget = 80_000
-    player.win_target = 150_000
+    journal = SessionJournal(get_current_username(), branch=1)
+
+    rival_style = None
+
+    if resume is None:
+        balance = get_balance()["branch1"]
+
+        player.budget = balance["start_budget"]
+        player.win_target = balance["win_target"]
+
+        print("стартовый бюджет:", player.budget)
+
+    else:
+        restore_player(resume["player"], player)
+        rival_style = resume["rival_style"]
 
-    print("стартовый бюджет:", player.budget)
+        print("продолжение сохранённой партии, бюджет:", player.budget)
 
     while True:
 
-        rival = generate_rival()
+        rival = generate_rival(rival_style)
+        rival_style = None
+
+        # автосохранение перед выбором стратегии
+        journal.save({
+            "player": snapshot_player(player),
+            "rival_style": rival.style
+        })
 
         action = choose_action()
 
         outcome_code = calc_outcome(action, rival.style)
+        amount = None
 
-        apply_outcome(player, outcome_code)
+        if outcome_code != 0:
+            amount = negotiate(rival, outcome_code)
 
-        # авто-завершение игры
-        if player.check_win():
-            return
+            # торг сорвался без денег
+            if amount is None:
+                outcome_code = 0
+
+        apply_outcome(player, outcome_code, amount)
 
-        if player.check_over():
+        log_event(
+            "deal", branch=1, style=rival.style,
+            action=action, outcome=outcome_code, amount=amount or 0
+        )
+
+        # авто-завершение игры
+        if player.check_win() or player.check_over():
+            journal.clear()
             return
 
         print("\nраунд завершён")
 
+        # раунд закрыт — при продолжении начнётся новый
+        journal.save({
+            "player": snapshot_player(player),
+            "rival_style": None
+        })
+
         if check_force_exit():
             print("\nпринудительный выход из ветки…")
             return
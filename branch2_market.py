@@ -8,6 +8,18 @@
     - игрок принимает решение: ждать, продавать в ноль или срочно сливать
     - параллельно развивается линия соперника на рынке
     - результат сделки зависит от состояния рынка и силы конкурента
+    - машины покупаются и продаются через общую книгу заявок
+      (car_market): цена предложения — лучшая заявка на продажу
+      уровня качества, цена продажи — лучшая заявка на покупку;
+      пока сделка заморожена, соперники-перекупы торгуют дальше
+    - новые машины приходят из конвейера объявлений
+      (listing_pipeline) по одной, с оценкой выгодности
+    - вместо случайной машины можно искать по фильтрам
+      в каталоге объявлений (car_catalog): качество, цена, риск
+    - у каждого уровня качества есть ценовой индекс рынка
+      (market_index): он возвращается к среднему, сдвигается
+      спросом игрока и соперников и задаёт опорные цены книги,
+      диапазон прибыли и шанс заморозки
 
 игровые сущности:
     Rival — соперник-перекуп с собственным бюджетом и стилем игры
@@ -20,29 +32,56 @@
     - рискованная досрочная продажа
     - долгий проект / затянувшаяся сделка
 
+числа ветки (balance.json, раздел branch2):
+    quality_names     — качество машины → описание
+    freeze_chance     — качество → шанс заморозки сделки
+    freeze_durations  — качество → длительность заморозки (ходов)
+    profit_ranges     — качество → диапазон прибыли сделки
+    car_price / urgent_sale_loss — цена машины и убыток срочной продажи
+    rival_styles / rival_budget  — стили и бюджет соперника
+    order_book        — параметры общей книги заявок (car_market)
+    price_index       — параметры ценового индекса (market_index)
+
 унифицированные функции:
     generate_rival   — создать соперника и его параметры
     show_hint        — вывести психологическое давление соперника
+    market_turn      — ход рынка: соперники и ценовой индекс
     calc_profit      — рассчитать прибыль сделки
+    search_catalog   — поиск машины в каталоге по фильтрам
+    sell_on_market   — продать машину через книгу заявок
     apply_profit     — применить финансовый результат
     finalize_rival   — завершить сделку соперника
     play_branch2     — основной игровой цикл ветки
 """
 
 
-import random
 from player import Rival
 from player import check_force_exit
 from auth import get_current_username
+from save_system import (
+    SessionJournal,
+    snapshot_player,
+    restore_player,
+    snapshot_rival,
+    restore_rival
+)
 from artifacts_hooks import (
     try_first_deal,
     try_ten_deals,
     try_big_profit,
-    try_long_project,
+    try_long_freeze,
     try_risky_abort,
 )
+from balance import get_balance
+from random_pool import get_random_pool
+from metrics import timed
+from car_market import get_car_market, rival_flow
+from market_index import get_market_index
+from listing_pipeline import items, market_source, score_listings
+from event_log import log_event
 
 
+# фразы давления соперника по стилям
 RIVAL_HINTS = {
     0: [
         "конкурент замечает: рынок начинает проседать",
@@ -67,21 +106,18 @@ def generate_rival():
         Rival — npc соперник
     """
 
-    styles = {
-        0: ("осторожный перекуп", (-5000, 20000)),
-        1: ("обычный игрок рынка", (-15000, 40000)),
-        2: ("агрессивный риск-перекуп", (-40000, 90000))
-    }
+    balance = get_balance()["branch2"]
+    rng = get_random_pool()
 
-    style_id = random.randint(0, 2)
-    name, profit_range = styles[style_id]
+    style_id = rng.randint(0, 2)
+    name = balance["rival_styles"][style_id]["name"]
 
     rival = Rival(
         name=name,
-        budget=random.randint(120_000, 190_000),
+        budget=rng.randint(*balance["rival_budget"]),
         style=style_id,
         mode=2,
-        profit_range=profit_range
+        profit_range=balance["rival_styles"][style_id]["profit"]
     )
 
     print("\nна рынке:", name)
@@ -95,31 +131,128 @@ def show_hint(rival):
     иногда выводит психологическое давление соперника
     """
 
-    if random.random() > 0.35:
+    rng = get_random_pool()
+
+    if rng.random() > 0.35:
         return
 
-    phrase = random.choice(RIVAL_HINTS[rival.style])
+    phrase = rng.choice(RIVAL_HINTS[rival.style])
 
     print(phrase)
 
 
-def calc_profit(car_quality):
+def market_turn(market, index, rng, balance):
+    """
+    один ход общего рынка: заявки соперников, сдвиг ценового
+    индекса спросом хода, новые опорные цены книги
+    """
+
+    rival_flow(market, rng, balance["order_book"]["rival_orders"], balance)
+
+    index.step(rng, balance, market.take_flow())
+
+    for tier in market.reference:
+        market.reference[tier] = index.price(tier, balance)
+
+
+def calc_profit(car_quality, buy_price=None, sale_price=None):
     """
     рассчитывает итоговую прибыль сделки игрока
+
+    диапазон прибыли — по ценовому индексу уровня; если известны
+    цены покупки и продажи на рынке, к прибыли добавляется
+    доля price_weight их разницы (реализованная цена)
+    """
+
+    balance = get_balance()["branch2"]
+
+    low, high = get_market_index().profit_range(car_quality, balance)
+    profit = get_random_pool().randint(low, high)
+
+    if buy_price is not None and sale_price is not None:
+        profit += int((sale_price - buy_price) * balance["order_book"]["price_weight"])
+
+    return profit
+
+
+def _ask_filter(prompt):
     """
+    ввод границы фильтра: Enter — без ограничения
+
+    returns:
+        int | None
+    """
+
+    value = input(prompt).strip()
+
+    if not value:
+        return None
+
+    if not value.isdigit():
+        print("некорректный ввод — фильтр не применён")
+        return None
+
+    return int(value)
 
-    profit_ranges = {
-        0: (-15000, 5000),
-        1: (-5000, 12000),
-        2: (3000, 25000),
-        3: (10000, 40000),
-        4: (25000, 70000)
+
+def search_catalog():
+    """
+    поиск машины в каталоге объявлений по фильтрам игрока
+
+    returns:
+        tuple (качество, цена, риск, номер объявления) или None
+    """
+
+    from car_catalog import get_catalog
+
+    catalog = get_catalog()
+    balance = get_balance()["branch2"]
+
+    print("\nпоиск по каталогу (Enter — без ограничения):")
+
+    min_quality = _ask_filter("качество от (0–4): ")
+    max_price = _ask_filter("цена до: ")
+    max_risk = _ask_filter("риск заморозки до, %: ")
+
+    bounds = {
+        "min_quality": min_quality,
+        "max_price": max_price,
+        "max_risk": None if max_risk is None else max_risk / 100
     }
 
-    low, high = profit_ranges[car_quality]
-    return random.randint(low, high)
+    print("подходящих объявлений:", catalog.count(**bounds))
+
+    i = catalog.draw(get_random_pool(), **bounds)
+
+    if i is None:
+        print("по таким фильтрам ничего нет — остаётся прежний вариант")
+        return None
+
+    item = catalog.get(i)
 
+    print("продавец:", balance["rival_styles"][item["style"]]["name"])
 
+    return item["quality"], item["price"], item["risk"], i
+
+
+def sell_on_market(market, owner, car_quality, buy_price):
+    """
+    продаёт машину игрока лучшему покупателю книги заявок
+    и считает прибыль с учётом цены продажи
+    """
+
+    sale_price = market.sell_car(owner, car_quality)
+
+    if sale_price is None:
+        print("\nпокупателей в книге заявок нет — продажа по оценке")
+    else:
+        print("\nмашина продана на рынке за", sale_price,
+              f"(куплена за {buy_price})")
+
+    return calc_profit(car_quality, buy_price, sale_price)
+
+
+@timed("branch2.apply_profit")
 def apply_profit(player, rival, amount):
     """
     применяет прибыль / убыток к бюджету игрока
@@ -148,7 +281,7 @@ def finalize_rival(rival):
     """
 
     low, high = rival.profit_range
-    amount = random.randint(low, high)
+    amount = get_random_pool().randint(low, high)
 
     rival.finalize_profit(amount)
 
@@ -158,7 +291,7 @@ def finalize_rival(rival):
         print("соперник провалил сделку и теряет влияние")
 
 
-def play_branch2(player):
+def play_branch2(player, resume=None):
     """
     запуск ветки перепродажи автомобилей
 
@@ -168,6 +301,11 @@ def play_branch2(player):
         - игрок решает, входить в сделку или пропустить
         - после покупки запускается механика сделки
 
+    автосохранение:
+        перед каждым запросом ввода состояние ветки пишется
+        в журнал (стадии search / offer / freeze), resume
+        возвращает игрока ровно к тому же запросу
+
     принудительный выход:
         --  — выход из ветки между сделками
     """
@@ -175,105 +313,189 @@ def play_branch2(player):
     print("\n=== Ветка 2 — Перекупские сделки на рынке ===\n")
 
     username = get_current_username()
+    journal = SessionJournal(username, branch=2)
+    rng = get_random_pool()
+
+    market = get_car_market()
+    index = get_market_index()
+    owner = username or "игрок"
+
+    # объявления по одному: цена берётся из книги в момент показа
+    offers = items(score_listings(market_source(market, rng, index=index), index=index))
 
-    player.budget = 150_000
-    player.win_target = 350_000
+    # незавершённая позиция из сохранения
+    car = None
+    frozen = None
 
-    print("стартовый бюджет ветки 2:", player.budget)
+    if resume is None:
+        balance = get_balance()["branch2"]
+
+        player.budget = balance["start_budget"]
+        player.win_target = balance["win_target"]
+
+        print("стартовый бюджет ветки 2:", player.budget)
+
+    else:
+        restore_player(resume["player"], player)
+
+        if resume["stage"] in ("offer", "freeze"):
+            car = tuple(resume["car"])
+
+        if resume["stage"] == "freeze":
+            frozen = resume
+
+        print("продолжение сохранённой партии, бюджет:", player.budget)
+
+    def autosave(stage, **extra):
+        state = {"stage": stage, "player": snapshot_player(player)}
+        state.update(extra)
+        journal.save(state)
 
     while True:
 
-        print("\n--- новый поиск автомобиля")
-
-        # качество машины
-        car_quality = random.randint(0, 4)
-
-        quality_names = {
-            0: "убитая машина с рисками",
-            1: "уставший бюджетный вариант",
-            2: "средний рынок",
-            3: "ухоженный автомобиль",
-            4: "редкий ликвидный экземпляр"
-        }
-
-        freeze_chance = {
-            0: 0.25,
-            1: 0.45,
-            2: 0.65,
-            3: 0.80,
-            4: 0.92
-        }
-
-        freeze_durations = {
-            0: (0, 1),
-            1: (1, 2),
-            2: (1, 3),
-            3: (2, 4),
-            4: (3, 5)
-        }
-
-        chance = freeze_chance[car_quality]
-        base_price = random.randint(80_000, 160_000)
-
-        print("\nНайдена машина:")
-        print("тип:", quality_names[car_quality])
-        print("цена:", base_price)
-        print("шанс заморозки сделки:", int(chance * 100), "%")
-
-        print("\nваше решение:")
-        print("1 — купить автомобиль и войти в сделку")
-        print("2 — пропустить и искать дальше")
-        print("-- — выйти из ветки")
+        # таблицы перечитываются каждую сделку (правки balance.json)
+        balance = get_balance()["branch2"]
 
-        choice = input("\nвыбор: ").strip()
+        # соперники торгуют между поисками
+        market_turn(market, index, rng, balance)
 
-        if choice == "--":
-            print("\nвыход из ветки 2")
-            return
+        if car is None:
+            print("\n--- новый поиск автомобиля")
 
-        if choice == "2":
-            print("\nвы пропустили этот вариант — поиск продолжается")
-            continue
+            # качество машины; цена — лучшая заявка на продажу
+            car_quality, base_price, _, score = next(offers)
+            listing = ()
 
-        if choice != "1":
-            print("\nневерный ввод — этот вариант пропущен")
-            continue
+        else:
+            # объявление каталога: (качество, цена, риск, номер)
+            car_quality, base_price, *listing = car
+            car = None
+            score = None
 
-        # покупка автомобиля
+        offer = [car_quality, base_price, *listing]
 
-        print("\nпокупка автомобиля...")
-        player.change_budget(-base_price)
+        # шанс заморозки — из объявления или по индексу уровня
+        chance = listing[0] if listing else index.freeze_chance(car_quality, balance)
 
-        if player.check_over():
-            return
+        if frozen is None:
 
-        rival = generate_rival()
+            print("\nНайдена машина:")
+            print("тип:", balance["quality_names"][car_quality])
+            print("цена:", base_price)
+            print("последняя сделка на рынке:", market.last[car_quality])
+            print(f"индекс цен уровня: {index.levels[car_quality]:.2f}")
+            print("шанс заморозки сделки:", int(chance * 100), "%")
 
-        # сделка не зависла
-        if random.random() > chance:
-            print("\nпокупатель найден сразу — сделка не зависла")
+            if score is not None:
+                print(f"оценка: ожидаемая прибыль за ход ~{score}")
 
-            profit = calc_profit(car_quality)
-            apply_profit(player, rival, profit)
+            autosave("offer", car=offer)
 
-            if player.check_win():
+            print("\nваше решение:")
+            print("1 — купить автомобиль и войти в сделку")
+            print("2 — пропустить и искать дальше")
+            print("3 — поиск с фильтрами (каталог объявлений)")
+            print("-- — выйти из ветки")
+
+            choice = input("\nвыбор: ").strip()
+
+            if choice == "--":
+                print("\nвыход из ветки 2")
                 return
 
-            finalize_rival(rival)
+            if choice == "2":
+                print("\nвы пропустили этот вариант — поиск продолжается")
+                continue
+
+            if choice == "3":
+                # без результата поиска остаётся прежний вариант
+                car = search_catalog() or tuple(offer)
+                continue
+
+            if choice != "1":
+                print("\nневерный ввод — этот вариант пропущен")
+                continue
+
+            # покупка автомобиля
+
+            print("\nпокупка автомобиля...")
+            trade_price = market.buy_car(owner, car_quality, base_price)
+
+            if trade_price is None:
+                print("продавцов по этой цене в книге заявок нет — покупка не состоялась")
+                continue
+
+            if trade_price < base_price:
+                print("куплено дешевле объявления:", trade_price)
+
+            # дальше сделка идёт по цене покупки (и в автосохранении)
+            base_price = offer[1] = trade_price
+
+            if listing:
+                from car_catalog import sell_listing
+
+                sell_listing(listing[1])
+
+            player.change_budget(-base_price)
+
+            if player.check_over():
+                journal.clear()
+                return
+
+            rival = generate_rival()
+
+            # сделка не зависла
+            if rng.random() > chance:
+                print("\nпокупатель найден сразу — сделка не зависла")
+
+                profit = sell_on_market(market, owner, car_quality, base_price)
+                apply_profit(player, rival, profit)
+
+                log_event(
+                    "deal", branch=2, style=rival.style, type=car_quality,
+                    price=base_price, freeze=0, amount=profit
+                )
+
+                if player.check_win():
+                    journal.clear()
+                    return
+
+                finalize_rival(rival)
+
+                freeze_turns = None
+
+            else:
+                # сделка зависла
+                min_f, max_f = balance["freeze_durations"][car_quality]
+                freeze_turns = rng.randint(min_f, max_f)
+                first_step = 0
+
+                print(f"\nсделка зависла на {freeze_turns} хода(ов)")
 
         else:
-            # сделка зависла
-            min_f, max_f = freeze_durations[car_quality]
-            freeze_turns = random.randint(min_f, max_f)
+            rival = restore_rival(frozen["rival"])
+            freeze_turns = frozen["freeze_turns"]
+            first_step = frozen["step"]
+            frozen = None
+
+            print(f"\nсделка по машине за {base_price} ещё заморожена")
 
-            print(f"\nсделка зависла на {freeze_turns} хода(ов)")
+        if freeze_turns is not None:
 
-            for step in range(freeze_turns):
+            for step in range(first_step, freeze_turns):
 
                 print(f"\n--- ход сделки {step + 1}")
 
                 show_hint(rival)
 
+                autosave(
+                    "freeze",
+                    car=offer,
+                    rival=snapshot_rival(rival),
+                    freeze_turns=freeze_turns,
+                    step=step
+                )
+
                 print("\nваше решение:")
                 print("1 — продолжать ждать")
                 print("2 — продать в ноль")
@@ -292,42 +514,63 @@ def play_branch2(player):
                     break
 
                 if action == "3":
-                    loss = random.randint(5000, 20000)
+                    loss = rng.randint(*balance["urgent_sale_loss"])
                     print("срочная продажа в минус на", loss)
                     player.change_budget(base_price - loss)
                     try_risky_abort(username)
+
+                    log_event(
+                        "abort", branch=2, style=rival.style,
+                        type=car_quality, amount=-loss
+                    )
                     break
 
                 rival.progress_deal()
 
+                market_turn(market, index, rng, balance)
+
             # сделка завершилась — считаем прибыль
 
             if freeze_turns >= 3:
-                try_long_project(player, username)
+                try_long_freeze(freeze_turns, username)
 
-            profit = calc_profit(car_quality)
+            profit = sell_on_market(market, owner, car_quality, base_price)
 
             print("\nБазовый результат сделки игрока:", profit)
 
             apply_profit(player, rival, profit)
 
+            log_event(
+                "deal", branch=2, style=rival.style, type=car_quality,
+                price=base_price, freeze=freeze_turns, amount=profit
+            )
+
             if player.check_over():
+                journal.clear()
                 return
 
             finalize_rival(rival)
 
             print("\nсделка завершена")
 
-            player.completed_deals.append(profit)
+            player.completed_deals.record(profit, branch=2)
 
             try_first_deal(player, username)
             try_ten_deals(player, username)
-            try_big_profit(player, username)
+            try_big_profit(profit, username)
+
+            if player.check_win():
+                journal.clear()
+                return
+
+            autosave("search")
 
             if check_force_exit():
                 print("\nпринудительный выход из ветки…")
                 return
 
+        autosave("search")
+
         # точка выхода между сделками
         print("\nнажмите Enter — продолжить")
         print("-- — выйти из ветки")
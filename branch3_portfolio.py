@@ -7,6 +7,8 @@
     - деньги замораживаются на время работ (freeze_turns)
     - каждый проект может дать бонус / задержку
     - соперник также выполняет проекты параллельно
+    - вокруг действует рынок соперников (rival_engine), их проекты
+      насыщают рынок и снижают прибыль игрока по тем же типам
     - рынок играет через редкие события
 
 игровая модель:
@@ -24,21 +26,34 @@
     — risky_abort        — досрочная продажа проекта
     — lucky_event        — сработало редкое позитивное событие
 
+числа ветки (balance.json, раздел branch3):
+    project_types  — тип проекта → название, цена, прибыль, длительность
+    events         — шансы и суммы редких событий (roll_event)
+    abandon_loss   — убыток при досрочной продаже проекта
+    market_rivals  — сколько соперников на рынке (включая видимого)
+
 унифицированные сущности и функции:
     create_rival           — создание соперника ветки
     roll_event             — расчёт редких событий проекта
     advance_turn           — продвижение времени на один ход
     finish_ready_projects  — завершение готовых проектов
     start_project          — запуск нового проекта
-    abandon_project        — досрочная продажа проекта
+    abandon_project        — досрочная продажа проекта (с выбором)
+    sell_project           — продажа выбранного проекта
     play_branch3           — основной цикл ветки
 """
 
 
-import random
 from player import Deal, Rival, attach_portfolio, safe_int
 from player import check_force_exit
 from auth import get_current_username
+from save_system import (
+    SessionJournal,
+    snapshot_player,
+    restore_player,
+    snapshot_rival,
+    restore_rival
+)
 from artifacts_hooks import (
     try_first_deal,
     try_ten_deals,
@@ -47,44 +62,24 @@ from artifacts_hooks import (
     try_risky_abort,
     try_lucky_event
 )
-
-PROJECT_TYPES = {
-    1: {
-        "name": "быстрый проект — лёгкая доработка",
-        "buy": (60_000, 90_000),
-        "profit": (8000, 25000),
-        "freeze": (1, 2)
-    },
-    2: {
-        "name": "средний проект — восстановление / частичный ремонт",
-        "buy": (90_000, 140_000),
-        "profit": (20000, 50000),
-        "freeze": (2, 4)
-    },
-    3: {
-        "name": "долгий проект — свап / крупная сборка",
-        "buy": (120_000, 200_000),
-        "profit": (45000, 120000),
-        "freeze": (3, 6)
-    }
-}
+from balance import get_balance
+from random_pool import get_random_pool
+from metrics import timed
+from event_log import log_event, set_context
 
 
 # СОПЕРНИК
 def create_rival():
-    styles = {
-        0: "осторожный проект-мейкер",
-        1: "опытный мастер рынка",
-        2: "агрессивный свап-энтузиаст"
-    }
+    balance = get_balance()["branch3"]
+    rng = get_random_pool()
 
-    style_id = random.randint(0, 2)
+    style_id = rng.randint(0, 2)
 
     rival = Rival(
-        name=styles[style_id],
+        name=balance["rival_styles"][style_id],
         style=style_id,
         mode=3,
-        budget=random.randint(150_000, 300_000)
+        budget=rng.randint(*balance["rival_budget"])
     )
 
     attach_portfolio(rival)
@@ -102,12 +97,15 @@ def roll_event(deal, username):
     редкие события проекта
     """
 
-    roll = random.random()
+    events = get_balance()["branch3"]["events"]
+    rng = get_random_pool()
+
+    roll = rng.random()
 
     # супер-удача (редко)
-    if roll < 0.06:
+    if roll < events["boost_chance"]:
         deal.freeze_turns = max(1, deal.freeze_turns - 1)
-        deal.bonus_profit = random.randint(15000, 40000)
+        deal.bonus_profit = rng.randint(*events["boost_bonus"])
 
         print("\n[редкое событие] нашёлся коллекционер!")
         print("проект ускорен, потенциальная прибыль выросла")
@@ -116,10 +114,10 @@ def roll_event(deal, username):
 
         return "boost"
 
-    # неприятность (умеренная)
-    if roll < 0.18:
+    # неприятность (умеренная, порог включает boost)
+    if roll < events["delay_chance"]:
         deal.freeze_turns += 1
-        deal.bonus_profit = -random.randint(5000, 15000)
+        deal.bonus_profit = -rng.randint(*events["delay_penalty"])
 
         print("\n[неожиданная проблема] сложности в процессе работ")
         print("срок увеличен, часть бюджета потеряна")
@@ -131,31 +129,67 @@ def roll_event(deal, username):
 
 
 # ПРОГРЕСС ПРОЕКТОВ
-def advance_turn(player, rival):
+@timed("branch3.advance_turn")
+def advance_turn(player, rival, market=None):
     """
     продвигает время на один ход
+
+    если задан рынок соперников, видимый соперник ходит
+    вместе с ним (rival_engine.RivalMarket, индекс 0)
     """
 
+    if market is None:
+        player.portfolio.advance_all()
+        rival.portfolio.advance_all()
+
+        finish_ready_projects(player, is_rival=False)
+        finish_ready_projects(rival, is_rival=True)
+        return
+
     player.portfolio.advance_all()
-    rival.portfolio.advance_all()
 
-    finish_ready_projects(player, is_rival=False)
-    finish_ready_projects(rival, is_rival=True)
+    finish_ready_projects(player, is_rival=False, saturation=market.saturation())
+
+    active = len(rival.portfolio.deals)
+
+    market.step()
+    market.sync_rival(rival)
+
+    if len(rival.portfolio.deals) > active:
+        print("[соперник] начал новый проект")
+
+    counts = market.active_by_type()
 
+    print(f"\n[рынок] соперников: {len(market)}, "
+          f"новых проектов: {market.started}, продано: {market.sold}")
+    print("активные проекты соперников по типам:",
+          ", ".join(f"{t}: {c}" for t, c in counts.items()))
 
-def finish_ready_projects(entity, is_rival):
+
+@timed("branch3.finish_ready_projects")
+def finish_ready_projects(entity, is_rival, saturation=None):
     """
     завершает готовые проекты игрока и соперника
+
+    saturation — множители прибыли по типам (насыщение рынка)
     """
 
+    types = get_balance()["branch3"]["project_types"]
+    rng = get_random_pool()
+
     for deal in list(entity.portfolio.deals):
         if not deal.is_ready():
             continue
 
-        info = PROJECT_TYPES[deal.type]
+        info = types[deal.type]
 
         low, high = info["profit"]
-        base_profit = random.randint(low, high)
+        base_profit = rng.randint(low, high)
+
+        if saturation is not None and saturation[deal.type] < 1.0:
+            base_profit = int(base_profit * saturation[deal.type])
+            print(f"\nрынок насыщен проектами этого типа "
+                  f"(-{round((1 - saturation[deal.type]) * 100)}%)")
 
         profit = base_profit + deal.bonus_profit
 
@@ -165,6 +199,9 @@ def finish_ready_projects(entity, is_rival):
         # начисляем прибыль
         entity.change_budget(profit)
 
+        # в статистику — итог за вычетом цены проекта
+        entity.completed_deals.record(profit - deal.buy_price, branch=3)
+
         who = "соперника" if is_rival else "игрока"
 
         print(f"\n[проект завершён — {who}]")
@@ -175,6 +212,14 @@ def finish_ready_projects(entity, is_rival):
         if not is_rival:
             username = get_current_username()
 
+            # знак бонуса — след события проекта (roll_event)
+            roll = "boost" if deal.bonus_profit > 0 else "delay" if deal.bonus_profit < 0 else ""
+
+            log_event(
+                "project_done", branch=3, type=deal.type,
+                amount=profit, bonus=deal.bonus_profit, roll=roll
+            )
+
             # первая сделка / 10 сделок
             try_first_deal(entity, username)
             try_ten_deals(entity, username)
@@ -188,10 +233,12 @@ def finish_ready_projects(entity, is_rival):
 
 # СОЗДАНИЕ ПРОЕКТА
 def start_project(player, project_type):
-    info = PROJECT_TYPES[project_type]
+    info = get_balance()["branch3"]["project_types"][project_type]
+
+    rng = get_random_pool()
 
-    price = random.randint(*info["buy"])
-    freeze = random.randint(*info["freeze"])
+    price = rng.randint(*info["buy"])
+    freeze = rng.randint(*info["freeze"])
 
     print("\nзапущен новый проект:")
     print(info["name"])
@@ -211,10 +258,15 @@ def start_project(player, project_type):
     deal.owner = player
 
     username = get_current_username()
-    roll_event(deal, username)
+    roll = roll_event(deal, username)
 
     player.portfolio.add(deal)
 
+    log_event(
+        "project_start", branch=3, type=project_type,
+        amount=price, freeze=deal.freeze_turns, roll=roll or ""
+    )
+
 
 # ДОСРОЧНЫЙ ВЫХОД ИЗ ПРОЕКТА
 def abandon_project(player):
@@ -226,10 +278,12 @@ def abandon_project(player):
         print("\nу вас нет активных проектов")
         return
 
+    balance = get_balance()["branch3"]
+
     print("\nвыберите проект для выхода:")
 
     for i, d in enumerate(player.portfolio.deals):
-        info = PROJECT_TYPES[d.type]
+        info = balance["project_types"][d.type]
         print(f"{i+1} — {info['name']} (ходов осталось: {d.freeze_turns})")
 
     idx = safe_int("номер проекта: ")
@@ -244,9 +298,15 @@ def abandon_project(player):
         print("такого проекта нет")
         return
 
-    deal = player.portfolio.deals[idx]
+    sell_project(player, player.portfolio.deals[idx])
 
-    loss = random.randint(8000, 20000)
+
+def sell_project(player, deal):
+    """
+    продажа выбранного проекта с убытком (без запроса ввода)
+    """
+
+    loss = get_random_pool().randint(*get_balance()["branch3"]["abandon_loss"])
 
     print("\nпроект продан на стадии сборки")
     print("убыток:", loss)
@@ -254,12 +314,14 @@ def abandon_project(player):
     player.change_budget(-loss)
     player.portfolio.remove(deal)
 
+    log_event("abort", branch=3, type=deal.type, amount=-loss)
+
     username = get_current_username()
     try_risky_abort(username)
 
 
 # ОСНОВНАЯ ФУНКЦИЯ ВЕТКИ
-def play_branch3(player):
+def play_branch3(player, resume=None):
     """
     Ветка 3 — инвестиционный портфель
 
@@ -269,42 +331,117 @@ def play_branch3(player):
         — игрок управляет проектами в портфеле
         — соперник ведёт свои проекты параллельно
 
+        риск:
+            перед каждым выбором действия выводится оценка
+            вероятности банкротства портфеля (модуль ruin)
+
+        автосохранение:
+            перед выбором действия в журнал пишется номер хода,
+            портфели игрока и соперника и описание рынка
+            (RivalMarket.to_replay); resume возвращает
+            к выбору действия того же хода, а если баланс
+            с тех пор изменился — партия начинается заново
+
         принудительный выход:
             --  — завершить ветку
     """
 
     print("\n=== Ветка 3 — Инвестиционный портфель ===\n")
 
-    # стартовые параметры ветки
-    player.budget = 300_000
-    player.win_target = 900_000
+    from rival_engine import RivalMarket
+    from ruin import show_ruin
+    from simulation import warm_pool
+
+    journal = SessionJournal(get_current_username(), branch=3)
+
+    if resume is not None:
+        try:
+            market = RivalMarket.from_replay(resume["market"])
+        except ValueError:
+            print("баланс изменился после сохранения — партия начинается заново")
+            resume = None
+
+    if resume is None:
+        balance = get_balance()["branch3"]
+
+        # стартовые параметры ветки
+        player.budget = balance["start_budget"]
+        player.win_target = balance["win_target"]
+
+        print("стартовый бюджет:", player.budget)
 
-    print("стартовый бюджет:", player.budget)
+        attach_portfolio(player)
+        rival = create_rival()
 
-    attach_portfolio(player)
-    rival = create_rival()
+        market = RivalMarket()
+        market.add_rival(rival.budget, rival.style)
+        market.populate(balance["market_rivals"] - 1)
 
-    cycle = 0       # номер хода
+        cycle = 0       # номер хода
+
+    else:
+        restore_player(resume["player"], player)
+        rival = restore_rival(resume["rival"])
+        cycle = resume["cycle"]
+
+        print("продолжение сохранённой партии, бюджет:", player.budget)
+        print("активных проектов:", player.portfolio.active_count())
+
+    set_context(branch=3, style=rival.style)
+
+    # процессы советника стартуют сейчас, а не в бюджете подсказки
+    warm_pool()
 
     while True:
 
-        cycle += 1
-        print(f"\n--- ход портфеля {cycle} ---")
+        if resume is None:
+            cycle += 1
+            print(f"\n--- ход портфеля {cycle} ---")
+
+            advance_turn(player, rival, market)
 
-        advance_turn(player, rival)
+        else:
+            print(f"\n--- ход портфеля {cycle} (из сохранения) ---")
+            resume = None
 
-        # проверка на проигрыш
-        if player.check_over():
+        # проверка на проигрыш / победу
+        if player.check_over() or player.check_win():
+            journal.clear()
             return
 
+        journal.save({
+            "player": snapshot_player(player),
+            "rival": snapshot_rival(rival),
+            "market": market.to_replay(),
+            "cycle": cycle
+        })
+
+        # оценка риска банкротства текущего портфеля (до 50 мс)
+        show_ruin(player, rival, market)
+
         print("\nваше решение:")
         print("1 — начать новый проект")
         print("2 — продать незавершённый проект")
         print("3 — подождать продвижения работ")
+        print("4 — совет: оценить варианты хода")
+        print("5 — шансы проектов: точный расчёт исходов")
         print("-- — выйти из ветки")
 
         action = input("\nвыбор: ").strip()
 
+        # подсказки не тратят ход — после них выбор повторяется
+        while action in ("4", "5"):
+            if action == "4":
+                from advisor import show_advice
+
+                show_advice(player, rival, market)
+            else:
+                from project_odds import show_project_odds
+
+                show_project_odds()
+
+            action = input("\nвыбор: ").strip()
+
         # --- ПРИНУДИТЕЛЬНЫЙ ВЫХОД ---
         if action == "--":
             print("\nвы покинули ветку проектов…")
@@ -0,0 +1,80 @@
+"""
+реестр сюжетных веток
+
+назначение модуля:
+    - хранит описание всех доступных веток (метаданные)
+    - импортирует модуль ветки только в момент её выбора
+    - позволяет добавлять новые ветки без правки game_loop
+
+формат записи реестра:
+    ключ меню → {
+        "title"  — название ветки в меню,
+        "module" — имя модуля ветки,
+        "entry"  — имя функции запуска play_branchN(player)
+    }
+
+функции модуля:
+    register_branch  — добавить ветку в реестр
+    list_branches    — пары (ключ, метаданные) в порядке меню
+    load_branch      — лениво импортировать ветку и вернуть её функцию
+"""
+
+
+import importlib
+
+
+BRANCHES = {}
+
+
+def register_branch(key, title, module, entry):
+    """
+    добавляет ветку в реестр
+
+    parameters:
+        key    — пункт меню (строка, которую вводит игрок)
+        title  — название ветки
+        module — имя модуля с логикой ветки
+        entry  — имя функции запуска ветки
+    """
+
+    BRANCHES[key] = {
+        "title": title,
+        "module": module,
+        "entry": entry
+    }
+
+
+def list_branches():
+    """
+    returns:
+        list[tuple] — (ключ, метаданные) в порядке регистрации
+    """
+    return list(BRANCHES.items())
+
+
+def load_branch(key):
+    """
+    импортирует модуль ветки при первом выборе
+
+    parameters:
+        key — пункт меню
+
+    returns:
+        callable | None — функция запуска ветки
+                          или None, если такой ветки нет
+    """
+
+    meta = BRANCHES.get(key)
+
+    if meta is None:
+        return None
+
+    module = importlib.import_module(meta["module"])
+
+    return getattr(module, meta["entry"])
+
+
+register_branch("1", "переговоры с перекупом", "branch1_basic", "play_branch1")
+register_branch("2", "перепродажа автомобилей", "branch2_market", "play_branch2")
+register_branch("3", "инвестиционный портфель", "branch3_portfolio", "play_branch3")
+register_branch("4", "портфель в реальном времени", "realtime", "play_realtime")
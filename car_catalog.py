@@ -0,0 +1,571 @@
+"""
+каталог объявлений о продаже машин (ветка 2)
+
+объявление:
+    качество (quality_names ветки 2), цена, риск заморозки
+    сделки и стиль продавца (rival_styles ветки 2)
+
+хранение:
+    - объявления лежат колонками (array): quality / price /
+      risk / style, номер объявления — индекс в колонках
+    - каталог генерируется пачкой (generate) или читается
+      из CSV (load_csv); игра держит его в storage/catalog.csv
+      и создаёт при первом поиске по фильтрам
+
+индекс:
+    объявления разбиты на сегменты (качество, стиль, риск) —
+    риск хранится с точностью до сотых, поэтому сегментов
+    не больше уровней × стилей × 101 (в сгенерированном
+    каталоге — 15); в сегменте — номера объявлений,
+    отсортированные по цене, и сами цены в том же порядке;
+    запрос «качество, цена, риск до …, стиль» — по одному
+    bisect на подходящий сегмент, поэтому число подходящих
+    объявлений и случайное из них находятся за микросекунды
+    даже на миллионе объявлений, с любыми фильтрами
+
+проданные объявления:
+    помечаются в sold и больше не выдаются; в каждом сегменте
+    проданные считаются деревом Фенвика по позициям индекса,
+    поэтому число подходящих объявлений находится без перебора
+    (O(log n) на сегмент)
+
+    в игре продажа (sell_listing) дописывается в журнал
+    storage/catalog_sold.txt; при следующем запуске отметки
+    из журнала переносятся в колонку sold файла каталога
+
+запуск замера:
+    python car_catalog.py [число объявлений] [файл CSV]
+
+функции и классы:
+    CarCatalog    — колонки, индекс и запросы
+    generate      — случайный каталог
+    load_csv / save_csv — каталог в CSV
+    get_catalog   — каталог интерактивной игры
+    sell_listing  — продажа объявления каталога игры
+"""
+
+
+import csv
+import os
+
+from array import array
+from bisect import bisect_left, bisect_right
+from heapq import merge
+from itertools import groupby
+
+from artifact_storage import STORAGE_DIR, ensure_storage_dir
+from balance import get_balance
+
+
+CATALOG_FILE = os.path.join(STORAGE_DIR, "catalog.csv")
+
+# журнал продаж каталога игры (номера объявлений, по одному в строке)
+SOLD_FILE = os.path.join(STORAGE_DIR, "catalog_sold.txt")
+
+# объявлений в каталоге игры
+CATALOG_SIZE = 100_000
+
+# разброс цены объявления вокруг цены уровня (доля)
+PRICE_SPREAD = 0.2
+
+# поправка риска заморозки по стилю продавца
+STYLE_RISK = {0: -0.05, 1: 0.0, 2: 0.1}
+
+# попыток случайного выбора до перебора подряд
+DRAW_ATTEMPTS = 64
+
+CSV_FIELDS = ("quality", "price", "risk", "style", "sold")
+
+
+_catalog = None
+
+# продажи каталога игры пишутся в журнал (каталог лежит в файле)
+_persist = False
+
+
+class CarCatalog:
+    """
+    каталог объявлений с индексом по (качество, стиль, риск, цена)
+
+    поля:
+        quality / price / risk / style — колонки объявлений
+        sold / sold_count — отметки проданных объявлений
+    """
+
+    def __init__(self):
+        self.quality = array("b")
+        self.price = array("l")
+        self.risk = array("f")
+        self.style = array("b")
+
+        self.sold = bytearray()
+        self.sold_count = 0
+
+        self._ids = {}
+        self._prices = {}
+
+        # номер объявления → позиция в индексе своего сегмента
+        self._pos = array("l")
+
+        # сегмент → дерево Фенвика проданных по позициям индекса
+        self._sold_tree = {}
+
+    def __len__(self):
+        return len(self.price)
+
+    def add(self, quality, price, risk, style, sold=0):
+        """
+        добавляет объявление (индекс нужно пересобрать: build_index)
+
+        риск округляется до сотых
+        """
+
+        self.quality.append(quality)
+        self.price.append(price)
+        self.risk.append(round(risk, 2))
+        self.style.append(style)
+        self.sold.append(1 if sold else 0)
+        self.sold_count += bool(sold)
+
+    def _segment(self, i):
+        return self.quality[i], self.style[i], self.risk[i]
+
+    def mark_sold(self, i):
+        """
+        объявление продано — больше не выдаётся запросами
+        """
+
+        if not self.sold[i]:
+            self.sold[i] = 1
+            self.sold_count += 1
+
+            tree = self._sold_tree.get(self._segment(i))
+
+            if tree is not None:
+                self._tree_add(tree, self._pos[i])
+
+    @staticmethod
+    def _tree_add(tree, position):
+        position += 1
+
+        while position < len(tree):
+            tree[position] += 1
+            position += position & -position
+
+    @staticmethod
+    def _tree_prefix(tree, position):
+        """
+        проданных среди позиций [0, position)
+        """
+
+        total = 0
+
+        while position > 0:
+            total += tree[position]
+            position -= position & -position
+
+        return total
+
+    def _sold_between(self, key, lo, hi):
+        tree = self._sold_tree[key]
+        return self._tree_prefix(tree, hi) - self._tree_prefix(tree, lo)
+
+    def build_index(self):
+        """
+        сортирует номера объявлений каждого сегмента по цене
+        """
+
+        price = self.price
+        buckets = {}
+
+        for i, key in enumerate(zip(self.quality, self.style, self.risk)):
+            buckets.setdefault(key, []).append(i)
+
+        self._ids = {}
+        self._prices = {}
+        self._pos = array("l", bytes(len(price) * array("l").itemsize))
+        self._sold_tree = {}
+
+        for key in sorted(buckets):
+            ids = buckets[key]
+            ids.sort(key=price.__getitem__)
+
+            self._ids[key] = array("l", ids)
+            self._prices[key] = array("l", (price[i] for i in ids))
+
+            tree = self._sold_tree[key] = array("l", bytes((len(ids) + 1) * array("l").itemsize))
+
+            for position, i in enumerate(ids):
+                self._pos[i] = position
+
+                if self.sold[i]:
+                    self._tree_add(tree, position)
+
+    def get(self, i):
+        """
+        returns:
+            dict — объявление по номеру
+        """
+
+        return {
+            "id": i,
+            "quality": self.quality[i],
+            "price": self.price[i],
+            "risk": round(self.risk[i], 2),
+            "style": self.style[i]
+        }
+
+    # ЗАПРОСЫ
+    def ranges(self, min_quality=None, max_quality=None,
+               min_price=None, max_price=None, max_risk=None, style=None):
+        """
+        отрезки индекса, подходящие по всем фильтрам
+
+        returns:
+            list — (сегмент, начало, конец) в массивах индекса,
+                   сегменты по возрастанию качества
+        """
+
+        found = []
+
+        for key, prices in self._prices.items():
+            q, seller, risk = key
+
+            if min_quality is not None and q < min_quality:
+                continue
+
+            if max_quality is not None and q > max_quality:
+                continue
+
+            if max_risk is not None and risk > max_risk:
+                continue
+
+            if style is not None and seller != style:
+                continue
+
+            lo = 0 if min_price is None else bisect_left(prices, min_price)
+            hi = len(prices) if max_price is None else bisect_right(prices, max_price)
+
+            if lo < hi:
+                found.append((key, lo, hi))
+
+        return found
+
+    def count(self, **filters):
+        """
+        число объявлений по фильтрам (ranges) — только индекс,
+        проданные вычитаются по дереву Фенвика
+        """
+
+        return sum(
+            hi - lo - self._sold_between(key, lo, hi)
+            for key, lo, hi in self.ranges(**filters)
+        )
+
+    def find(self, limit=10, **filters):
+        """
+        первые limit объявлений по фильтрам (от дешёвых внутри уровня)
+
+        returns:
+            list — номера объявлений
+        """
+
+        result = []
+        sold = self.sold
+
+        for _, group in groupby(self.ranges(**filters), key=lambda r: r[0][0]):
+            parts = [self._ids[key][lo:hi] for key, lo, hi in group]
+
+            for i in merge(*parts, key=self.price.__getitem__):
+                if not sold[i]:
+                    result.append(i)
+
+                    if len(result) >= limit:
+                        return result
+
+        return result
+
+    def draw(self, rng, **filters):
+        """
+        случайное объявление по фильтрам
+
+        сначала DRAW_ATTEMPTS случайных попыток по найденным
+        отрезкам (пропорционально их длине) — промахнуться можно
+        только по проданному объявлению; затем — перебор подряд
+        с равновероятным выбором среди непроданных
+        (reservoir sampling), чтобы распроданный отрезок
+        не смещал выбор к самым дешёвым объявлениям
+
+        returns:
+            int — номер объявления или None
+        """
+
+        found = self.ranges(**filters)
+        total = sum(hi - lo for _, lo, hi in found)
+
+        if not total:
+            return None
+
+        sold = self.sold
+
+        for _ in range(DRAW_ATTEMPTS):
+            k = int(rng.random() * total)
+
+            for key, lo, hi in found:
+                if k < hi - lo:
+                    i = self._ids[key][lo + k]
+                    break
+
+                k -= hi - lo
+
+            if not sold[i]:
+                return i
+
+        chosen = None
+        seen = 0
+
+        for key, lo, hi in found:
+            for i in self._ids[key][lo:hi]:
+                if not sold[i]:
+                    seen += 1
+
+                    if rng.random() * seen < 1:
+                        chosen = i
+
+        return chosen
+
+
+# СОЗДАНИЕ
+def generate(count, rng, cfg=None):
+    """
+    случайный каталог: качество и стиль продавца равновероятны,
+    цена — вокруг цены уровня (car_market.reference_prices),
+    риск — freeze_chance уровня с поправкой на стиль продавца
+
+    parameters:
+        cfg — раздел branch2 таблиц баланса (None — текущие)
+    """
+
+    from car_market import reference_prices
+
+    if cfg is None:
+        cfg = get_balance()["branch2"]
+
+    prices = reference_prices(cfg)
+    top = len(cfg["quality_names"]) - 1
+    low, high = cfg["car_price"]
+
+    catalog = CarCatalog()
+
+    for _ in range(count):
+        q = rng.randint(0, top)
+        style = rng.randint(0, 2)
+
+        price = int(prices[q] * (1.0 + (rng.random() * 2 - 1) * PRICE_SPREAD))
+        risk = cfg["freeze_chance"][q] + STYLE_RISK[style]
+
+        catalog.add(q, min(high, max(low, price)), min(1.0, max(0.0, risk)), style)
+
+    catalog.build_index()
+
+    return catalog
+
+
+def load_csv(path):
+    """
+    читает каталог из CSV (колонки CSV_FIELDS, первая строка — заголовок;
+    файлы без колонки sold читаются как каталог без продаж)
+
+    raises:
+        ValueError — строка с неверными значениями
+    """
+
+    catalog = CarCatalog()
+
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+
+        for line, row in enumerate(reader, start=2):
+            try:
+                risk = float(row["risk"])
+                sold = int(row.get("sold") or 0)
+
+                if not 0 <= risk <= 1 or sold not in (0, 1):
+                    raise ValueError
+
+                catalog.add(int(row["quality"]), int(row["price"]), risk, int(row["style"]), sold)
+
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"{path}: неверная строка {line}") from None
+
+    catalog.build_index()
+
+    return catalog
+
+
+def save_csv(catalog, path):
+    """
+    атомарно записывает каталог в CSV
+    """
+
+    tmp_path = path + ".tmp"
+
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_FIELDS)
+
+        for i in range(len(catalog)):
+            writer.writerow((
+                catalog.quality[i],
+                catalog.price[i],
+                round(catalog.risk[i], 2),
+                catalog.style[i],
+                catalog.sold[i]
+            ))
+
+    os.replace(tmp_path, path)
+
+
+def _load_sales(catalog):
+    """
+    переносит продажи из журнала SOLD_FILE в каталог и в его файл
+    """
+
+    try:
+        with open(SOLD_FILE, "r", encoding="utf-8") as f:
+            ids = [int(line) for line in f if line.strip()]
+
+    except FileNotFoundError:
+        return
+
+    except ValueError:
+        print("\n[каталог] журнал продаж повреждён — продажи не восстановлены")
+        ids = []
+
+    for i in ids:
+        if 0 <= i < len(catalog):
+            catalog.mark_sold(i)
+
+    if ids:
+        save_csv(catalog, CATALOG_FILE)
+
+    os.remove(SOLD_FILE)
+
+
+def get_catalog():
+    """
+    каталог интерактивной игры: storage/catalog.csv,
+    при первом обращении — генерируется и сохраняется
+
+    продажи прошлых запусков берутся из колонки sold
+    и из журнала продаж (он сразу переносится в файл)
+    """
+
+    global _catalog, _persist
+
+    if _catalog is not None:
+        return _catalog
+
+    from random_pool import get_random_pool
+
+    try:
+        _catalog = load_csv(CATALOG_FILE)
+        _load_sales(_catalog)
+        _persist = True
+
+    except FileNotFoundError:
+        print("\n[каталог] создаётся каталог объявлений…")
+
+        _catalog = generate(CATALOG_SIZE, get_random_pool())
+
+        ensure_storage_dir()
+        save_csv(_catalog, CATALOG_FILE)
+
+        # продажи старого каталога к новому не относятся
+        if os.path.exists(SOLD_FILE):
+            os.remove(SOLD_FILE)
+
+        _persist = True
+
+    except ValueError as error:
+        print("\n[каталог] файл не прочитан:", error)
+        print("[каталог] используется новый каталог без сохранения")
+
+        _catalog = generate(CATALOG_SIZE, get_random_pool())
+        _persist = False
+
+    return _catalog
+
+
+def sell_listing(i):
+    """
+    объявление каталога игры продано: отметка в каталоге
+    и строка в журнале продаж (файл каталога не переписывается)
+    """
+
+    catalog = get_catalog()
+
+    if not 0 <= i < len(catalog) or catalog.sold[i]:
+        return
+
+    catalog.mark_sold(i)
+
+    if _persist:
+        with open(SOLD_FILE, "a", encoding="utf-8") as f:
+            f.write(f"{i}\n")
+
+
+def benchmark(count=1_000_000, path=None, seed=1):
+    """
+    замер построения каталога и запросов
+    """
+
+    import time
+
+    from random_pool import RandomPool
+
+    rng = RandomPool(seed)
+
+    start = time.perf_counter()
+
+    if path is None:
+        catalog = generate(count, rng)
+        what = "сгенерировано"
+    else:
+        catalog = load_csv(path)
+        what = f"прочитано из {path}"
+
+    print(f"каталог: {what} {len(catalog)} объявлений "
+          f"за {time.perf_counter() - start:.2f} с (с индексом)")
+
+    queries = (
+        ("качество ≥ 3, цена ≤ 120 000", {"min_quality": 3, "max_price": 120_000}),
+        ("качество 2, цена 100 000 – 130 000",
+         {"min_quality": 2, "max_quality": 2, "min_price": 100_000, "max_price": 130_000}),
+        ("цена ≤ 90 000, риск ≤ 30 %", {"max_price": 90_000, "max_risk": 0.3}),
+        ("качество ≥ 1, риск ≤ 50 %, стиль 0", {"min_quality": 1, "max_risk": 0.5, "style": 0}),
+    )
+
+    for title, bounds in queries:
+        start = time.perf_counter()
+        found = catalog.count(**bounds)
+        counted = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+
+        for _ in range(1000):
+            catalog.draw(rng, **bounds)
+
+        drawn = (time.perf_counter() - start)
+
+        print(f"  {title}: найдено {found} за {counted:.2f} мс, "
+              f"случайное объявление — {drawn * 1000:.1f} мкс")
+
+
+if __name__ == "__main__":
+    import sys
+
+    benchmark(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000,
+        sys.argv[2] if len(sys.argv) > 2 else None
+    )
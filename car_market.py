@@ -0,0 +1,529 @@
+"""
+общий рынок автомобилей ветки 2 — книга заявок
+
+идея:
+    - машины торгуются по уровням качества (quality_names ветки 2),
+      у каждого уровня своя книга: заявки на покупку (bids)
+      и на продажу (asks)
+    - заявки ставят игроки и соперники-перекупы (rival_flow);
+      входящая заявка сразу сводится со встречными по
+      приоритету цены, а при равной цене — времени подачи
+    - сделка проходит по цене стоящей в книге заявки;
+      последняя цена сделки уровня — «реализованная цена»,
+      по ней ветка 2 выставляет машины и считает прибыль
+      (calc_profit получает цену продажи машины игрока)
+
+устройство книги:
+    - заявки лежат в словаре по номеру, стороны книги — кучи
+      (heapq) из (цена, время, номер); у покупок цена со знаком
+      минус, поэтому вершина кучи — лучшая цена
+    - отмена и истечение срока ленивые: заявка удаляется из
+      словаря, а запись кучи выбрасывается, когда доходит
+      до вершины; кучи периодически уплотняются
+    - время — номер заявки по порядку подачи (seq); заявки
+      соперников живут order_ttl заявок, заявки игрока — пока
+      не исполнятся (игрок торгует немедленными заявками)
+
+сохранение:
+    каждые checkpoint_every заявок и при выходе из игры книга
+    атомарно пишется в storage/car_market.json; при запуске
+    рынок продолжается с последнего снимка
+
+параметры (balance.json, раздел branch2.order_book):
+    spread           — разброс цен заявок соперников вокруг
+                       последней цены (доля)
+    rival_orders     — заявок соперников за ход ветки
+    rival_traders    — число соперников-перекупов на рынке
+    order_ttl        — срок жизни заявки соперника (в заявках)
+    price_weight     — доля разницы цен продажи и покупки,
+                       которая попадает в прибыль сделки
+    checkpoint_every — период сохранения книги (в заявках)
+
+запуск замера пропускной способности:
+    python car_market.py [число заявок]
+
+функции и классы:
+    OrderBook       — книги заявок всех уровней и сведение
+    rival_flow      — поток заявок соперников
+    get_car_market  — общий рынок игры (со снимком)
+"""
+
+
+import heapq
+import json
+import os
+
+from artifact_storage import STORAGE_DIR, ensure_storage_dir
+from balance import get_balance
+from metrics import count
+
+
+BUY = "buy"
+SELL = "sell"
+
+CHECKPOINT_FILE = os.path.join(STORAGE_DIR, "car_market.json")
+
+# версия формата снимка книги
+BOOK_VERSION = 1
+
+# кучи уплотняются, когда мёртвых записей больше, чем живых заявок
+COMPACT_SLACK = 1024
+
+# насколько соперники тянут цену уровня к стартовой (за заявку)
+REVERSION = 0.05
+
+
+_market = None
+
+
+def reference_prices(balance):
+    """
+    стартовые цены уровней: диапазон car_price делится
+    поровну между уровнями качества (от худшего к лучшему)
+
+    returns:
+        dict {качество: цена}
+    """
+
+    low, high = balance["car_price"]
+    qualities = sorted(balance["quality_names"])
+    step = (high - low) / len(qualities)
+
+    return {q: int(low + step * (i + 0.5)) for i, q in enumerate(qualities)}
+
+
+class OrderBook:
+    """
+    книги заявок по уровням качества
+
+    поля:
+        seq     — номер последней поданной заявки (часы книги)
+        orders  — {номер: [владелец, сторона, уровень, цена,
+                   количество, истекает, время]}
+        bids / asks — {уровень: куча}
+        reference — {уровень: стартовая цена}
+        last    — {уровень: цена последней сделки}
+        volume  — {уровень: машин продано}
+        flow    — {уровень: чистый спрос} — машины, купленные
+                  входящими заявками, минус проданные ими
+                  (с последнего take_flow, в снимок не входит)
+        path    — файл снимка (None — без сохранения)
+    """
+
+    def __init__(self, prices, path=None, checkpoint_every=0):
+        self.seq = 0
+        self.orders = {}
+
+        self.bids = {tier: [] for tier in prices}
+        self.asks = {tier: [] for tier in prices}
+
+        self.reference = dict(prices)
+        self.last = dict(prices)
+        self.volume = {tier: 0 for tier in prices}
+        self.flow = {tier: 0 for tier in prices}
+
+        self.path = path
+        self.checkpoint_every = checkpoint_every
+        self._next_checkpoint = checkpoint_every
+
+    # ЗАЯВКИ
+    def submit(self, owner, side, tier, price=None, qty=1, ttl=0, rest=True):
+        """
+        подаёт заявку и сразу сводит её со встречными
+
+        parameters:
+            price — предельная цена (None — по любой цене)
+            ttl   — срок жизни в заявках (0 — бессрочно)
+            rest  — оставить неисполненный остаток в книге
+
+        returns:
+            list — сделки (цена, количество, покупатель, продавец)
+        """
+
+        self.seq += 1
+        seq = self.seq
+
+        orders = self.orders
+        trades = []
+
+        if side == BUY:
+            book = self.asks[tier]
+            limit = price if price is not None else float("inf")
+        else:
+            book = self.bids[tier]
+            limit = -price if price is not None else float("inf")
+
+        while qty and book:
+            key, _, oid = book[0]
+            order = orders.get(oid)
+
+            if order is None:
+                heapq.heappop(book)
+                continue
+
+            if order[5] and order[5] <= seq:
+                heapq.heappop(book)
+                del orders[oid]
+                continue
+
+            # лучшая встречная цена хуже предела — сведение окончено
+            if key > limit:
+                break
+
+            fill = min(qty, order[4])
+            qty -= fill
+            order[4] -= fill
+
+            if side == BUY:
+                trades.append((order[3], fill, owner, order[0]))
+            else:
+                trades.append((order[3], fill, order[0], owner))
+
+            if not order[4]:
+                heapq.heappop(book)
+                del orders[oid]
+
+        if trades:
+            filled = sum(t[1] for t in trades)
+
+            self.last[tier] = trades[-1][0]
+            self.volume[tier] += filled
+            self.flow[tier] += filled if side == BUY else -filled
+
+        if qty and rest and price is not None:
+            orders[seq] = [owner, side, tier, price, qty, seq + ttl if ttl else 0, seq]
+
+            if side == BUY:
+                heapq.heappush(self.bids[tier], (-price, seq, seq))
+            else:
+                heapq.heappush(self.asks[tier], (price, seq, seq))
+
+        if seq >= self._next_checkpoint and self.checkpoint_every:
+            self._next_checkpoint = seq + self.checkpoint_every
+            self.compact()
+
+            if self.path is not None:
+                self.checkpoint()
+
+        return trades
+
+    def cancel(self, oid):
+        """
+        снимает заявку (запись кучи удалится лениво)
+
+        returns:
+            bool — заявка была в книге
+        """
+
+        return self.orders.pop(oid, None) is not None
+
+    def best(self, side, tier):
+        """
+        лучшая живая заявка стороны уровня
+
+        returns:
+            int — цена или None, если сторона пуста
+        """
+
+        book = self.bids[tier] if side == BUY else self.asks[tier]
+
+        while book:
+            _, _, oid = book[0]
+            order = self.orders.get(oid)
+
+            if order is not None and not (order[5] and order[5] <= self.seq):
+                return order[3]
+
+            heapq.heappop(book)
+            self.orders.pop(oid, None)
+
+        return None
+
+    def depth(self, tier):
+        """
+        returns:
+            tuple (машин в заявках на покупку, на продажу)
+        """
+
+        bids = asks = 0
+
+        for order in self.orders.values():
+            if order[2] == tier and not (order[5] and order[5] <= self.seq):
+                if order[1] == BUY:
+                    bids += order[4]
+                else:
+                    asks += order[4]
+
+        return bids, asks
+
+    def compact(self):
+        """
+        выбрасывает истёкшие заявки и пересобирает кучи,
+        если мёртвых записей стало слишком много
+        """
+
+        seq = self.seq
+
+        expired = [
+            oid for oid, order in self.orders.items()
+            if order[5] and order[5] <= seq
+        ]
+
+        for oid in expired:
+            del self.orders[oid]
+
+        entries = sum(len(h) for h in self.bids.values())
+        entries += sum(len(h) for h in self.asks.values())
+
+        if entries - len(self.orders) > len(self.orders) + COMPACT_SLACK:
+            self._rebuild()
+
+    def _rebuild(self):
+        for tier in self.bids:
+            self.bids[tier] = []
+            self.asks[tier] = []
+
+        for oid, order in self.orders.items():
+            if order[1] == BUY:
+                self.bids[order[2]].append((-order[3], order[6], oid))
+            else:
+                self.asks[order[2]].append((order[3], order[6], oid))
+
+        for heap in (*self.bids.values(), *self.asks.values()):
+            heapq.heapify(heap)
+
+    # СНИМОК
+    def to_dict(self):
+        return {
+            "v": BOOK_VERSION,
+            "seq": self.seq,
+            "last": self.last,
+            "volume": self.volume,
+            "orders": [[oid] + order for oid, order in self.orders.items()]
+        }
+
+    @classmethod
+    def from_dict(cls, data, prices, path=None, checkpoint_every=0):
+        """
+        восстанавливает книгу; уровни, которых нет в prices,
+        отбрасываются, новые уровни начинают со стартовой цены
+
+        raises:
+            ValueError — снимок другой версии
+        """
+
+        if data.get("v") != BOOK_VERSION:
+            raise ValueError("неизвестная версия снимка книги заявок")
+
+        book = cls(prices, path, checkpoint_every)
+        book.seq = data["seq"]
+        book._next_checkpoint = book.seq + checkpoint_every
+
+        for tier, price in data["last"].items():
+            if int(tier) in book.last:
+                book.last[int(tier)] = price
+                book.volume[int(tier)] = data["volume"][tier]
+
+        for oid, *order in data["orders"]:
+            if order[2] in book.bids:
+                book.orders[oid] = order
+
+        book._rebuild()
+
+        return book
+
+    def checkpoint(self):
+        """
+        атомарно записывает снимок книги в self.path
+        """
+
+        ensure_storage_dir()
+
+        tmp_path = self.path + ".tmp"
+
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+
+        os.replace(tmp_path, self.path)
+
+        count("car_market.checkpoints")
+
+    def take_flow(self):
+        """
+        чистый спрос по уровням с прошлого вызова (по возрастанию
+        уровня); счётчики обнуляются
+        """
+
+        flows = [self.flow[tier] for tier in sorted(self.flow)]
+        self.flow = dict.fromkeys(self.flow, 0)
+
+        return flows
+
+    # ИГРОК
+    def buy_car(self, owner, tier, price):
+        """
+        немедленная покупка машины не дороже price
+
+        returns:
+            int — цена сделки или None, если продавца не нашлось
+        """
+
+        trades = self.submit(owner, BUY, tier, price, rest=False)
+
+        return trades[0][0] if trades else None
+
+    def sell_car(self, owner, tier):
+        """
+        немедленная продажа машины лучшему покупателю
+
+        returns:
+            int — цена сделки или None, если покупателей нет
+        """
+
+        trades = self.submit(owner, SELL, tier, rest=False)
+
+        return trades[0][0] if trades else None
+
+
+# СОПЕРНИКИ
+def rival_flow(book, rng, orders, cfg=None):
+    """
+    поток заявок соперников-перекупов
+
+    каждая заявка — случайный соперник, уровень и сторона;
+    цена — последняя цена уровня, слегка сдвинутая к опорной
+    (REVERSION), ± spread, в пределах car_price; опорную цену
+    ветка 2 ведёт по ценовому индексу (market_index)
+
+    parameters:
+        orders — число заявок
+        cfg    — раздел branch2 таблиц баланса (None — текущие)
+
+    returns:
+        int — число сделок
+    """
+
+    if cfg is None:
+        cfg = get_balance()["branch2"]
+
+    params = cfg["order_book"]
+    spread = params["spread"]
+    ttl = params["order_ttl"]
+    traders = params["rival_traders"]
+    low, high = cfg["car_price"]
+
+    top = len(cfg["quality_names"]) - 1
+    last = book.last
+    reference = book.reference
+    submit = book.submit
+
+    trades = 0
+
+    for _ in range(orders):
+        tier = rng.randint(0, top)
+        side = BUY if rng.random() < 0.5 else SELL
+
+        center = last[tier] + (reference[tier] - last[tier]) * REVERSION
+        shift = rng.random() * spread
+
+        # покупатели начинают снизу, продавцы — сверху
+        if side == BUY:
+            price = int(center * (1.0 - shift + spread / 2))
+        else:
+            price = int(center * (1.0 + shift - spread / 2))
+
+        price = min(high, max(low, price))
+        owner = f"rival-{rng.randint(1, traders)}"
+
+        trades += len(submit(owner, side, tier, price, ttl=ttl))
+
+    count("car_market.rival_orders", orders)
+
+    return trades
+
+
+# ОБЩИЙ РЫНОК
+def get_car_market():
+    """
+    общий рынок интерактивной игры
+
+    при первом вызове книга читается из снимка (если он есть),
+    при выходе из игры — сохраняется
+    """
+
+    global _market
+
+    if _market is not None:
+        return _market
+
+    balance = get_balance()["branch2"]
+    prices = reference_prices(balance)
+    every = balance["order_book"]["checkpoint_every"]
+
+    try:
+        with open(CHECKPOINT_FILE, "r", encoding="utf-8") as f:
+            _market = OrderBook.from_dict(json.load(f), prices, CHECKPOINT_FILE, every)
+
+    except FileNotFoundError:
+        _market = OrderBook(prices, CHECKPOINT_FILE, every)
+
+    except (ValueError, KeyError, TypeError, IndexError):
+        print("\n[рынок] снимок книги заявок повреждён — рынок начат заново")
+        _market = OrderBook(prices, CHECKPOINT_FILE, every)
+
+    import atexit
+    atexit.register(_market.checkpoint)
+
+    return _market
+
+
+def benchmark(total=200_000, seed=1):
+    """
+    замер пропускной способности сведения (без записи на диск
+    в storage: снимки пишутся во временный каталог)
+
+    returns:
+        float — заявок в секунду
+    """
+
+    import tempfile
+    import time
+
+    from random_pool import RandomPool
+
+    balance = get_balance()["branch2"]
+    every = balance["order_book"]["checkpoint_every"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        book = OrderBook(
+            reference_prices(balance),
+            os.path.join(tmp, "car_market.json"),
+            every
+        )
+        rng = RandomPool(seed)
+
+        start = time.perf_counter()
+        trades = rival_flow(book, rng, total, balance)
+        elapsed = time.perf_counter() - start
+
+        size = os.path.getsize(book.path) if os.path.exists(book.path) else 0
+
+    rate = total / elapsed
+
+    print("книга заявок: замер сведения")
+    print(f"  заявок:           {total}")
+    print(f"  сделок:           {trades}")
+    print(f"  заявок в книге:   {len(book.orders)}")
+    print(f"  снимков:          {total // every if every else 0} "
+          f"(последний {size // 1024} КиБ)")
+    print(f"  время:            {elapsed:.2f} с")
+    print(f"  заявок в секунду: {rate:,.0f}".replace(",", " "))
+    print("  последние цены:", ", ".join(f"{t}: {p}" for t, p in book.last.items()))
+
+    return rate
+
+
+if __name__ == "__main__":
+    import sys
+
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
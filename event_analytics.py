@@ -0,0 +1,375 @@
+"""
+аналитика журнала игровых событий (event_log) за один проход
+
+зачем:
+    вопросы вроде «средняя прибыль проектов ветки 3 по типам
+    за неделю» или «как часто roll_event задерживает крупные
+    проекты» решаются сводкой по журналу событий — без загрузки
+    журналов в память целиком
+
+как работает:
+    - файлы дней (storage/events/events_<дата>.jsonl) выбираются
+      по периоду запроса и режутся на сегменты по SEGMENT_SIZE
+      байт; сегменты считаются в пуле процессов
+      (simulation.get_pool)
+    - процесс отображает файл в память (mmap) и читает только
+      свой сегмент: строка принадлежит сегменту, в котором она
+      начинается, поэтому каждая строка считается ровно один раз
+    - строки без нужного вида события (kind) и логина не читаются:
+      поиск подстроки по отображённому файлу сразу переходит
+      к следующей подходящей строке, JSON разбирается только у неё;
+      поиск не выходит за конец последней строки сегмента
+    - каждый сегмент даёт частичные агрегаты по группам
+      (число, сумма, минимум, максимум), которые затем сливаются
+    - испорченные строки (оборванная запись) пропускаются
+      и считаются отдельно
+
+запуск:
+    python event_analytics.py --kind project_done --branch 3 --by type --days 7
+    python event_analytics.py --kind project_start --where type=3 --by roll
+    python event_analytics.py --kind deal --by branch,style --value amount
+
+    --by    — поля группировки (user, branch, type, style, roll, ...)
+    --where — поле=значение, можно повторять
+    --value — поле, по которому считаются сумма / среднее
+    --days  — только события последних N дней
+
+функции и классы модуля:
+    Query        — параметры запроса
+    scan_segment — частичные агрегаты одного сегмента файла
+    analyze      — сводка по журналам (сегменты в пуле)
+"""
+
+
+import json
+import mmap
+import os
+import time
+
+from collections import namedtuple
+
+from event_log import EVENTS_DIR
+
+
+# байт в сегменте одной задачи пула
+SEGMENT_SIZE = 8 * 1024 * 1024
+
+Query = namedtuple(
+    "Query",
+    ["kind", "branch", "user", "since", "where", "by", "value"],
+    defaults=(None, None, None, None, (), (), "amount")
+)
+
+
+def _needles(query):
+    """
+    подстроки, без которых строка точно не подходит запросу
+    (журнал пишется компактным JSON, см. event_log.log_event)
+    """
+
+    needles = []
+
+    if query.kind is not None:
+        needles.append(b'"kind":' + json.dumps(query.kind, ensure_ascii=False).encode("utf-8"))
+
+    if query.user is not None:
+        needles.append(b'"user":' + json.dumps(query.user, ensure_ascii=False).encode("utf-8"))
+
+    return needles
+
+
+def _matches(record, query):
+    if query.kind is not None and record.get("kind") != query.kind:
+        return False
+
+    if query.branch is not None and record.get("branch") != query.branch:
+        return False
+
+    if query.user is not None and record.get("user") != query.user:
+        return False
+
+    if query.since is not None and record.get("ts", 0) < query.since:
+        return False
+
+    for field, value in query.where:
+        if str(record.get(field)) != value:
+            return False
+
+    return True
+
+
+# СЕГМЕНТ
+def scan_segment(task):
+    """
+    частичные агрегаты строк, которые начинаются в сегменте
+    [start, end) файла (выполняется в процессе пула)
+
+    parameters:
+        task — (путь, start, end, Query)
+
+    returns:
+        tuple (группы {ключ: [число, со значением, сумма, мин, макс]},
+               разобрано строк, испорченных строк)
+    """
+
+    path, start, end, query = task
+
+    needles = _needles(query)
+    groups = {}
+    lines = errors = 0
+
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            size = len(mapped)
+            pos = start
+
+            # строка, начатая в прошлом сегменте, — его
+            if start:
+                newline = mapped.find(b"\n", start - 1)
+                pos = size if newline == -1 else newline + 1
+
+            # конец последней строки, которая начинается в сегменте:
+            # дальше подстроку не ищем (иначе каждый сегмент
+            # с редким видом события просматривал бы файл до конца)
+            if end < size:
+                limit = mapped.find(b"\n", end - 1)
+                limit = size if limit == -1 else limit
+            else:
+                limit = size
+
+            while pos < end:
+                # со строкой поиска — сразу к следующей строке с ней
+                if needles:
+                    hit = mapped.find(needles[0], pos, limit)
+
+                    if hit == -1:
+                        break
+
+                    line_start = mapped.rfind(b"\n", pos, hit) + 1 or pos
+
+                    if line_start >= end:
+                        break
+
+                    pos = line_start
+
+                newline = mapped.find(b"\n", pos)
+
+                if newline == -1:
+                    newline = size
+
+                line = mapped[pos:newline]
+                pos = newline + 1
+
+                if not all(needle in line for needle in needles[1:]):
+                    continue
+
+                lines += 1
+
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    errors += 1
+                    continue
+
+                if not isinstance(record, dict) or not _matches(record, query):
+                    continue
+
+                key = tuple(record.get(field) for field in query.by)
+                entry = groups.get(key)
+
+                if entry is None:
+                    entry = groups[key] = [0, 0, 0, None, None]
+
+                entry[0] += 1
+
+                value = record.get(query.value)
+
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    entry[1] += 1
+                    entry[2] += value
+
+                    if entry[3] is None or value < entry[3]:
+                        entry[3] = value
+
+                    if entry[4] is None or value > entry[4]:
+                        entry[4] = value
+
+    return groups, lines, errors
+
+
+def _merge(total, groups):
+    for key, part in groups.items():
+        entry = total.get(key)
+
+        if entry is None:
+            total[key] = part
+            continue
+
+        entry[0] += part[0]
+        entry[1] += part[1]
+        entry[2] += part[2]
+
+        if part[3] is not None and (entry[3] is None or part[3] < entry[3]):
+            entry[3] = part[3]
+
+        if part[4] is not None and (entry[4] is None or part[4] > entry[4]):
+            entry[4] = part[4]
+
+
+# СВОДКА
+def log_files(directory=EVENTS_DIR, since=None):
+    """
+    файлы журнала, в которых могут быть события не раньше since
+
+    returns:
+        list — пути по возрастанию даты
+    """
+
+    first_day = None if since is None else time.strftime("%Y-%m-%d", time.localtime(since))
+
+    try:
+        names = sorted(os.listdir(directory))
+    except FileNotFoundError:
+        return []
+
+    files = []
+
+    for name in names:
+        if not (name.startswith("events_") and name.endswith(".jsonl")):
+            continue
+
+        day = name[len("events_"):-len(".jsonl")]
+
+        if first_day is not None and day < first_day:
+            continue
+
+        files.append(os.path.join(directory, name))
+
+    return files
+
+
+def analyze(query, directory=EVENTS_DIR, segment_size=SEGMENT_SIZE):
+    """
+    сводка по журналам событий за один проход
+
+    returns:
+        dict:
+            groups — {ключ группы: [число, со значением, сумма, мин, макс]}
+            lines  — разобрано строк (JSON)
+            errors — испорченных строк
+            bytes  — просмотрено байт
+    """
+
+    from simulation import get_pool
+
+    tasks = []
+    total_bytes = 0
+
+    for path in log_files(directory, query.since):
+        size = os.path.getsize(path)
+        total_bytes += size
+
+        for start in range(0, size, segment_size):
+            tasks.append((path, start, min(start + segment_size, size), query))
+
+    pool = get_pool() if len(tasks) > 1 else None
+    results = pool.map(scan_segment, tasks) if pool is not None else map(scan_segment, tasks)
+
+    groups = {}
+    lines = errors = 0
+
+    for part, part_lines, part_errors in results:
+        _merge(groups, part)
+        lines += part_lines
+        errors += part_errors
+
+    return {"groups": groups, "lines": lines, "errors": errors, "bytes": total_bytes}
+
+
+def _sort_key(key):
+    return tuple((value is None, str(value)) for value in key)
+
+
+def print_report(query, result):
+    groups = result["groups"]
+    events = sum(entry[0] for entry in groups.values())
+
+    headers = [*query.by, "событий", "доля", f"{query.value}: среднее", "сумма", "мин", "макс"]
+    rows = []
+
+    for key in sorted(groups, key=_sort_key):
+        count, valued, total, low, high = groups[key]
+
+        rows.append([
+            *("—" if value is None else str(value) for value in key),
+            str(count),
+            f"{count / events:.1%}",
+            f"{total / valued:.1f}" if valued else "—",
+            str(total) if valued else "—",
+            "—" if low is None else str(low),
+            "—" if high is None else str(high)
+        ])
+
+    widths = [max(len(row[i]) for row in [headers, *rows]) for i in range(len(headers))]
+
+    print("  ".join(header.ljust(width) for header, width in zip(headers, widths)))
+
+    for row in rows:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+
+    print(f"\nсобытий: {events}, разобрано строк: {result['lines']}, "
+          f"просмотрено {result['bytes'] / 1024 / 1024:.1f} МБ, испорченных: {result['errors']}")
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="сводка по журналу игровых событий")
+    parser.add_argument("--kind", help="вид события (event_log.KINDS)")
+    parser.add_argument("--branch", type=int)
+    parser.add_argument("--user")
+    parser.add_argument("--days", type=float, help="только последние N дней")
+    parser.add_argument("--where", action="append", default=[], help="поле=значение")
+    parser.add_argument("--by", default="", help="поля группировки через запятую")
+    parser.add_argument("--value", default="amount")
+    parser.add_argument("--dir", default=EVENTS_DIR)
+
+    args = parser.parse_args(argv)
+
+    where = []
+
+    for condition in args.where:
+        field, sep, value = condition.partition("=")
+
+        if not sep or not field:
+            print("ошибка: условие --where задаётся как поле=значение:", condition)
+            return 1
+
+        where.append((field, value))
+
+    query = Query(
+        kind=args.kind,
+        branch=args.branch,
+        user=args.user,
+        since=None if args.days is None else time.time() - args.days * 86400,
+        where=tuple(where),
+        by=tuple(field for field in args.by.split(",") if field),
+        value=args.value
+    )
+
+    start = time.perf_counter()
+
+    try:
+        result = analyze(query, args.dir)
+    except OSError as error:
+        print("ошибка:", error)
+        return 1
+
+    print_report(query, result)
+    print(f"время: {time.perf_counter() - start:.2f} с")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
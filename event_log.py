@@ -0,0 +1,115 @@
+"""
+журнал игровых событий для аналитики
+
+зачем:
+    журнал автосохранения (save_system) хранит только последнее
+    состояние ветки и удаляется после партии; здесь же каждое
+    значимое действие игрока дописывается в журнал событий
+    навсегда, чтобы потом считать по нему сводки
+    (event_analytics) — например, среднюю прибыль проектов
+    ветки 3 по типам за неделю
+
+формат:
+    storage/events/events_<ГГГГ-ММ-ДД>.jsonl — файл на день,
+    одна строка — одно событие (компактный JSON):
+        ts     — время события (секунды Unix)
+        user   — логин ("" — без входа)
+        branch — ветка
+        kind   — вид события (KINDS)
+    и поля события:
+        type   — тип проекта (ветка 3) или уровень машины (ветка 2)
+        style  — стиль соперника
+        amount — деньги события (прибыль, убыток, цена)
+        ...    — остальные поля вида (KINDS)
+
+запись:
+    строка пишется одним вызовом write в файл, открытый на
+    дозапись, поэтому строки разных событий не перемешиваются;
+    оборванная при сбое последняя строка пропускается при чтении
+
+функции модуля:
+    set_context — поля, общие для событий текущей ветки
+    log_event   — дописать событие в журнал дня
+    events_file — путь к журналу дня
+"""
+
+
+import json
+import os
+import time
+
+from artifact_storage import STORAGE_DIR
+from auth import get_current_username
+
+
+EVENTS_DIR = os.path.join(STORAGE_DIR, "events")
+
+# виды событий → поля помимо общих
+KINDS = {
+    "deal": "ветки 1, 2: сделка закрыта (amount — итог, 0 — сорвалась; "
+            "ветка 1: action, outcome; ветка 2: type, price, freeze)",
+    "abort": "ветки 2, 3: досрочная продажа в минус (amount — убыток)",
+    "project_start": "ветка 3: проект запущен (type, amount — цена, "
+                     "freeze, roll — итог roll_event)",
+    "project_done": "ветка 3: проект продан (type, amount — прибыль, "
+                    "bonus, roll)",
+}
+
+
+_context = {}
+_dir_ready = False
+
+
+def set_context(**fields):
+    """
+    задаёт поля, которые получат все следующие события
+    (ветка, стиль видимого соперника); прежние поля
+    контекста сбрасываются
+    """
+
+    _context.clear()
+    _context.update(fields)
+
+
+def events_file(ts=None):
+    """
+    путь к журналу дня, в который попадает время ts
+    """
+
+    day = time.strftime("%Y-%m-%d", time.localtime(ts))
+
+    return os.path.join(EVENTS_DIR, f"events_{day}.jsonl")
+
+
+def log_event(kind, **fields):
+    """
+    дописывает событие в журнал дня
+
+    parameters:
+        kind   — вид события (KINDS)
+        fields — поля события; перекрывают поля контекста
+
+    сбой записи не прерывает игру — событие теряется
+    """
+
+    global _dir_ready
+
+    ts = time.time()
+
+    record = {"ts": round(ts, 3), "user": get_current_username() or ""}
+    record.update(_context)
+    record["kind"] = kind
+    record.update(fields)
+
+    line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+    try:
+        if not _dir_ready:
+            os.makedirs(EVENTS_DIR, exist_ok=True)
+            _dir_ready = True
+
+        with open(events_file(ts), "a", encoding="utf-8") as f:
+            f.write(line)
+
+    except OSError:
+        pass
@@ -0,0 +1,313 @@
+"""
+конвейер объявлений ветки 2 на генераторах
+
+идея:
+    - объявления не создаются списком заранее: каждая стадия —
+      генератор, который берёт пачку у предыдущей стадии
+      и отдаёт свою, только когда её попросили
+    - источник → фильтр → оценка → потребитель:
+          random_source / market_source — новые объявления
+          filter_listings                — отбор по условию
+          score_listings                 — оценка выгодности
+          items / chunks / summarize     — потребители
+    - потребитель сам задаёт темп: пока он не попросил
+      следующую пачку, источник не генерирует ничего
+      (обратное давление), а в памяти живёт не больше
+      одной пачки на стадию — память не зависит от длины прогона
+
+пачки:
+    размер пачки растёт вдвое от MIN_BATCH до batch, поэтому
+    короткая партия не генерирует лишнего, а длинный прогон
+    идёт крупными пачками; интерактивная ветка тянет по одному
+    объявлению (batch=1) — цена берётся из книги заявок
+    в момент показа
+
+объявление — кортеж:
+    (quality, price, chance) после источника,
+    (quality, price, chance, score) после оценки
+
+оценка (score):
+    средняя прибыль уровня качества по ценовому индексу
+    (MarketIndex.profit_range — та же экономика, в которой
+    объявление торгуется), делённая на ожидаемую
+    длительность сделки в ходах (1 + шанс заморозки ×
+    средняя длительность заморозки) — прибыль за ход
+
+запуск замера:
+    python listing_pipeline.py [число объявлений] [размер пачки]
+
+функции модуля:
+    random_source    — случайные объявления (как в симуляции)
+    market_source    — объявления по ценам книги заявок (car_market)
+                       и ценовому индексу (market_index)
+    filter_listings  — фильтр пачек
+    score_listings   — оценка объявлений
+    items            — по одному объявлению
+    chunks           — пачки ровно заданного размера
+    summarize        — сводка по всему потоку
+"""
+
+
+from itertools import islice
+
+from balance import get_balance
+
+
+# размер пачки источника: начальный и по умолчанию наибольший
+MIN_BATCH = 16
+MAX_BATCH = 4096
+
+# индексы полей объявления
+QUALITY, PRICE, CHANCE, SCORE = range(4)
+
+
+def _sizes(batch, limit):
+    """
+    размеры пачек: рост вдвое до batch, в сумме не больше limit
+    """
+
+    size = min(MIN_BATCH, batch)
+    left = limit
+
+    while left is None or left > 0:
+        step = size if left is None else min(size, left)
+
+        yield step
+
+        if left is not None:
+            left -= step
+
+        size = min(size * 2, batch)
+
+
+# ИСТОЧНИКИ
+def random_source(rng, cfg=None, batch=MAX_BATCH, limit=None):
+    """
+    случайные объявления: качество и цена из car_price
+
+    parameters:
+        cfg   — раздел branch2 таблиц баланса (None — текущие,
+                перечитываются на каждой пачке)
+        limit — сколько объявлений выдать (None — без конца)
+
+    цена и шанс заморозки — по таблицам; если торговля идёт
+    по ценовому индексу, их берёт из индекса потребитель
+    в момент показа (simulation.simulate_branch2), поэтому
+    источник остаётся пачечным
+    """
+
+    for size in _sizes(batch, limit):
+        table = cfg if cfg is not None else get_balance()["branch2"]
+
+        top = len(table["quality_names"]) - 1
+        low, high = table["car_price"]
+        chances = table["freeze_chance"]
+
+        # пул (random_pool) отдаёт пачку одним вызовом; у каждого
+        # диапазона свой поток, поэтому значения те же, что поштучно
+        draw = getattr(rng, "integers", None)
+
+        if draw is not None:
+            qualities = draw(0, top, size)
+            prices = draw(low, high, size)
+
+            yield [(q, p, chances[q]) for q, p in zip(qualities, prices)]
+            continue
+
+        listings = []
+
+        for _ in range(size):
+            quality = rng.randint(0, top)
+            listings.append((quality, rng.randint(low, high), chances[quality]))
+
+        yield listings
+
+
+def market_source(market, rng, batch=1, index=None):
+    """
+    объявления по ценам книги заявок: цена — лучшая заявка
+    на продажу уровня, без заявок — по ценовому индексу
+    (без индекса — случайная из car_price); шанс заморозки —
+    из индекса, если он задан
+    """
+
+    from car_market import SELL
+
+    for size in _sizes(batch, None):
+        table = get_balance()["branch2"]
+
+        top = len(table["quality_names"]) - 1
+        chances = table["freeze_chance"]
+
+        listings = []
+
+        for _ in range(size):
+            quality = rng.randint(0, top)
+            price = market.best(SELL, quality)
+
+            if index is None:
+                if price is None:
+                    price = rng.randint(*table["car_price"])
+
+                listings.append((quality, price, chances[quality]))
+                continue
+
+            if price is None:
+                price = index.price(quality, table)
+
+            listings.append((quality, price, index.freeze_chance(quality, table)))
+
+        yield listings
+
+
+# СТАДИИ
+def filter_listings(batches, predicate):
+    """
+    оставляет объявления, для которых predicate(объявление) истинно
+    (пустые пачки дальше не передаются)
+    """
+
+    for listings in batches:
+        kept = [listing for listing in listings if predicate(listing)]
+
+        if kept:
+            yield kept
+
+
+def score_listings(batches, cfg=None, index=None):
+    """
+    добавляет к объявлению оценку — ожидаемую прибыль за ход
+
+    parameters:
+        index — market_index.MarketIndex, по которому считается
+                прибыль уровня (None — новый индекс по cfg: рынок
+                на опорных ценах); индекс интерактивной игры
+                передаёт только play_branch2
+    """
+
+    if index is None:
+        from market_index import MarketIndex
+
+        index = MarketIndex(cfg)
+
+    for listings in batches:
+        table = cfg if cfg is not None else get_balance()["branch2"]
+
+        durations = table["freeze_durations"]
+
+        # диапазоны прибыли — на момент пачки (индекс меняется между пачками)
+        profit = {}
+
+        for listing in listings:
+            quality = listing[QUALITY]
+
+            if quality not in profit:
+                profit[quality] = sum(index.profit_range(quality, table)) / 2
+
+        yield [
+            listing + (int(
+                profit[listing[QUALITY]]
+                / (1 + listing[CHANCE] * sum(durations[listing[QUALITY]]) / 2)
+            ),)
+            for listing in listings
+        ]
+
+
+# ПОТРЕБИТЕЛИ
+def items(batches):
+    """
+    поток объявлений по одному
+    """
+
+    for listings in batches:
+        yield from listings
+
+
+def chunks(batches, size):
+    """
+    пачки ровно по size объявлений (последняя — остаток)
+    """
+
+    stream = items(batches)
+
+    while True:
+        chunk = list(islice(stream, size))
+
+        if not chunk:
+            return
+
+        yield chunk
+
+
+def summarize(batches):
+    """
+    сводка по всему потоку без хранения объявлений
+
+    returns:
+        dict {"count", "mean_price", "by_quality", "best"}
+    """
+
+    total = 0
+    price_sum = 0
+    by_quality = {}
+    best = None
+
+    for listings in batches:
+        total += len(listings)
+
+        for listing in listings:
+            price_sum += listing[PRICE]
+            by_quality[listing[QUALITY]] = by_quality.get(listing[QUALITY], 0) + 1
+
+            if len(listing) > SCORE and (best is None or listing[SCORE] > best[SCORE]):
+                best = listing
+
+    return {
+        "count": total,
+        "mean_price": price_sum / total if total else 0,
+        "by_quality": dict(sorted(by_quality.items())),
+        "best": best
+    }
+
+
+def benchmark(count=1_000_000, batch=MAX_BATCH, seed=1):
+    """
+    прогон источник → фильтр (качество ≥ 2) → оценка → сводка
+    """
+
+    import resource
+    import time
+
+    from market_index import MarketIndex
+    from random_pool import RandomPool
+
+    cfg = get_balance()["branch2"]
+
+    start = time.perf_counter()
+
+    stream = random_source(RandomPool(seed), cfg, batch, limit=count)
+    stream = filter_listings(stream, lambda listing: listing[QUALITY] >= 2)
+    stream = score_listings(stream, cfg, MarketIndex(cfg))
+
+    result = summarize(stream)
+
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print("конвейер объявлений: источник → фильтр → оценка → сводка")
+    print(f"  объявлений:       {count} (пачка до {batch})")
+    print(f"  прошло фильтр:    {result['count']}")
+    print(f"  средняя цена:     {result['mean_price']:.0f}")
+    print(f"  лучшее:           {result['best']}")
+    print(f"  время:            {elapsed:.2f} с "
+          f"({count / elapsed:,.0f} объявлений в секунду)".replace(",", " "))
+    print(f"  пик памяти:       {peak // 1024} МиБ")
+
+
+if __name__ == "__main__":
+    import sys
+
+    benchmark(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else MAX_BATCH
+    )
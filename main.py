@@ -14,6 +14,13 @@
     game_loop()           — основной игровой цикл
     main()                — точка входа в программу
 
+параметры запуска:
+    --seed N              — зерно общего пула случайных чисел
+    --metrics             — собирать метрики (отчёт «м» в меню веток)
+    --metrics-port N      — отдавать метрики JSON по HTTP
+    --metrics-host АДРЕС  — адрес HTTP-выгрузки (по умолчанию
+                            127.0.0.1; 0.0.0.0 — доступ снаружи)
+
 роль в проекте:
     служит центральным координатором,
     объединяет систему пользователей, сохранения прогресса
@@ -21,13 +28,12 @@
 """
 
 
+import sys
+
+import metrics
 from player import Player
-from auth import register_user, login_user
-from branch1_basic import play_branch1
-from branch2_market import play_branch2
-from branch3_portfolio import play_branch3
-from save_system import load_player_progress
-from artifacts import show_artifacts_on_login
+from auth import register_user, login_user, get_current_username
+from branches import list_branches, load_branch
 
 
 def login_menu():
@@ -122,6 +128,9 @@ def start_game_mode(player):
 
     if choice == "1":
 
+        from save_system import load_player_progress
+        from artifacts import show_artifacts_on_login
+
         artifacts = load_player_progress()
 
         if len(artifacts) == 0:
@@ -142,37 +151,69 @@ def start_game_mode(player):
         print("\nигра начата без артефактов")
 
 
+def ask_resume(branch):
+    """
+        предлагает продолжить сохранённую партию ветки
+
+        returns:
+            dict | None — состояние ветки для resume
+    """
+
+    from save_system import load_session
+
+    saved = load_session(get_current_username())
+
+    if saved is None or str(saved["branch"]) != branch:
+        return None
+
+    print("\nнайдена сохранённая партия этой ветки")
+    print("1 — продолжить с места выхода")
+    print("2 — начать заново")
+
+    if input("выбор: ").strip() != "1":
+        return None
+
+    return saved["state"]
+
+
 def game_loop(player):
     """
         основной игровой цикл
 
         позволяет запускать ветки
         пока игрок не завершит игру
+
+        список веток берётся из реестра branches,
+        модуль ветки импортируется только после выбора
     """
 
     print("\n=== выбор сюжетной ветки ===\n")
 
-    print("1 — переговоры с перекупом")
-    print("2 — перепродажа автомобилей")
-    print("3 — инвестиционный портфель")
+    branches = list_branches()
+
+    for key, meta in branches:
+        print(key, "—", meta["title"])
+
+    if metrics.is_enabled():
+        print("м — отчёт по метрикам")
 
     while True:
 
         branch = input("\nваш выбор: ")
 
-        if branch == "1":
-            play_branch1(player)
-
-        elif branch == "2":
-            play_branch2(player)
+        if branch.strip() == "м" and metrics.is_enabled():
+            metrics.report()
+            continue
 
-        elif branch == "3":
-            play_branch3(player)
+        play = load_branch(branch)
 
-        else:
-            print("\nошибка — нужно ввести 1, 2 или 3")
+        if play is None:
+            keys = ", ".join(key for key, _ in branches)
+            print("\nошибка — нужно ввести один из пунктов:", keys)
             continue
 
+        play(player, resume=ask_resume(branch))
+
         print("\nсыграть ещё одну ветку?")
         print("1 — продолжить")
         print("2 — выйти в меню")
@@ -184,6 +225,19 @@ def game_loop(player):
             break
 
 
+def option_value(name):
+    """
+    значение параметра командной строки вида «--имя значение»
+    """
+
+    args = sys.argv[1:]
+
+    if name in args[:-1]:
+        return args[args.index(name) + 1]
+
+    return None
+
+
 def main():
     """
         точка входа в игру
@@ -195,10 +249,28 @@ def main():
             - запуск игрового цикла
     """
 
+    # python main.py --seed N — воспроизводимая партия
+    seed = option_value("--seed")
+
+    if seed is not None:
+        from random_pool import seed_random_pool
+
+        seed_random_pool(int(seed))
+
+    # --metrics включается при импорте модуля metrics,
+    # здесь — только HTTP-выгрузка
+    port = option_value("--metrics-port")
+
+    if port is not None:
+        metrics.serve_metrics(int(port), option_value("--metrics-host") or "127.0.0.1")
+
     login = auth_cycle()
 
     player = Player(name=login)
 
+    from save_system import load_player_progress
+
+    # артефакты уже в профиле сессии — повторного чтения нет
     player.artifacts = load_player_progress()
     print("\nзагружены артефакты:", len(player.artifacts))
 
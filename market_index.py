@@ -0,0 +1,459 @@
+"""
+ценовой индекс рынка ветки 2 по уровням качества
+
+идея:
+    - у каждого уровня качества свой индекс: 1.0 — опорная
+      цена уровня (car_market.reference_prices), 1.2 — рынок
+      на 20 % дороже
+    - за ход индекс тянется обратно к 1.0 (reversion), сдвигается
+      чистым спросом хода — покупки минус продажи игрока
+      и соперников (impact за машину) — и случайным толчком
+      (volatility); значение держится в [floor, cap]
+    - ход стоит O(число уровней): индекс не хранит историю,
+      только текущие значения и спрос текущего хода
+    - в безголовых прогонах ходы пропускаются лениво (skip):
+      уровень догоняет все пропущенные ходы одним шагом,
+      когда его читают, поэтому ход стоит O(1)
+
+что читает ветка 2:
+    price         — цена машины уровня (опорная × индекс)
+    profit_range  — диапазон прибыли: profit_ranges, сдвинутый
+                    на долю profit_weight от отклонения цены
+    freeze_chance — шанс заморозки: на дорогом (горячем) рынке
+                    машины уходят быстрее, на дешёвом — дольше
+
+векторизация:
+    шаг (advance) — одна формула для всех уровней; списки
+    считаются поэлементно, массивы NumPy (в том числе «прогоны ×
+    уровни») — одной операцией, поэтому simulate_paths гоняет
+    годы ходов рынка на тысячах прогонов за секунды; без NumPy
+    работает тот же код на списках (медленнее)
+
+параметры (balance.json, раздел branch2.price_index):
+    reversion         — доля отклонения, возвращаемая за ход
+    impact            — сдвиг индекса за машину чистого спроса
+    volatility        — наибольший случайный толчок за ход
+    floor / cap       — границы индекса
+    profit_weight     — доля отклонения цены, идущая в прибыль
+    chance_elasticity — как сильно индекс меняет шанс заморозки
+    rival_flow        — наибольший чистый спрос соперников
+                        за ход в безголовых прогонах
+
+сохранение:
+    индекс интерактивной игры пишется в storage/market_index.json
+    при выходе из игры и продолжается при следующем запуске
+
+запуск замера:
+    python market_index.py [ходов] [прогонов]
+
+функции и классы:
+    MarketIndex       — индекс уровней и его чтение веткой 2
+    advance           — один ход индекса (списки или NumPy)
+    MarketIndex.skip  — ходы без спроса игрока (ленивый сдвиг, O(1))
+    simulate_paths    — много независимых прогонов рынка
+    get_market_index  — индекс интерактивной игры
+"""
+
+
+import json
+import os
+
+from artifact_storage import STORAGE_DIR, ensure_storage_dir
+from balance import get_balance
+from car_market import reference_prices
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+INDEX_FILE = os.path.join(STORAGE_DIR, "market_index.json")
+
+# версия формата файла индекса
+INDEX_VERSION = 1
+
+
+_index = None
+
+
+def _params(cfg):
+    p = cfg["price_index"]
+
+    return p["reversion"], p["impact"], p["volatility"], p["floor"], p["cap"]
+
+
+def advance(levels, flows, shocks, params):
+    """
+    один ход индекса для всех уровней сразу
+
+    parameters:
+        levels — текущие значения индекса
+        flows  — чистый спрос хода (покупки − продажи)
+        shocks — случайные толчки из [-1, 1]
+        params — (reversion, impact, volatility, floor, cap)
+
+    списки считаются поэлементно, массивы NumPy любой
+    формы — одной операцией
+
+    returns:
+        новые значения индекса (того же вида, что levels)
+    """
+
+    reversion, impact, volatility, floor, cap = params
+
+    if np is not None and isinstance(levels, np.ndarray):
+        return np.clip(
+            levels + reversion * (1.0 - levels) + impact * flows + volatility * shocks,
+            floor, cap
+        )
+
+    return [
+        min(cap, max(floor, x + reversion * (1.0 - x) + impact * f + volatility * s))
+        for x, f, s in zip(levels, flows, shocks)
+    ]
+
+
+class MarketIndex:
+    """
+    ценовой индекс уровней качества
+
+    поля:
+        levels — значения индекса по уровням (по возрастанию качества)
+        flow   — чистый спрос текущего хода по уровням
+        turns  — сколько ходов прошёл рынок
+
+    cfg во всех методах — раздел branch2 таблиц баланса
+    (None — текущие)
+    """
+
+    def __init__(self, cfg=None, levels=None):
+        if cfg is None:
+            cfg = get_balance()["branch2"]
+
+        tiers = len(cfg["quality_names"])
+
+        self.levels = list(levels) if levels is not None else [1.0] * tiers
+        self.flow = [0] * tiers
+        self.turns = 0
+
+        # ход, до которого досчитан уровень (skip), и его генератор
+        self._stamp = [0] * tiers
+        self._rng = None
+
+        self._cfg = None
+        self._reference = None
+        self._skip_constants = None
+
+    def _prices(self, cfg):
+        """
+        опорные цены уровней (пересчёт только при смене таблиц)
+        """
+
+        if cfg is not self._cfg:
+            self._load(cfg)
+
+        return self._reference
+
+    def _constants(self, cfg):
+        """
+        (1 - reversion, impact, дисперсия хода, floor, cap)
+        """
+
+        if cfg is not self._cfg:
+            self._load(cfg)
+
+        return self._skip_constants
+
+    def _load(self, cfg):
+        reversion, impact, volatility, floor, cap = _params(cfg)
+        spread = cfg["price_index"]["rival_flow"]
+
+        # дисперсия одного хода: толчок и спрос соперников
+        var = volatility ** 2 / 3 + impact ** 2 * ((2 * spread + 1) ** 2 - 1) / 12
+
+        self._cfg = cfg
+        self._reference = reference_prices(cfg)
+        self._skip_constants = (1.0 - reversion, impact, var, floor, cap)
+
+    # ХОД
+    def record(self, tier, qty, cfg=None):
+        """
+        учитывает сделку: qty > 0 — покупка, qty < 0 — продажа
+        """
+
+        if self._stamp[tier] != self.turns:
+            self._catch_up(tier, cfg if cfg is not None else get_balance()["branch2"])
+
+        self.flow[tier] += qty
+
+    def step(self, rng, cfg=None, flows=None):
+        """
+        один ход рынка: спрос хода (и flows, если задан) сдвигает
+        индекс, затем спрос обнуляется
+        """
+
+        if cfg is None:
+            cfg = get_balance()["branch2"]
+
+        self.sync(cfg)
+
+        flow = self.flow
+
+        if flows is not None:
+            flow = [a + b for a, b in zip(flow, flows)]
+
+        shocks = [rng.random() * 2 - 1 for _ in self.levels]
+
+        self.levels = advance(self.levels, flow, shocks, _params(cfg))
+        self.flow = [0] * len(self.levels)
+        self.turns += 1
+        self._stamp = [self.turns] * len(self.levels)
+
+    def skip(self, turns, rng, cfg=None):
+        """
+        turns ходов рынка без спроса игрока (безголовые прогоны)
+
+        сдвиг ленивый и стоит O(1): уровень догоняет пропущенные
+        ходы одним шагом, только когда его читают (_catch_up)
+        """
+
+        if turns > 0:
+            self.turns += turns
+            self._rng = rng
+
+    def _catch_up(self, tier, cfg):
+        """
+        догоняет уровень до текущего хода за один шаг
+
+        возврат к среднему считается точно, спрос уровня действует
+        в первый пропущенный ход; толчки и случайный спрос
+        соперников (rival_flow) за все ходы заменяются одним
+        равномерным толчком той же дисперсии, границы — в конце
+        """
+
+        turns = self.turns - self._stamp[tier]
+
+        if not turns:
+            return
+
+        keep, impact, var, floor, cap = self._constants(cfg)
+
+        if keep < 1.0:
+            var *= (1.0 - keep ** (2 * turns)) / (1.0 - keep ** 2)
+        else:
+            var *= turns
+
+        x = (
+            1.0 + keep ** turns * (self.levels[tier] - 1.0)
+            + keep ** (turns - 1) * impact * self.flow[tier]
+            + (3 * var) ** 0.5 * (self._rng.random() * 2 - 1)
+        )
+
+        self.levels[tier] = min(cap, max(floor, x))
+        self.flow[tier] = 0
+        self._stamp[tier] = self.turns
+
+    def sync(self, cfg=None):
+        """
+        догоняет все уровни (перед step и сохранением)
+        """
+
+        if cfg is None:
+            cfg = get_balance()["branch2"]
+
+        for tier in range(len(self.levels)):
+            self._catch_up(tier, cfg)
+
+    # ЧТЕНИЕ
+    def price(self, tier, cfg=None):
+        """
+        цена машины уровня по индексу
+        """
+
+        if cfg is None:
+            cfg = get_balance()["branch2"]
+
+        self._catch_up(tier, cfg)
+
+        low, high = cfg["car_price"]
+        price = int(self._prices(cfg)[tier] * self.levels[tier])
+
+        return min(high, max(low, price))
+
+    def profit_range(self, tier, cfg=None):
+        """
+        диапазон прибыли уровня, сдвинутый вслед за ценой
+        """
+
+        if cfg is None:
+            cfg = get_balance()["branch2"]
+
+        self._catch_up(tier, cfg)
+
+        low, high = cfg["profit_ranges"][tier]
+
+        shift = int(
+            (self.levels[tier] - 1.0) * self._prices(cfg)[tier]
+            * cfg["price_index"]["profit_weight"]
+        )
+
+        return low + shift, high + shift
+
+    def freeze_chance(self, tier, cfg=None):
+        """
+        шанс заморозки: горячий рынок (индекс > 1) — ниже
+        """
+
+        if cfg is None:
+            cfg = get_balance()["branch2"]
+
+        self._catch_up(tier, cfg)
+
+        base = cfg["freeze_chance"][tier]
+        factor = 1.0 - (self.levels[tier] - 1.0) * cfg["price_index"]["chance_elasticity"]
+
+        return min(1.0, max(0.0, base * factor))
+
+    # СОХРАНЕНИЕ
+    def to_dict(self):
+        return {"v": INDEX_VERSION, "turns": self.turns, "levels": self.levels}
+
+    @classmethod
+    def from_dict(cls, data, cfg=None):
+        """
+        raises:
+            ValueError — другая версия или другое число уровней
+        """
+
+        index = cls(cfg, data["levels"])
+
+        if data.get("v") != INDEX_VERSION or len(index.levels) != len(index.flow):
+            raise ValueError("индекс не подходит к таблицам баланса")
+
+        index.turns = data["turns"]
+        index._stamp = [index.turns] * len(index.levels)
+
+        return index
+
+    def save(self, path=INDEX_FILE):
+        self.sync()
+        ensure_storage_dir()
+
+        tmp_path = path + ".tmp"
+
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=4)
+
+        os.replace(tmp_path, path)
+
+
+def simulate_paths(turns, paths, seed=1, cfg=None):
+    """
+    независимые прогоны индекса (спрос соперников — случайный
+    в пределах rival_flow)
+
+    returns:
+        list — значения индекса по уровням в конце каждого прогона
+    """
+
+    if cfg is None:
+        cfg = get_balance()["branch2"]
+
+    params = _params(cfg)
+    spread = cfg["price_index"]["rival_flow"]
+    tiers = len(cfg["quality_names"])
+
+    if np is not None:
+        rng = np.random.default_rng(seed)
+        levels = np.ones((paths, tiers))
+
+        for _ in range(turns):
+            flows = rng.integers(-spread, spread + 1, size=(paths, tiers))
+            shocks = rng.random((paths, tiers)) * 2 - 1
+
+            levels = advance(levels, flows, shocks, params)
+
+        return levels.tolist()
+
+    import random
+
+    # без NumPy: все прогоны одним плоским списком «прогоны × уровни»
+    rng = random.Random(seed).random
+
+    size = paths * tiers
+    width = 2 * spread + 1
+
+    levels = [1.0] * size
+
+    for _ in range(turns):
+        flows = [int(rng() * width) - spread for _ in range(size)]
+        shocks = [rng() * 2 - 1 for _ in range(size)]
+
+        levels = advance(levels, flows, shocks, params)
+
+    return [levels[i:i + tiers] for i in range(0, size, tiers)]
+
+
+def get_market_index():
+    """
+    индекс интерактивной игры: при первом вызове читается
+    из storage/market_index.json, при выходе — сохраняется
+    """
+
+    global _index
+
+    if _index is not None:
+        return _index
+
+    try:
+        with open(INDEX_FILE, "r", encoding="utf-8") as f:
+            _index = MarketIndex.from_dict(json.load(f))
+
+    except FileNotFoundError:
+        _index = MarketIndex()
+
+    except (ValueError, KeyError, TypeError):
+        print("\n[рынок] файл ценового индекса повреждён — индекс начат заново")
+        _index = MarketIndex()
+
+    import atexit
+    atexit.register(_index.save)
+
+    return _index
+
+
+def benchmark(turns=3650, paths=200, seed=1):
+    """
+    годы ходов рынка на многих прогонах
+    """
+
+    import time
+
+    cfg = get_balance()["branch2"]
+
+    start = time.perf_counter()
+    result = simulate_paths(turns, paths, seed, cfg)
+    elapsed = time.perf_counter() - start
+
+    steps = turns * paths * len(cfg["quality_names"])
+
+    print(f"ценовой индекс ветки 2 ({'NumPy' if np is not None else 'списки'})")
+    print(f"  прогонов: {paths} × {turns} ходов")
+    print(f"  время:    {elapsed:.2f} с "
+          f"({steps / elapsed:,.0f} шагов уровня в секунду)".replace(",", " "))
+
+    for tier in range(len(cfg["quality_names"])):
+        values = sorted(levels[tier] for levels in result)
+
+        print(f"  уровень {tier}: медиана {values[len(values) // 2]:.3f}, "
+              f"от {values[0]:.3f} до {values[-1]:.3f}")
+
+
+if __name__ == "__main__":
+    import sys
+
+    benchmark(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 3650,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    )
@@ -0,0 +1,328 @@
+"""
+модуль метрик: счётчики и таймеры горячих функций
+
+идея:
+    - функции игры помечаются декоратором @timed("имя")
+    - флаг проверяется один раз — при объявлении функции:
+      если метрики выключены, декоратор возвращает саму функцию,
+      и горячий путь не платит даже за лишний вызов обёртки
+    - при включённых метриках длительность каждого вызова
+      попадает в гистограмму в стиле HDR: логарифмические
+      интервалы по степеням двойки, каждый поделён на
+      SUB_BUCKETS равных частей (погрешность ~3 %), поэтому
+      память не зависит от числа вызовов
+    - count("имя") — простой именованный счётчик
+
+включение (решается при импорте модуля, до импорта веток):
+    python main.py --metrics              — собирать метрики
+    python main.py --metrics-port 9100    — плюс JSON по HTTP
+                                            (GET /metrics)
+    --metrics-host 0.0.0.0                — выгрузка доступна снаружи
+                                            (по умолчанию 127.0.0.1)
+    переменная окружения ITZ_METRICS=1    — то же, что --metrics
+    enable() — для своих скриптов, до импорта модулей игры
+
+отчёт:
+    - в меню выбора ветки: «м» — таблица метрик
+    - при выходе метрики пишутся в storage/metrics.json
+    - python metrics.py [файл] — таблица по выгруженному файлу
+
+функции модуля:
+    enable / is_enabled — включение сбора
+    timed               — декоратор таймера
+    count               — увеличить счётчик
+    snapshot            — все метрики одним словарём (JSON)
+    report              — вывести таблицу
+    export_json         — записать снимок в файл
+    serve_metrics       — HTTP-выгрузка снимка
+"""
+
+
+import atexit
+import functools
+import json
+import os
+import sys
+import time
+
+
+# интервалов на каждую степень двойки (2 ** SUB_BITS)
+SUB_BITS = 5
+SUB_BUCKETS = 1 << SUB_BITS
+
+METRICS_FILE = os.path.join("storage", "metrics.json")
+
+# перцентили в отчёте и выгрузке
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+_enabled = False
+_started = time.time()
+
+_timers = {}
+_counters = {}
+
+
+# ГИСТОГРАММА
+def bucket_index(value):
+    """
+    номер интервала гистограммы для значения (нс)
+    """
+
+    if value < 2 * SUB_BUCKETS:
+        return value
+
+    shift = value.bit_length() - SUB_BITS - 1
+
+    return (shift << SUB_BITS) + (value >> shift)
+
+
+def bucket_low(index):
+    """
+    нижняя граница интервала
+    """
+
+    if index < 2 * SUB_BUCKETS:
+        return index
+
+    shift = (index >> SUB_BITS) - 1
+
+    return (index - (shift << SUB_BITS)) << shift
+
+
+class Histogram:
+    """
+    гистограмма задержек
+
+    поля:
+        counts — {номер интервала: число значений}
+        count / total / min / max
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def record(self, value):
+        index = bucket_index(value)
+
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+
+        if self.min is None or value < self.min:
+            self.min = value
+
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, p):
+        """
+        значение, не превышенное p процентами вызовов
+        (верхняя граница интервала, не больше max)
+        """
+
+        if not self.count:
+            return 0
+
+        rank = p / 100 * self.count
+        seen = 0
+
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+
+            if seen >= rank:
+                return min(bucket_low(index + 1) - 1, self.max)
+
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total_ns": self.total,
+            "min_ns": self.min or 0,
+            "max_ns": self.max,
+            "mean_ns": self.total / self.count if self.count else 0,
+            "percentiles_ns": {str(p): self.percentile(p) for p in PERCENTILES},
+            "buckets": [
+                [bucket_low(index), self.counts[index]]
+                for index in sorted(self.counts)
+            ]
+        }
+
+
+# СБОР
+def enable(export_file=METRICS_FILE):
+    """
+    включает сбор метрик; при выходе снимок пишется в export_file
+    """
+
+    global _enabled
+
+    if _enabled:
+        return
+
+    _enabled = True
+
+    if export_file:
+        atexit.register(export_json, export_file)
+
+
+def is_enabled():
+    return _enabled
+
+
+def timed(name):
+    """
+    декоратор: длительность вызовов функции → гистограмма name
+    (при выключенных метриках функция не оборачивается)
+    """
+
+    def decorate(func):
+        if not _enabled:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter_ns()
+
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram = _timers.get(name)
+
+                if histogram is None:
+                    histogram = _timers[name] = Histogram()
+
+                histogram.record(time.perf_counter_ns() - start)
+
+        return wrapper
+
+    return decorate
+
+
+def count(name, amount=1):
+    """
+    увеличивает именованный счётчик
+    """
+
+    if _enabled:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+# ВЫГРУЗКА
+def snapshot():
+    """
+    returns:
+        dict — все таймеры и счётчики (готово для JSON)
+    """
+
+    return {
+        "enabled": _enabled,
+        "pid": os.getpid(),
+        "uptime_s": round(time.time() - _started, 3),
+        "timers": {name: h.to_dict() for name, h in sorted(_timers.items())},
+        "counters": dict(sorted(_counters.items()))
+    }
+
+
+def export_json(path=METRICS_FILE):
+    """
+    атомарно записывает снимок метрик в файл
+    """
+
+    directory = os.path.dirname(path)
+
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = path + ".tmp"
+
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f, ensure_ascii=False, indent=4)
+
+    os.replace(tmp_path, path)
+
+
+def serve_metrics(port, host="127.0.0.1"):
+    """
+    отдаёт снимок метрик по HTTP (GET /metrics) в фоновом потоке
+
+    parameters:
+        host — адрес, на котором слушать (127.0.0.1 — только
+               эта машина; 0.0.0.0 — для сборщика метрик снаружи)
+    """
+
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+
+            body = json.dumps(snapshot(), ensure_ascii=False).encode("utf-8")
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server
+
+
+def report(data=None):
+    """
+    печатает таблицу метрик (текущих или выгруженных snapshot)
+    """
+
+    if data is None:
+        data = snapshot()
+
+    timers = data["timers"]
+
+    if not timers and not data["counters"]:
+        print("\nметрики пусты (сбор включается флагом --metrics)")
+        return
+
+    print(f"\n{'таймер':<38} {'вызовов':>8} {'сред.':>9} "
+          + " ".join(f"{'p' + str(p):>9}" for p in PERCENTILES)
+          + f" {'max':>9}   (мкс)")
+
+    for name, t in timers.items():
+        values = [t["mean_ns"]] + [t["percentiles_ns"][str(p)] for p in PERCENTILES]
+        values.append(t["max_ns"])
+
+        print(f"{name:<38} {t['count']:>8} "
+              + " ".join(f"{v / 1000:>9.1f}" for v in values))
+
+    if data["counters"]:
+        print("\nсчётчики:")
+
+        for name, value in data["counters"].items():
+            print(f"  {name}: {value}")
+
+
+if (os.environ.get("ITZ_METRICS") == "1"
+        or "--metrics" in sys.argv or "--metrics-port" in sys.argv):
+    enable()
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else METRICS_FILE
+
+    with open(path, "r", encoding="utf-8") as f:
+        report(json.load(f))
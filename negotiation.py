@@ -0,0 +1,345 @@
+"""
+многораундовый торг ветки 1 и решатель дерева игры
+
+торг:
+    - исход встречи (outcome_matrix) задаёт диапазон суммы
+      (outcome_values); в каком месте диапазона окажется
+      итог — решает торг
+    - предложение — уровень k от 0 до levels - 1: доля
+      диапазона в пользу игрока (0 — нижняя граница,
+      худшая для игрока, levels - 1 — верхняя)
+    - раунды чередуются: первым предлагает соперник, затем
+      игрок и так далее, всего не больше rounds раундов;
+      ответ — принять или отказаться со встречным предложением
+    - уступки только в одну сторону: соперник не предлагает
+      меньше, чем уже предлагал, игрок не просит больше,
+      чем уже просил
+    - после каждого отказа соперник уходит с шансом
+      walk_chance своего стиля; срыв торга (уход или отказ
+      в последнем раунде) стоит игроку min(0, нижняя граница):
+      прибыльная сделка не состоится, убыточная обойдётся
+      по худшей сумме
+    - терпение (patience) — множитель выигрыша за каждый
+      следующий раунд: у игрока — player_patience, у соперника —
+      своё у каждого стиля
+
+решатель (Negotiation):
+    - обратная индукция по дереву игры; узел — (раунд,
+      кто предлагает, последнее предложение игрока,
+      последнее предложение соперника)
+    - узел не зависит от пути, которым к нему пришли, поэтому
+      значения хранятся в таблице транспозиций: каждый узел
+      считается один раз, сколько бы путей к нему ни вело
+    - результат — совершенное по подыграм равновесие: в каждом
+      узле известно лучшее предложение и ответ на любое
+      предложение для обеих сторон
+    - выигрыши нормированы: срыв — 0 для обоих, соперник
+      получает долю 1 - k / (levels - 1), игрок — сумму сверх
+      стоимости срыва, делённую на наибольшую
+    - решённые игры кэшируются по параметрам (get_negotiation),
+      поэтому правка balance.json даёт новое решение, а повторная
+      встреча с тем же исходом и стилем решения не требует
+
+соперник в игре:
+    принимает предложение игрока, если оно не хуже его
+    продолжения торга, иначе отвечает предложением из решения;
+    стиль меняет терпение и склонность уходить
+
+запуск замера:
+    python negotiation.py [раундов] [уровней]
+
+функции и классы:
+    Negotiation      — дерево торга и его решение
+    play_equilibrium — торг по решению за обе стороны
+    get_negotiation  — решённая игра для исхода и стиля (кэш)
+"""
+
+
+from balance import get_balance
+
+
+# кто предлагает в узле (и индекс выигрыша в паре значений)
+PLAYER, RIVAL = 0, 1
+
+# решённых игр в кэше (при переполнении кэш очищается)
+MAX_SOLVED = 256
+
+
+_solved = {}
+
+
+class Negotiation:
+    """
+    дерево торга за диапазон [low, high]
+
+    поля:
+        low / high  — границы суммы исхода
+        rounds      — наибольшее число раундов
+        levels      — число уровней предложения
+        breakdown   — сумма для игрока при срыве торга
+        walk_chance — шанс ухода соперника после отказа
+        hits        — попадания в таблицу транспозиций
+    """
+
+    def __init__(self, low, high, rounds, levels,
+                 player_patience, rival_patience, walk_chance):
+        self.low = low
+        self.high = high
+        self.rounds = rounds
+        self.levels = levels
+        self.walk_chance = walk_chance
+
+        self.top = levels - 1
+        self.breakdown = min(0, low)
+
+        span = (high - self.breakdown) or 1
+
+        self._value = (
+            tuple((self.amount(k) - self.breakdown) / span for k in range(levels)),
+            tuple(1 - k / self.top for k in range(levels))
+        )
+
+        self._patience = (player_patience, rival_patience)
+
+        self._table = {}
+        self.hits = 0
+
+    def __len__(self):
+        return len(self._table)
+
+    def amount(self, k):
+        """
+        сумма для игрока при согласии на уровне k
+        """
+
+        return self.low + (self.high - self.low) * k // self.top
+
+    def root(self):
+        """
+        узел начала торга: предлагает соперник
+        """
+
+        return 0, RIVAL, self.top, 0
+
+    def solve(self):
+        """
+        решает всю игру от начала торга
+
+        returns:
+            tuple — ожидаемые выигрыши (игрок, соперник)
+        """
+
+        return self._solve(self.root())[0]
+
+    # ДЕРЕВО
+    def _next(self, node, k):
+        """
+        узел после отказа от предложения k (None — торг окончен)
+        """
+
+        r, side, kp, kr = node
+
+        if r + 1 >= self.rounds:
+            return None
+
+        if side == RIVAL:
+            return r + 1, PLAYER, kp, k
+
+        return r + 1, RIVAL, k, kr
+
+    def _reject(self, node, k):
+        """
+        ожидаемые выигрыши после отказа от предложения k
+        """
+
+        following = self._next(node, k)
+
+        if following is None:
+            return 0.0, 0.0
+
+        stay = 1 - self.walk_chance
+        player, rival = self._solve(following)[0]
+
+        return (
+            stay * self._patience[PLAYER] * player,
+            stay * self._patience[RIVAL] * rival
+        )
+
+    def _solve(self, node):
+        """
+        returns:
+            tuple (выигрыши (игрок, соперник), лучшее предложение)
+        """
+
+        entry = self._table.get(node)
+
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        _, side, kp, kr = node
+        other = 1 - side
+
+        # сначала самые выгодные для предлагающего предложения
+        offers = range(kr, kp + 1) if side == RIVAL else range(kp, kr - 1, -1)
+
+        best = None
+        best_offer = None
+
+        for k in offers:
+            accepted = (self._value[PLAYER][k], self._value[RIVAL][k])
+            rejected = self._reject(node, k)
+
+            result = accepted if accepted[other] >= rejected[other] else rejected
+
+            if best is None or result[side] > best[side]:
+                best = result
+                best_offer = k
+
+        entry = (best, best_offer)
+        self._table[node] = entry
+
+        return entry
+
+    # РЕШЕНИЕ
+    def offer(self, node):
+        """
+        лучшее предложение стороны, которая предлагает в узле
+        """
+
+        return self._solve(node)[1]
+
+    def accepts(self, node, k):
+        """
+        выгодно ли отвечающей стороне принять предложение k
+        """
+
+        side = 1 - node[1]
+
+        return self._value[side][k] >= self._reject(node, k)[side]
+
+    def counter(self, node, k):
+        """
+        узел встречного предложения после отказа от k
+        (None — раунды закончились)
+        """
+
+        return self._next(node, k)
+
+
+def play_equilibrium(game, rng):
+    """
+    торг по решению за обе стороны (безголовые партии):
+    уход соперника после отказа — с шансом walk_chance
+
+    returns:
+        int  — итоговая сумма для игрока
+        None — сделка сорвалась без денег
+    """
+
+    node = game.root()
+
+    while node is not None:
+        k = game.offer(node)
+
+        if game.accepts(node, k):
+            return game.amount(k)
+
+        if rng.random() < game.walk_chance:
+            break
+
+        node = game.counter(node, k)
+
+    return game.breakdown or None
+
+
+# КЭШ РЕШЕНИЙ
+def get_negotiation(outcome_code, style, cfg=None):
+    """
+    решённая игра торга для исхода и стиля соперника
+
+    parameters:
+        cfg — раздел branch1 таблиц баланса (None — текущие)
+
+    returns:
+        Negotiation — с заполненной таблицей транспозиций
+    """
+
+    if cfg is None:
+        cfg = get_balance()["branch1"]
+
+    rules = cfg["negotiation"]
+    rival = rules["styles"][style]
+
+    key = (
+        tuple(cfg["outcome_values"][outcome_code]),
+        rules["rounds"],
+        rules["levels"],
+        rules["player_patience"],
+        rival["patience"],
+        rival["walk_chance"]
+    )
+
+    game = _solved.get(key)
+
+    if game is None:
+        if len(_solved) >= MAX_SOLVED:
+            _solved.clear()
+
+        game = Negotiation(*key[0], *key[1:])
+        game.solve()
+
+        _solved[key] = game
+
+    return game
+
+
+def benchmark(rounds=12, levels=101):
+    """
+    решение игр баланса и одной большой игры
+    """
+
+    import time
+
+    cfg = get_balance()["branch1"]
+
+    start = time.perf_counter()
+    states = 0
+
+    for code in cfg["outcome_values"]:
+        for style in cfg["rival_styles"]:
+            states += len(get_negotiation(code, style, cfg))
+
+    elapsed = time.perf_counter() - start
+
+    print("торг ветки 1: решение дерева игры")
+    print(f"  игры баланса: {len(cfg['outcome_values']) * len(cfg['rival_styles'])}, "
+          f"узлов {states}, время {elapsed * 1000:.1f} мс")
+
+    rules = cfg["negotiation"]
+    game = Negotiation(
+        0, 100_000, rounds, levels,
+        rules["player_patience"], rules["styles"][0]["patience"],
+        rules["styles"][0]["walk_chance"]
+    )
+
+    start = time.perf_counter()
+    player, rival = game.solve()
+    elapsed = time.perf_counter() - start
+
+    k = game.offer(game.root())
+
+    print(f"  большая игра: {rounds} раундов × {levels} уровней")
+    print(f"    узлов:       {len(game)} (попаданий в таблицу {game.hits})")
+    print(f"    время:       {elapsed:.2f} с")
+    print(f"    первое предложение: {game.amount(k)} из 100 000, "
+          f"выигрыши {player:.3f} / {rival:.3f}")
+
+
+if __name__ == "__main__":
+    import sys
+
+    benchmark(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 12,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 101
+    )
@@ -6,6 +6,7 @@
     - Rival       — соперник (npc) для всех веток
     - Deal        — долгосрочный проект (ветка 3)
     - Portfolio   — портфель активных проектов
+    - DealStats   — компактная статистика завершённых сделок
 
 в модуле реализуются:
 
@@ -30,6 +31,22 @@
     - продвижение сделки (ветка 2)
     - работу с портфелем проектов (ветка 3)
 
+компактная модель сущностей:
+    - Player, Rival, Deal, Portfolio и DealStats объявлены
+      со __slots__: у объектов нет словаря атрибутов, поэтому
+      на популяциях в миллион соперников и проектов память
+      на объект в разы меньше (замер — bench_entities.py)
+    - Rival(...) создаёт объект класса своего режима:
+      NegotiationRival (1), MarketRival (2), ProjectRival (3);
+      поля рынка (state / profit_range / profit) хранятся
+      только у MarketRival, остальные режимы читают
+      значения по умолчанию из класса
+    - описания стилей соперника — общие неизменяемые
+      объекты RivalStyle (flyweight), а не строки на объект
+    - атрибуты, которые код задаёт после создания
+      (deal.bonus_profit, deal.owner, player.portfolio),
+      объявлены заранее и работают как раньше
+
 портфель Portfolio предоставляет базовые операции:
     - добавление проекта
     - продвижение хода
@@ -38,6 +55,221 @@
 """
 
 
+from collections import deque
+
+
+# сколько последних сделок хранится в кольцевом буфере игрока
+RECENT_DEALS = 20
+
+
+# СТАТИСТИКА СДЕЛОК
+class DealStats:
+    """
+    накопитель статистики завершённых сделок
+
+    хранит только агрегаты, поэтому память не растёт
+    с количеством сыгранных сделок (обновление за O(1))
+
+    поля:
+        count — число сделок
+        total — суммарный результат
+        min_amount / max_amount — худшая и лучшая сделка
+        mean — средний результат (алгоритм Уэлфорда)
+        wins / losses — прибыльные и убыточные сделки
+
+    опционально:
+        recent — кольцевой буфер последних recent_size сделок
+        by_branch — отдельная статистика по номерам веток
+
+    совместимость со старым списком completed_deals:
+        len(stats)          — число сделок
+        stats.append(value) — учесть сделку
+
+    слияние:
+        stats.merge(other)  — добавить статистику другого накопителя
+    """
+
+    __slots__ = (
+        "count", "total", "min_amount", "max_amount",
+        "mean", "_m2", "wins", "losses", "recent", "by_branch"
+    )
+
+    def __init__(self, recent_size=0, track_branches=False):
+        self.count = 0
+        self.total = 0
+        self.min_amount = None
+        self.max_amount = None
+
+        self.mean = 0.0
+        self._m2 = 0.0
+
+        self.wins = 0
+        self.losses = 0
+
+        self.recent = deque(maxlen=recent_size) if recent_size else None
+        self.by_branch = {} if track_branches else None
+
+    def record(self, amount, branch=None):
+        """
+        учитывает результат одной сделки
+
+        parameters:
+            amount — прибыль (> 0) или убыток (< 0)
+            branch — номер ветки для разбивки (необязательно)
+        """
+
+        self.count += 1
+        self.total += amount
+
+        if self.min_amount is None or amount < self.min_amount:
+            self.min_amount = amount
+
+        if self.max_amount is None or amount > self.max_amount:
+            self.max_amount = amount
+
+        # Уэлфорд: среднее и сумма квадратов отклонений за один проход
+        delta = amount - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (amount - self.mean)
+
+        if amount > 0:
+            self.wins += 1
+        elif amount < 0:
+            self.losses += 1
+
+        if self.recent is not None:
+            self.recent.append(amount)
+
+        if self.by_branch is not None and branch is not None:
+            if branch not in self.by_branch:
+                self.by_branch[branch] = DealStats()
+            self.by_branch[branch].record(amount)
+
+    def append(self, amount):
+        """
+        совместимая замена list.append
+        """
+        self.record(amount)
+
+    def merge(self, other):
+        """
+        добавляет статистику other (например, другой партии
+        или пачки симуляций) — как если бы её сделки были
+        записаны сюда после своих
+
+        среднее и дисперсия сливаются формулой Чана для
+        алгоритма Уэлфорда, без самих сделок
+        """
+
+        if not other.count:
+            return self
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+
+        self.mean += delta * other.count / count
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.total += other.total
+
+        if self.min_amount is None or other.min_amount < self.min_amount:
+            self.min_amount = other.min_amount
+
+        if self.max_amount is None or other.max_amount > self.max_amount:
+            self.max_amount = other.max_amount
+
+        self.wins += other.wins
+        self.losses += other.losses
+
+        if self.recent is not None and other.recent is not None:
+            self.recent.extend(other.recent)
+
+        if self.by_branch is not None and other.by_branch is not None:
+            for branch, stats in other.by_branch.items():
+                self.by_branch.setdefault(branch, DealStats()).merge(stats)
+
+        return self
+
+    def variance(self):
+        """
+        выборочная дисперсия результатов сделок
+        """
+
+        if self.count < 2:
+            return 0.0
+
+        return self._m2 / (self.count - 1)
+
+    def stdev(self):
+        return self.variance() ** 0.5
+
+    def win_rate(self):
+        if self.count == 0:
+            return 0.0
+
+        return self.wins / self.count
+
+    def to_dict(self):
+        """
+        компактное представление для снимков состояния
+        """
+
+        data = {
+            "count": self.count,
+            "total": self.total,
+            "min": self.min_amount,
+            "max": self.max_amount,
+            "mean": self.mean,
+            "m2": self._m2,
+            "wins": self.wins,
+            "losses": self.losses
+        }
+
+        if self.recent is not None:
+            data["recent_size"] = self.recent.maxlen
+            data["recent"] = list(self.recent)
+
+        if self.by_branch is not None:
+            data["by_branch"] = {
+                str(branch): stats.to_dict()
+                for branch, stats in self.by_branch.items()
+            }
+
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        восстанавливает статистику из to_dict()
+        """
+
+        stats = cls(
+            recent_size=data.get("recent_size", 0),
+            track_branches="by_branch" in data
+        )
+
+        stats.count = data["count"]
+        stats.total = data["total"]
+        stats.min_amount = data["min"]
+        stats.max_amount = data["max"]
+        stats.mean = data["mean"]
+        stats._m2 = data["m2"]
+        stats.wins = data["wins"]
+        stats.losses = data["losses"]
+
+        if stats.recent is not None:
+            stats.recent.extend(data.get("recent", []))
+
+        if stats.by_branch is not None:
+            for branch, sub in data["by_branch"].items():
+                stats.by_branch[int(branch)] = cls.from_dict(sub)
+
+        return stats
+
+    def __len__(self):
+        return self.count
+
+
 # ОСНОВНОЙ ИГРОК
 class Player:
     """
@@ -53,8 +285,15 @@ class Player:
         2 — перекуп рынка (ветка 2)
         3 — проект-мейкер / механик (ветка 3)
         0 — npc / соперник
+
+    portfolio — портфель проектов (ветка 3, attach_portfolio)
     """
 
+    __slots__ = (
+        "name", "budget", "role", "is_bankrupt", "win_target",
+        "completed_deals", "artifacts", "portfolio"
+    )
+
     def __init__(self, name, budget=0, role=1):
         self.name = name
         self.budget = budget
@@ -63,9 +302,18 @@ class Player:
         self.is_bankrupt = False
         self.win_target = None
 
-        self.completed_deals = []
+        self.completed_deals = self._new_stats()
         self.artifacts = []
 
+        self.portfolio = None
+
+    @staticmethod
+    def _new_stats():
+        return DealStats(
+            recent_size=RECENT_DEALS,
+            track_branches=True
+        )
+
     # финансы
 
     def change_budget(self, amount):
@@ -110,6 +358,32 @@ class Player:
         return False
 
 
+# СТИЛИ СОПЕРНИКА
+class RivalStyle:
+    """
+    общие данные стиля соперника (один объект на стиль)
+
+    поля:
+        style    — номер стиля
+        behavior — описание поведения (describe_behavior)
+    """
+
+    __slots__ = ("style", "behavior")
+
+    def __init__(self, style, behavior):
+        self.style = style
+        self.behavior = behavior
+
+
+RIVAL_STYLES = {
+    0: RivalStyle(0, "спокойный переговорщик"),
+    1: RivalStyle(1, "хитрый и мутный торгаш"),
+    2: RivalStyle(2, "жёсткий давящий перекуп")
+}
+
+UNKNOWN_STYLE = RivalStyle(None, "неизвестный тип поведения")
+
+
 # СОПЕРНИК (NPC)
 class Rival(Player):
     """
@@ -120,6 +394,9 @@ class Rival(Player):
         mode = 2 — рынок сделок (ветка 2)
         mode = 3 — долгие проекты (ветка 3)
 
+    Rival(...) возвращает объект класса режима
+    (NegotiationRival / MarketRival / ProjectRival)
+
     style:
         0 — спокойный
         1 — хитрый
@@ -131,34 +408,47 @@ class Rival(Player):
         profit — итог сделки (mode 2)
 
         portfolio — набор активных проектов (mode 3)
+
+    статистика сделок соперника — без буфера последних
+    сделок и разбивки по веткам, артефактов у соперника нет
     """
 
+    __slots__ = ("style", "mode")
+
+    # поля рынка для режимов 1 и 3 (только чтение)
+    state = 0
+    profit_range = None
+    profit = 0
+
+    def __new__(cls, name=None, style=0, mode=1, *args, **kwargs):
+        if cls is Rival:
+            cls = RIVAL_CLASSES.get(mode, Rival)
+
+        return super().__new__(cls)
+
     def __init__(self, name, style, mode, budget=0, profit_range=None):
         super().__init__(name=name, budget=budget, role=0)
 
         self.style = style
         self.mode = mode
 
-        # рынок / сделки (ветка 2)
-        self.state = 0
-        self.profit_range = profit_range
-        self.profit = 0
+        self.artifacts = ()
 
-        # проекты (ветка 3)
-        self.portfolio = None
+    @staticmethod
+    def _new_stats():
+        return DealStats()
 
-        if self.mode == 2 and self.profit_range:
-            print("диапазон прибыли:", self.profit_range)
+    @property
+    def style_info(self):
+        """
+        общий объект RivalStyle стиля соперника
+        """
+        return RIVAL_STYLES.get(self.style, UNKNOWN_STYLE)
 
     # ветка 1
 
     def describe_behavior(self):
-        styles = {
-            0: "спокойный переговорщик",
-            1: "хитрый и мутный торгаш",
-            2: "жёсткий давящий перекуп"
-        }
-        return styles.get(self.style, "неизвестный тип поведения")
+        return self.style_info.behavior
 
     # ветка 2
 
@@ -234,6 +524,47 @@ class Rival(Player):
         print("[соперник] проекты продвинулись на ход")
 
 
+class NegotiationRival(Rival):
+    """
+    соперник ветки 1 (переговоры)
+    """
+
+    __slots__ = ()
+
+
+class MarketRival(Rival):
+    """
+    соперник ветки 2 (рынок): стадия, диапазон и итог сделки
+    """
+
+    __slots__ = ("state", "profit_range", "profit")
+
+    def __init__(self, name, style, mode=2, budget=0, profit_range=None):
+        super().__init__(name, style, mode, budget)
+
+        self.state = 0
+        self.profit_range = profit_range
+        self.profit = 0
+
+        if self.profit_range:
+            print("диапазон прибыли:", self.profit_range)
+
+
+class ProjectRival(Rival):
+    """
+    соперник ветки 3 (проекты): портфель — поле Player
+    """
+
+    __slots__ = ()
+
+
+RIVAL_CLASSES = {
+    1: NegotiationRival,
+    2: MarketRival,
+    3: ProjectRival
+}
+
+
 # СДЕЛКИ / ПРОЕКТЫ (Ветка 3)
 class Deal:
     """
@@ -245,14 +576,21 @@ class Deal:
         freeze_turns — длительность работ
 
         passed — сколько ходов прошло
+        bonus_profit — бонус / штраф события проекта
+        owner — владелец (Player / Rival)
     """
 
+    __slots__ = ("type", "buy_price", "freeze_turns", "passed", "bonus_profit", "owner")
+
     def __init__(self, deal_type, buy_price, freeze_turns):
         self.type = deal_type
         self.buy_price = buy_price
         self.freeze_turns = freeze_turns
         self.passed = 0
 
+        self.bonus_profit = 0
+        self.owner = None
+
     def advance(self):
         self.passed += 1
 
@@ -265,6 +603,8 @@ class Portfolio:
     портфель активных проектов игрока / соперника
     """
 
+    __slots__ = ("deals",)
+
     def __init__(self):
         self.deals = []
 
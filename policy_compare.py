@@ -0,0 +1,375 @@
+"""
+сравнение двух стратегий безголовыми партиями с уменьшением дисперсии
+
+зачем:
+    разница стратегий веток 2 и 3 тонет в шуме отдельных партий:
+    при независимых партиях значимость появляется только после
+    огромных прогонов; здесь та же точность достигается
+    на порядок меньшим числом партий
+
+приёмы:
+    - общие случайные числа (CRN): обе стратегии играют с одним
+      зерном на random_pool.RandomStreams — объявления, броски
+      заморозки, события roll_event и прибыль каждая стратегия
+      берёт из своего потока назначения, поэтому шум у пары
+      партий общий и в разности сокращается
+    - антитетические пары: каждое зерно играется ещё раз
+      зеркально (RandomStreams(antithetic=True)) — удачная
+      партия получает «неудачного двойника», выборка —
+      среднее пары
+    - контрольная величина: GameResult.control — отклонение
+      выпавшей прибыли сделок от её среднего по таблицам
+      (середина диапазонов calc_profit / project_types), её
+      ожидание — ноль; из разности вычитается β · control,
+      β — по выборке (регрессия разности на control)
+
+остановка:
+    партии идут пачками в пуле процессов (simulation.get_pool);
+    после каждой волны пачек считается доверительный интервал
+    разности, прогон останавливается, когда ширина интервала
+    не больше заданной (или исчерпан предел пар)
+
+запуск:
+    python policy_compare.py --branch 2 --a affordable --b all --metric budget --width 2000
+    python policy_compare.py --branch 3 --a default --b cautious --no-crn --no-antithetic
+
+    метрики: win (доля побед), budget (итоговый бюджет), turns
+
+функции модуля:
+    run_pairs        — пачка пар партий (выполняется в пуле)
+    Moments          — накопленные моменты выборок (по пачкам)
+    estimate         — разность с интервалом по выборкам
+    compare_policies — прогон до нужной ширины интервала
+"""
+
+
+import math
+import os
+import statistics
+import time
+
+from simulation import POLICIES, SIMULATORS, default_config, get_pool
+
+
+# пар партий в одной задаче пула
+BATCH_PAIRS = 200
+
+# меньше стольких выборок интервал не считается надёжным
+MIN_SAMPLES = 30
+
+# предел выборок по умолчанию
+MAX_SAMPLES = 100_000
+
+# зерно стратегии B без общих случайных чисел — из другого диапазона
+INDEPENDENT_OFFSET = 1 << 31
+
+METRICS = {
+    "win": lambda result: float(result.win),
+    "budget": lambda result: float(result.budget),
+    "turns": lambda result: float(result.turns),
+}
+
+
+def run_pairs(task):
+    """
+    пачка выборок (выполняется в процессе пула)
+
+    parameters:
+        task — (ветка, стратегия A, стратегия B, метрика,
+                первое зерно, число выборок, crn, antithetic)
+
+    returns:
+        list — по выборке: (разность, control разности,
+               значения A, значения B) — значения по партиям
+               выборки (2 партии на стратегию при antithetic)
+    """
+
+    from random_pool import RandomStreams
+
+    branch, policy_a, policy_b, metric, first_seed, count, crn, antithetic = task
+
+    config = default_config()
+    simulate = SIMULATORS[branch]
+    value = METRICS[metric]
+    mirrors = (False, True) if antithetic else (False,)
+
+    argument_a = POLICIES[branch][policy_a]
+    argument_b = POLICIES[branch][policy_b]
+
+    samples = []
+
+    for seed in range(first_seed, first_seed + count):
+        seed_b = seed if crn else seed + INDEPENDENT_OFFSET
+
+        values_a = []
+        values_b = []
+        control = 0.0
+
+        for mirror in mirrors:
+            result_a = simulate(config, RandomStreams(seed, mirror), argument_a)
+            result_b = simulate(config, RandomStreams(seed_b, mirror), argument_b)
+
+            values_a.append(value(result_a))
+            values_b.append(value(result_b))
+            control += result_a.control - result_b.control
+
+        difference = (sum(values_a) - sum(values_b)) / len(mirrors)
+        samples.append((difference, control / len(mirrors), values_a, values_b))
+
+    return samples
+
+
+def _welford(acc, value):
+    # acc — [число, среднее, сумма квадратов отклонений]
+    acc[0] += 1
+    delta = value - acc[1]
+    acc[1] += delta / acc[0]
+    acc[2] += delta * (value - acc[1])
+
+
+class Moments:
+    """
+    накопленные моменты выборок (алгоритм Уэлфорда): разность,
+    control и их совместный момент (для β), значения стратегий
+    по партиям (для оценки без приёмов)
+
+    add() обновляет моменты пачкой за время, пропорциональное
+    пачке, — прогон не пересчитывает все прежние выборки
+    после каждой волны
+    """
+
+    def __init__(self):
+        self.n = 0
+
+        self.mean_d = 0.0
+        self.mean_c = 0.0
+        self.m_dd = 0.0
+        self.m_cc = 0.0
+        self.m_dc = 0.0
+
+        self.values_a = [0, 0.0, 0.0]
+        self.values_b = [0, 0.0, 0.0]
+
+    def add(self, samples):
+        """
+        учитывает выборки run_pairs
+        """
+
+        for difference, control, values_a, values_b in samples:
+            self.n += 1
+
+            delta_d = difference - self.mean_d
+            delta_c = control - self.mean_c
+
+            self.mean_d += delta_d / self.n
+            self.mean_c += delta_c / self.n
+
+            self.m_dd += delta_d * (difference - self.mean_d)
+            self.m_cc += delta_c * (control - self.mean_c)
+            self.m_dc += delta_d * (control - self.mean_c)
+
+            for value in values_a:
+                _welford(self.values_a, value)
+
+            for value in values_b:
+                _welford(self.values_b, value)
+
+    def estimate(self, confidence=0.95, control=True):
+        """
+        разность средних A - B с доверительным интервалом
+
+        returns:
+            dict:
+                difference — оценка разности
+                half_width — полуширина интервала
+                mean_a / mean_b — средние метрики стратегий
+                beta       — коэффициент контрольной величины
+                reduction  — во сколько раз меньше партий нужно, чем
+                             независимым партиям без приёмов
+        """
+
+        n = self.n
+        games, mean_a, m2_a = self.values_a
+        _, mean_b, m2_b = self.values_b
+
+        beta = 0.0
+
+        if control and n > 2 and self.m_cc > 0:
+            beta = self.m_dc / self.m_cc
+
+        z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+
+        if n > 1:
+            # дисперсия d - β·c через накопленные моменты
+            spread = max(0.0, self.m_dd - 2 * beta * self.m_dc + beta * beta * self.m_cc)
+            error = math.sqrt(spread / (n - 1) / n)
+        else:
+            error = math.inf
+
+        # та же точность независимыми партиями: дисперсии складываются
+        if games > 1:
+            naive = math.sqrt((m2_a + m2_b) / (games - 1) / games)
+        else:
+            naive = math.inf
+
+        return {
+            "samples": n,
+            "games": games * 2,
+            "difference": self.mean_d - beta * self.mean_c if n else 0.0,
+            "half_width": z * error,
+            "mean_a": mean_a,
+            "mean_b": mean_b,
+            "beta": beta,
+            "reduction": (naive / error) ** 2 if 0 < error < math.inf and naive < math.inf else 1.0
+        }
+
+
+def estimate(samples, confidence=0.95, control=True):
+    """
+    разность средних A - B с доверительным интервалом
+    по списку выборок (см. Moments.estimate)
+
+    parameters:
+        samples — выборки run_pairs (независимые)
+        control — вычитать контрольную величину
+    """
+
+    moments = Moments()
+    moments.add(samples)
+
+    return moments.estimate(confidence, control)
+
+
+def compare_policies(branch, policy_a, policy_b, metric="budget", width=None,
+                     confidence=0.95, crn=True, antithetic=True, control=True,
+                     max_samples=MAX_SAMPLES, seed=0, batch=BATCH_PAIRS, progress=None):
+    """
+    прогон пар партий, пока интервал не станет уже width
+
+    parameters:
+        width    — целевая ширина интервала (None — до max_samples)
+        progress — функция(dict) после каждой волны пачек
+
+    returns:
+        dict — estimate() по всем выборкам, плюс stopped:
+               "width" (достигнута ширина) или "limit"
+    """
+
+    for policy in (policy_a, policy_b):
+        if policy not in POLICIES[branch]:
+            raise ValueError(f"ветка {branch}: стратегии {', '.join(POLICIES[branch])}")
+
+    if metric not in METRICS:
+        raise ValueError(f"метрики: {', '.join(METRICS)}")
+
+    pool = get_pool()
+    wave = (os.cpu_count() or 1) if pool is not None else 1
+
+    moments = Moments()
+    next_seed = seed
+
+    while True:
+        tasks = []
+
+        for _ in range(wave):
+            count = min(batch, max_samples - moments.n - sum(task[5] for task in tasks))
+
+            if count <= 0:
+                break
+
+            tasks.append((branch, policy_a, policy_b, metric, next_seed, count, crn, antithetic))
+            next_seed += count
+
+        if not tasks:
+            break
+
+        results = pool.map(run_pairs, tasks) if pool is not None and len(tasks) > 1 \
+            else map(run_pairs, tasks)
+
+        for part in results:
+            moments.add(part)
+
+        result = moments.estimate(confidence, control)
+
+        if progress is not None:
+            progress(result)
+
+        if width is not None and moments.n >= MIN_SAMPLES \
+                and 2 * result["half_width"] <= width:
+            result["stopped"] = "width"
+            return result
+
+        if moments.n >= max_samples:
+            break
+
+    result = moments.estimate(confidence, control)
+    result["stopped"] = "limit"
+
+    return result
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="сравнение двух стратегий ветки")
+    parser.add_argument("--branch", type=int, choices=(2, 3), default=2)
+    parser.add_argument("--a", dest="policy_a")
+    parser.add_argument("--b", dest="policy_b")
+    parser.add_argument("--metric", choices=sorted(METRICS), default="budget")
+    parser.add_argument("--width", type=float, help="целевая ширина интервала")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--max", type=int, default=MAX_SAMPLES, help="предел выборок")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-crn", action="store_true")
+    parser.add_argument("--no-antithetic", action="store_true")
+    parser.add_argument("--no-control", action="store_true")
+
+    args = parser.parse_args(argv)
+
+    names = list(POLICIES[args.branch])
+    policy_a = args.policy_a or names[0]
+    policy_b = args.policy_b or names[1]
+
+    def progress(result):
+        print(f"  выборок {result['samples']:>7}: {result['difference']:+.4g} "
+              f"± {result['half_width']:.4g}")
+
+    print(f"ветка {args.branch}: {policy_a} против {policy_b}, метрика {args.metric}")
+    print(f"приёмы: CRN {'нет' if args.no_crn else 'да'}, "
+          f"антитетические пары {'нет' if args.no_antithetic else 'да'}, "
+          f"контрольная величина {'нет' if args.no_control else 'да'}")
+
+    start = time.perf_counter()
+
+    try:
+        result = compare_policies(
+            args.branch, policy_a, policy_b, args.metric, args.width,
+            args.confidence, not args.no_crn, not args.no_antithetic,
+            not args.no_control, args.max, args.seed, progress=progress
+        )
+    except ValueError as error:
+        print("ошибка:", error)
+        return 1
+
+    low = result["difference"] - result["half_width"]
+    high = result["difference"] + result["half_width"]
+
+    print(f"\n{policy_a}: {result['mean_a']:.4g}, {policy_b}: {result['mean_b']:.4g}")
+    print(f"разность {policy_a} - {policy_b}: {result['difference']:+.4g}, "
+          f"{args.confidence:.0%} интервал [{low:.4g}, {high:.4g}]")
+
+    if low > 0 or high < 0:
+        print("разность значима")
+    else:
+        print("разность не отличима от нуля")
+
+    print(f"партий: {result['games']}, время {time.perf_counter() - start:.1f} с, "
+          f"остановка: {'ширина интервала' if result['stopped'] == 'width' else 'предел выборок'}")
+    print(f"β контрольной величины: {result['beta']:.3g}, "
+          f"партий нужно в {result['reduction']:.1f} раза меньше, чем без приёмов")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
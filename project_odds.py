@@ -0,0 +1,253 @@
+"""
+точные распределения исходов проектов ветки 3 (без сэмплирования)
+
+модель проекта (как в branch3_portfolio):
+    - цена покупки   buy    ~ равномерно на [buy_min, buy_max]
+    - длительность   freeze ~ равномерно на [freeze_min, freeze_max]
+    - событие при запуске (roll_event):
+        boost (шанс boost_chance)  — freeze - 1 (не меньше 1),
+                                     бонус ~ [boost_bonus]
+        delay (шанс delay_chance - boost_chance) — freeze + 1,
+                                     бонус ~ -[delay_penalty]
+        иначе — без изменений, бонус 0
+    - прибыль при продаже profit ~ равномерно на [profit_min, profit_max]
+
+результат по типу проекта:
+    turns  — распределение хода завершения {ход: вероятность}
+    profit — распределение чистого итога
+             profit + bonus_profit − buy_price
+
+расчёт:
+    распределение суммы целых равномерных величин — свёртка;
+    свёртка с равномерной величиной считается скользящим окном
+    по префиксным суммам (линейно от длины носителя), счётчики
+    целые, вероятности событий подмешиваются в конце;
+    насыщение рынка соперниками сюда не входит
+
+кэш:
+    результат хранится по отпечатку таблиц баланса (digest)
+    и пересчитывается только после правки balance.json
+
+функции модуля:
+    convolve_uniform   — свёртка счётчиков с равномерной величиной
+    completion_turns   — распределение хода завершения
+    net_profit         — распределение чистого итога (IntDistribution)
+    project_odds       — оба распределения для типа (с кэшем)
+    show_project_odds  — таблица для меню ветки 3
+"""
+
+
+from itertools import accumulate
+
+from balance import get_balance
+
+
+# квантили в таблице меню
+SHOWN_QUANTILES = (0.05, 0.5, 0.95)
+
+
+_cache = {}
+_cache_digest = None
+
+
+def convolve_uniform(counts, low, high):
+    """
+    свёртка счётчиков с равномерной величиной на [low, high]
+
+    parameters:
+        counts — список целых счётчиков (носитель с нуля)
+
+    returns:
+        list — счётчики суммы, носитель сдвинут на low
+    """
+
+    width = high - low + 1
+    prefix = [0] + list(accumulate(counts))
+    size = len(counts)
+
+    return [
+        prefix[min(k + 1, size)] - prefix[max(k + 1 - width, 0)]
+        for k in range(size + width - 1)
+    ]
+
+
+class IntDistribution:
+    """
+    распределение целой величины
+
+    поля:
+        offset — значение, соответствующее probs[0]
+        probs  — вероятности подряд идущих значений
+    """
+
+    def __init__(self, offset, probs):
+        self.offset = offset
+        self.probs = probs
+
+    def mean(self):
+        return sum(p * (self.offset + i) for i, p in enumerate(self.probs))
+
+    def prob_below(self, value):
+        """
+        P(X < value)
+        """
+
+        end = max(0, min(len(self.probs), value - self.offset))
+
+        return sum(self.probs[:end])
+
+    def quantile(self, q):
+        total = 0.0
+
+        for i, p in enumerate(self.probs):
+            total += p
+
+            if total >= q:
+                return self.offset + i
+
+        return self.offset + len(self.probs) - 1
+
+    def support(self):
+        return self.offset, self.offset + len(self.probs) - 1
+
+
+def _event_weights(events):
+    boost = events["boost_chance"]
+    delay = events["delay_chance"] - boost
+
+    return boost, delay, 1.0 - boost - delay
+
+
+def completion_turns(info, events):
+    """
+    распределение хода завершения проекта (ходов после запуска)
+
+    returns:
+        dict {ход: вероятность}
+    """
+
+    boost, delay, plain = _event_weights(events)
+
+    low, high = info["freeze"]
+    share = 1.0 / (high - low + 1)
+
+    turns = {}
+
+    for freeze in range(low, high + 1):
+        for turn, weight in (
+            (max(1, freeze - 1), boost),
+            (freeze + 1, delay),
+            (freeze, plain)
+        ):
+            if weight:
+                turns[turn] = turns.get(turn, 0.0) + share * weight
+
+    return dict(sorted(turns.items()))
+
+
+def net_profit(info, events):
+    """
+    распределение чистого итога проекта
+    profit + bonus_profit − buy_price
+
+    returns:
+        IntDistribution
+    """
+
+    boost, delay, plain = _event_weights(events)
+
+    profit_low, profit_high = info["profit"]
+    buy_low, buy_high = info["buy"]
+
+    # profit − buy: счётчики, носитель с profit_low − buy_high
+    base = convolve_uniform([1] * (profit_high - profit_low + 1), -buy_high, -buy_low)
+    base_offset = profit_low - buy_high
+    base_total = (profit_high - profit_low + 1) * (buy_high - buy_low + 1)
+
+    parts = [(base_offset, base, plain / base_total)]
+
+    if boost:
+        low, high = events["boost_bonus"]
+        parts.append((
+            base_offset + low,
+            convolve_uniform(base, 0, high - low),
+            boost / (base_total * (high - low + 1))
+        ))
+
+    if delay:
+        low, high = events["delay_penalty"]
+        parts.append((
+            base_offset - high,
+            convolve_uniform(base, 0, high - low),
+            delay / (base_total * (high - low + 1))
+        ))
+
+    offset = min(start for start, _, _ in parts)
+    end = max(start + len(counts) for start, counts, _ in parts)
+
+    probs = [0.0] * (end - offset)
+
+    for start, counts, scale in parts:
+        shift = start - offset
+
+        for i, c in enumerate(counts):
+            probs[shift + i] += c * scale
+
+    return IntDistribution(offset, probs)
+
+
+def project_odds(project_type):
+    """
+    распределения хода завершения и чистого итога для типа проекта
+    (кэш сбрасывается при смене версии таблиц баланса)
+
+    returns:
+        dict {"turns": {...}, "profit": IntDistribution}
+    """
+
+    global _cache_digest
+
+    balance = get_balance()
+
+    if balance["digest"] != _cache_digest:
+        _cache.clear()
+        _cache_digest = balance["digest"]
+
+    odds = _cache.get(project_type)
+
+    if odds is None:
+        cfg = balance["branch3"]
+        info = cfg["project_types"][project_type]
+
+        odds = {
+            "turns": completion_turns(info, cfg["events"]),
+            "profit": net_profit(info, cfg["events"])
+        }
+
+        _cache[project_type] = odds
+
+    return odds
+
+
+def show_project_odds():
+    """
+    печатает точные шансы по всем типам проектов
+    """
+
+    types = get_balance()["branch3"]["project_types"]
+
+    print("\n[расчёт] исходы проектов (точно, без учёта насыщения рынка):")
+
+    for project_type, info in types.items():
+        odds = project_odds(project_type)
+        profit = odds["profit"]
+
+        low, mid, high = (profit.quantile(q) for q in SHOWN_QUANTILES)
+
+        print(f"\n{project_type} — {info['name']}")
+        print("  завершение:", ", ".join(
+            f"{turn} ход. — {p * 100:.1f} %" for turn, p in odds["turns"].items()
+        ))
+        print(f"  итог (прибыль + событие − покупка): в среднем {round(profit.mean())}")
+        print(f"  90 % исходов: от {low} до {high}, медиана {mid}")
+        print(f"  шанс выйти в плюс: {max(0.0, 1 - profit.prob_below(1)) * 100:.1f} %")
@@ -0,0 +1,310 @@
+"""
+пул заранее сгенерированных случайных чисел
+
+идея:
+    - каждая сделка веток делает десяток отдельных вызовов
+      random.randint / random.random
+    - вместо этого числа генерируются блоками: для каждого
+      диапазона (low, high), из которого тянет игра
+      (outcome_values, цены и длительности проектов, диапазоны
+      прибыли …), заводится свой поток со своим блоком значений
+    - значения выдаются из блока по одному, при исчерпании блок
+      пополняется; размер блока растёт вдвое от MIN_BLOCK до
+      MAX_BLOCK, поэтому короткие прогоны не генерируют лишнего
+
+детерминизм:
+    поток диапазона зависит только от зерна пула и самого
+    диапазона, а не от того, сколько чисел взяли из других
+    диапазонов; поэтому интерактивная партия и безголовая
+    симуляция с тем же зерном получают одинаковые значения
+    (в пределах одной реализации генератора: с NumPy и без
+    него последовательности различаются)
+
+генератор блоков:
+    NumPy (если установлен) — Generator(PCG64) для целых и
+    равномерных; иначе — random.Random из стандартной библиотеки
+
+интерфейс повторяет random.Random в части, которой пользуется
+игра: randint, random, choice — пул подходит везде, где
+симуляции ждут rng; integers — пачка целых одним вызовом
+(для источников, которые тянут значения пачками)
+
+общие случайные числа (RandomStreams):
+    при сравнении стратегий обе партии должны получить одни
+    и те же объявления, броски заморозки и события проектов;
+    RandomStreams заводит отдельный пул на каждое назначение
+    случайности (stream("listings"), stream("profit") …) —
+    тогда лишний бросок одной стратегии не сдвигает остальные
+    потоки; antithetic=True — зеркальная партия: каждое значение
+    отражено внутри своего диапазона (AntitheticPool)
+
+функции и классы:
+    RandomPool        — пул потоков с пополнением блоками
+    AntitheticPool    — пул с зеркальными значениями
+    RandomStreams     — отдельный пул на каждое назначение
+    get_random_pool   — общий пул интерактивной игры
+    seed_random_pool  — пересоздать общий пул с зерном
+"""
+
+
+import random
+import zlib
+
+from itertools import islice
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# генератор потоков: numpy даёт другие последовательности,
+# чем random, при том же зерне
+BACKEND = "numpy" if np is not None else "random"
+
+# размер блока потока: начальный и максимальный
+MIN_BLOCK = 64
+MAX_BLOCK = 4096
+
+# ключ потока равномерных чисел [0, 1)
+UNIFORM = "u"
+
+# маркер исчерпанного блока
+_EMPTY = object()
+
+
+_default = None
+
+
+def _stream_key(key):
+    """
+    стабильный (между запусками) номер потока
+    """
+    return zlib.crc32(repr(key).encode("ascii"))
+
+
+def _entropy(seed):
+    """
+    зерно → неотрицательные слова энтропии для numpy
+    (SeedSequence принимает целые любой длины — старшие
+    биты не отбрасываются)
+    """
+
+    entropy = []
+    negative = False
+
+    for word in seed if isinstance(seed, tuple) else (seed,):
+        if word < 0:
+            word = ~word
+            negative = True
+
+        entropy.append(word)
+
+    # отрицательное зерно не совпадает с положительным
+    if negative:
+        entropy.append(1)
+
+    return entropy
+
+
+class RandomPool:
+    """
+    пул случайных чисел с отдельным потоком на каждый диапазон
+
+    поля:
+        seed     — зерно пула: целое или кортеж целых
+                   (слова энтропии, как у RandomStreams)
+        backend  — "numpy" или "random"
+    """
+
+    def __init__(self, seed=None, max_block=MAX_BLOCK):
+        if seed is None:
+            seed = random.getrandbits(64)
+
+        self.seed = seed
+        self.max_block = max_block
+        self.backend = BACKEND
+
+        # ключ → [итератор блока, следующий размер блока, генератор]
+        self._streams = {}
+
+    def _generator(self, key):
+        if np is not None:
+            entropy = [*_entropy(self.seed), _stream_key(key)]
+            return np.random.Generator(np.random.PCG64(entropy))
+
+        return random.Random(f"{self.seed}:{key!r}")
+
+    def _fill(self, key, generator, size):
+        if key == UNIFORM:
+            if np is not None:
+                return generator.random(size).tolist()
+            return [generator.random() for _ in range(size)]
+
+        low, high = key
+
+        if np is not None:
+            return generator.integers(low, high + 1, size=size).tolist()
+
+        return generator.choices(range(low, high + 1), k=size)
+
+    def _refill(self, key):
+        stream = self._streams.get(key)
+
+        if stream is None:
+            stream = [iter(()), MIN_BLOCK, self._generator(key)]
+            self._streams[key] = stream
+
+        size = stream[1]
+        block = iter(self._fill(key, stream[2], size))
+
+        stream[0] = block
+        stream[1] = min(size * 2, self.max_block)
+
+        return next(block)
+
+    def _next(self, key):
+        stream = self._streams.get(key)
+
+        if stream is not None:
+            value = next(stream[0], _EMPTY)
+
+            if value is not _EMPTY:
+                return value
+
+        return self._refill(key)
+
+    def randint(self, low, high):
+        """
+        целое из [low, high] (как random.randint)
+        """
+
+        if low > high:
+            raise ValueError(f"пустой диапазон ({low}, {high})")
+
+        return self._next((low, high))
+
+    def integers(self, low, high, size):
+        """
+        size целых из [low, high] одним вызовом — те же значения,
+        что дали бы size вызовов randint
+
+        returns:
+            list
+        """
+
+        if low > high:
+            raise ValueError(f"пустой диапазон ({low}, {high})")
+
+        key = (low, high)
+        stream = self._streams.get(key)
+        values = list(islice(stream[0], size)) if stream is not None else []
+
+        while len(values) < size:
+            values.append(self._refill(key))
+            values.extend(islice(self._streams[key][0], size - len(values)))
+
+        return values
+
+    def random(self):
+        """
+        равномерное число из [0, 1)
+        """
+        return self._next(UNIFORM)
+
+    def choice(self, seq):
+        """
+        случайный элемент последовательности
+        (поток диапазона индексов)
+        """
+        return seq[self.randint(0, len(seq) - 1)]
+
+
+class AntitheticPool(RandomPool):
+    """
+    зеркальный пул: то же зерно, что у RandomPool, но каждое
+    значение отражено — low + high - x для целых, 1 - u для
+    равномерных; партия на паре пулов даёт антитетическую пару
+    """
+
+    def randint(self, low, high):
+        return low + high - RandomPool.randint(self, low, high)
+
+    def integers(self, low, high, size):
+        return [low + high - x for x in RandomPool.integers(self, low, high, size)]
+
+    def random(self):
+        return 1.0 - RandomPool.random(self)
+
+
+class RandomStreams:
+    """
+    отдельный пул на каждое назначение случайности
+    (common random numbers)
+
+    поля:
+        seed       — зерно (у каждого потока своё, производное)
+        antithetic — потоки зеркальные (AntitheticPool)
+
+    сам объект тоже ведёт себя как rng — значения берутся
+    из потока "" (для кода, которому назначение не задано)
+    """
+
+    def __init__(self, seed, antithetic=False):
+        self.seed = seed
+        self.antithetic = antithetic
+
+        self._pools = {}
+
+    def stream(self, name):
+        """
+        пул назначения name (создаётся при первом обращении)
+        """
+
+        pool = self._pools.get(name)
+
+        if pool is None:
+            cls = AntitheticPool if self.antithetic else RandomPool
+            # зерно и номер потока — отдельные слова энтропии
+            pool = self._pools[name] = cls((self.seed, _stream_key(name)))
+
+        return pool
+
+    def randint(self, low, high):
+        return self.stream("").randint(low, high)
+
+    def integers(self, low, high, size):
+        return self.stream("").integers(low, high, size)
+
+    def random(self):
+        return self.stream("").random()
+
+    def choice(self, seq):
+        return self.stream("").choice(seq)
+
+
+def get_random_pool():
+    """
+    общий пул интерактивной игры (создаётся при первом вызове)
+    """
+
+    global _default
+
+    if _default is None:
+        _default = RandomPool()
+
+    return _default
+
+
+def seed_random_pool(seed):
+    """
+    пересоздаёт общий пул с заданным зерном
+    (партия повторяется так же, как безголовая симуляция
+    с тем же зерном)
+    """
+
+    global _default
+
+    _default = RandomPool(seed)
+
+    return _default
@@ -0,0 +1,343 @@
+"""
+режим реального времени для ветки 3 (портфель)
+
+идея:
+    - в обычной ветке соперники ходят только между вызовами input()
+    - здесь время идёт само: цикл asyncio тикает каждые
+      TICK_SECONDS, и на каждом тике свою часть хода делает
+      очередная группа соперников рынка (RivalMarket.step_slice)
+    - за TURN_TICKS тиков ход рынка проходят все соперники —
+      экономика та же, что у пошаговой ветки, а нагрузка
+      размазана по тикам, поэтому задержка тика ограничена
+      даже при сотнях соперников (REALTIME_RIVALS)
+    - ввод игрока читается без блокировки цикла: строки
+      приходят из отдельного потока в asyncio.Queue
+    - ход игрока ограничен по времени: если игрок молчит,
+      по истечении хода он закрывается как «ждать»
+
+команды игрока (можно вводить в любой момент хода):
+    1 <тип>    — начать проект типа 1 / 2 / 3
+    2 <номер>  — продать незавершённый проект
+    3          — завершить ход досрочно (остальные соперники
+                 доигрывают ход сразу)
+    ?          — состояние портфеля
+    --         — выйти из режима
+
+сохранения:
+    режим не ведёт журнал автосохранения — партия
+    реального времени не продолжается после выхода
+
+функции модуля:
+    LineReader     — неблокирующее чтение строк из stdin
+    play_realtime  — точка входа режима (реестр веток, пункт 4)
+"""
+
+
+import asyncio
+import sys
+import threading
+import time
+
+from player import attach_portfolio
+from balance import get_balance
+from metrics import timed
+from event_log import set_context
+from branch3_portfolio import (
+    create_rival,
+    finish_ready_projects,
+    start_project,
+    sell_project
+)
+
+
+# длительность тика и число тиков в ходе
+TICK_SECONDS = 0.5
+TURN_TICKS = 20
+
+# соперников на рынке в режиме реального времени
+REALTIME_RIVALS = 300
+
+
+class LineReader:
+    """
+    чтение строк stdin в отдельном потоке
+
+    поток читает следующую строку только по запросу (request),
+    поэтому после выхода из режима лишних строк не съедает
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue()
+        self.pending = False
+
+        self._want = threading.Event()
+        self._stop = False
+
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        while True:
+            self._want.wait()
+            self._want.clear()
+
+            if self._stop:
+                return
+
+            line = sys.stdin.readline()
+
+            # пустая строка без перевода — конец ввода
+            value = line.rstrip("\n") if line else None
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, value)
+
+    def request(self):
+        if not self.pending:
+            self.pending = True
+            self._want.set()
+
+    async def get(self, timeout):
+        """
+        returns:
+            str — введённая строка
+            None — конец ввода
+        raises:
+            asyncio.TimeoutError — строка не пришла за timeout
+        """
+
+        self.request()
+
+        line = await asyncio.wait_for(self.queue.get(), timeout)
+        self.pending = False
+
+        return line
+
+    def close(self):
+        self._stop = True
+        self._want.set()
+
+
+class RealtimeSession:
+    """
+    партия ветки 3 в реальном времени
+
+    поля:
+        ticks / max_tick_ms — статистика тиков рынка
+    """
+
+    def __init__(self, player, rival, market):
+        self.player = player
+        self.rival = rival
+        self.market = market
+
+        self.turn = 0
+        self.ticks = 0
+        self.max_tick_ms = 0.0
+
+    @timed("realtime.tick")
+    def tick(self, index):
+        """
+        часть хода рынка: соперники группы index
+        """
+
+        start = time.perf_counter()
+
+        size = len(self.market)
+        group = -(-size // TURN_TICKS)
+
+        active = len(self.rival.portfolio.deals)
+
+        self.market.step_slice(index * group, (index + 1) * group)
+
+        # видимый соперник — в первой группе
+        if index == 0:
+            self.market.sync_rival(self.rival)
+
+            if len(self.rival.portfolio.deals) > active:
+                print("\n[соперник] начал новый проект")
+
+        self.ticks += 1
+        self.max_tick_ms = max(self.max_tick_ms, (time.perf_counter() - start) * 1000)
+
+    def command(self, line):
+        """
+        выполняет команду игрока
+
+        returns:
+            "end"  — закончить ход
+            "exit" — выйти из режима
+            None   — ход продолжается
+        """
+
+        parts = line.split()
+
+        if not parts:
+            return None
+
+        if parts[0] == "--":
+            return "exit"
+
+        if parts[0] == "3":
+            return "end"
+
+        if parts[0] == "?":
+            self.status()
+            return None
+
+        arg = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else None
+
+        if parts[0] == "1":
+            if arg not in get_balance()["branch3"]["project_types"]:
+                print("укажите тип проекта: 1 <тип>")
+                return None
+
+            start_project(self.player, arg)
+            return "end" if self.player.is_bankrupt else None
+
+        if parts[0] == "2":
+            deals = self.player.portfolio.deals
+
+            if arg is None or not 1 <= arg <= len(deals):
+                print("укажите номер проекта: 2 <номер> (список — ?)")
+                return None
+
+            sell_project(self.player, deals[arg - 1])
+            return "end" if self.player.is_bankrupt else None
+
+        print("неизвестная команда (1 <тип>, 2 <номер>, 3, ?, --)")
+        return None
+
+    def status(self):
+        types = get_balance()["branch3"]["project_types"]
+
+        print("\nбюджет:", self.player.budget, "/ цель:", self.player.win_target)
+
+        for i, d in enumerate(self.player.portfolio.deals):
+            print(f"{i + 1} — {types[d.type]['name']} "
+                  f"(ходов осталось: {d.freeze_turns - d.passed})")
+
+    def end_turn(self):
+        """
+        закрытие хода: проекты игрока продвигаются и продаются
+        """
+
+        self.player.portfolio.advance_all()
+
+        finish_ready_projects(
+            self.player,
+            is_rival=False,
+            saturation=self.market.saturation()
+        )
+
+        self.market.sync_rival(self.rival)
+
+        print(f"\n[рынок] соперников: {len(self.market)}, "
+              f"новых проектов: {self.market.started}, "
+              f"продано: {self.market.sold}")
+
+    async def play_turn(self, reader):
+        """
+        один ход: тики рынка идут по часам, команды игрока
+        выполняются сразу; молчание до конца хода — «ждать»
+
+        returns:
+            bool — продолжать ли партию
+        """
+
+        loop = asyncio.get_running_loop()
+
+        self.turn += 1
+        self.market.begin_turn()
+
+        print(f"\n--- ход {self.turn}: {TURN_TICKS * TICK_SECONDS:.0f} с "
+              f"(1 <тип>, 2 <номер>, 3 — закончить ход, ?, --)")
+
+        started = loop.time()
+        index = 0
+        result = None
+
+        while index < TURN_TICKS and result is None:
+            next_tick = started + (index + 1) * TICK_SECONDS
+
+            # команды игрока до следующего тика
+            while result is None:
+                timeout = next_tick - loop.time()
+
+                if timeout <= 0:
+                    break
+
+                try:
+                    line = await reader.get(timeout)
+                except asyncio.TimeoutError:
+                    break
+
+                result = "exit" if line is None else self.command(line)
+
+            if result == "exit":
+                return False
+
+            self.tick(index)
+            index += 1
+
+        # досрочный конец хода — остальные соперники доигрывают сразу
+        while index < TURN_TICKS:
+            self.tick(index)
+            index += 1
+
+        if result is None:
+            print("\nвремя хода вышло — ход закрыт (ждать)")
+
+        self.end_turn()
+
+        return not (self.player.check_over() or self.player.check_win())
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        reader = LineReader(loop)
+
+        try:
+            while await self.play_turn(reader):
+                pass
+
+            # поток ждёт строку — она не должна уйти меню
+            if reader.pending:
+                print("\nнажмите Enter — вернуться в меню")
+                await reader.queue.get()
+
+        finally:
+            reader.close()
+
+        print(f"\nтиков рынка: {self.ticks}, "
+              f"самый долгий тик: {self.max_tick_ms:.1f} мс")
+
+
+def play_realtime(player, resume=None):
+    """
+    запуск ветки 3 в режиме реального времени
+
+    parameters:
+        resume — не используется (режим не сохраняется)
+    """
+
+    print("\n=== Портфель в реальном времени ===\n")
+
+    from rival_engine import RivalMarket
+
+    balance = get_balance()["branch3"]
+
+    player.budget = balance["start_budget"]
+    player.win_target = balance["win_target"]
+
+    print("стартовый бюджет:", player.budget)
+
+    attach_portfolio(player)
+    rival = create_rival()
+
+    market = RivalMarket()
+    market.add_rival(rival.budget, rival.style)
+    market.populate(REALTIME_RIVALS - 1)
+
+    print("соперников на рынке:", len(market))
+
+    set_context(branch=3, style=rival.style)
+
+    asyncio.run(RealtimeSession(player, rival, market).run())
@@ -0,0 +1,409 @@
+"""
+движок соперников-инвесторов ветки 3
+
+идея:
+    - на рынке проектов действует много соперников (десятки — тысячи)
+    - каждый ход соперник продвигает свои проекты, продаёт готовые,
+      может досрочно выйти из проекта или начать новый
+    - решения зависят от стиля соперника (rival_policy в balance.json)
+    - суммарная активность соперников насыщает рынок:
+      чем больше активных проектов одного типа, тем ниже
+      прибыль игрока по этому типу
+
+хранение:
+    состояние соперников держится в компактных колонках
+    (budgets / styles / deals), проект — кортеж
+    (type, buy_price, freeze_turns, passed)
+
+детерминизм и параллельность:
+    ход одного соперника — чистая функция от его состояния
+    и собственного зерна (seed, ход, номер соперника), поэтому
+    соперников можно считать пачками в пуле процессов:
+    результаты сливаются строго по номеру соперника
+    и не зависят от разбиения на пачки
+
+    поэтому весь рынок восстанавливается по зерну, начальной
+    расстановке и номеру хода (to_replay / from_replay) —
+    автосохранению не нужно писать колонки соперников каждый ход
+
+    раз в REPLAY_CHECKPOINT_EVERY ходов в описание кладутся полные
+    колонки (контрольная точка) — пересчитываются только ходы после
+    неё; описание помечено отпечатком баланса (digest): ходы зависят
+    от раздела branch3, и после его правки описание отклоняется
+
+параметры (balance.json, раздел branch3):
+    rival_policy      — поведение соперников по стилям:
+                        start   — шанс начать проект за ход
+                        weights — веса выбора типа проекта (1 / 2 / 3)
+                        reserve — доля бюджета, которую соперник не тратит
+                        abandon — шанс досрочно выйти из самого долгого проекта
+                        active  — максимум одновременных проектов
+    saturation_weight — насколько активность соперников снижает
+                        прибыль игрока (при доле 1.0 — минус 35 %)
+
+функции и классы:
+    rival_turn     — один ход одного соперника
+    RivalMarket    — рынок соперников ветки 3
+"""
+
+
+import random
+
+from player import Deal, attach_portfolio
+from balance import get_balance
+from simulation import get_pool
+
+
+# с какого числа соперников ход считается в пуле процессов
+PARALLEL_THRESHOLD = 2000
+CHUNK_SIZE = 1000
+
+# раз в сколько ходов to_replay сохраняет полные колонки
+REPLAY_CHECKPOINT_EVERY = 25
+
+
+def rival_seed(seed, turn, index):
+    """
+    собственное зерно соперника на ход
+    """
+    return (seed * 1_000_003 + turn) * 1_000_033 + index
+
+
+def rival_turn(budget, style, deals, seed, cfg=None):
+    """
+    один ход соперника
+
+    parameters:
+        budget — бюджет соперника
+        style  — стиль (ключ rival_policy)
+        deals  — кортеж проектов (type, buy_price, freeze_turns, passed)
+        seed   — зерно хода соперника
+        cfg    — раздел branch3 таблиц баланса (None — текущие)
+
+    returns:
+        tuple (бюджет, проекты, начатый тип | 0, продано проектов)
+    """
+
+    if budget <= 0:
+        return budget, deals, 0, 0
+
+    if cfg is None:
+        cfg = get_balance()["branch3"]
+
+    rng = random.Random(seed)
+    policy = cfg["rival_policy"][style]
+    types = cfg["project_types"]
+
+    # продвижение и продажа готовых проектов
+    kept = []
+    sold = 0
+
+    for deal_type, buy_price, freeze, passed in deals:
+        passed += 1
+
+        if passed >= freeze:
+            budget += rng.randint(*types[deal_type]["profit"])
+            sold += 1
+        else:
+            kept.append((deal_type, buy_price, freeze, passed))
+
+    # досрочный выход из самого долгого проекта
+    if kept and rng.random() < policy["abandon"]:
+        longest = max(range(len(kept)), key=lambda i: kept[i][2] - kept[i][3])
+        kept.pop(longest)
+        budget -= rng.randint(*cfg["abandon_loss"])
+
+    # новый проект
+    started = 0
+
+    if len(kept) < policy["active"] and rng.random() < policy["start"]:
+        deal_type = rng.choices((1, 2, 3), weights=policy["weights"])[0]
+        info = types[deal_type]
+
+        price = rng.randint(*info["buy"])
+        freeze = rng.randint(*info["freeze"])
+
+        if budget - price >= budget * policy["reserve"]:
+            budget -= price
+            kept.append((deal_type, price, freeze, 0))
+            started = deal_type
+
+    return budget, tuple(kept), started, sold
+
+
+def step_chunk(chunk):
+    """
+    ход пачки соперников (выполняется в процессе пула)
+
+    parameters:
+        chunk — список (budget, style, deals, seed)
+    """
+
+    cfg = get_balance()["branch3"]
+
+    return [rival_turn(*task, cfg) for task in chunk]
+
+
+class RivalMarket:
+    """
+    рынок соперников ветки 3
+
+    поля:
+        seed    — зерно рынка
+        turn    — номер хода рынка
+        budgets / styles / deals — колонки состояния соперников
+        started / sold — активность за последний ход
+        setup   — начальная расстановка: вызовы add_rival / populate
+                  до первого хода (для from_replay)
+        checkpoint — последняя контрольная точка to_replay
+                  (колонки to_dict) или None
+    """
+
+    def __init__(self, seed=None):
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.turn = 0
+
+        self.budgets = []
+        self.styles = []
+        self.deals = []
+
+        self.started = 0
+        self.sold = 0
+
+        self.setup = []
+        self.checkpoint = None
+
+    def populate(self, count):
+        """
+        добавляет count случайных соперников
+        """
+
+        if self.setup is not None and self.turn == 0:
+            self.setup.append(["populate", count])
+
+        rng = random.Random(self.seed)
+        low, high = get_balance()["branch3"]["rival_budget"]
+
+        for _ in range(count):
+            self._append(
+                rng.randint(low, high),
+                rng.randint(0, 2),
+                ()
+            )
+
+    def add_rival(self, budget, style, deals=()):
+        deals = tuple(deals)
+
+        if self.setup is not None and self.turn == 0:
+            self.setup.append(["add", budget, style, [list(d) for d in deals]])
+
+        return self._append(budget, style, deals)
+
+    def _append(self, budget, style, deals):
+        self.budgets.append(budget)
+        self.styles.append(style)
+        self.deals.append(deals)
+
+        return len(self.budgets) - 1
+
+    def __len__(self):
+        return len(self.budgets)
+
+    def step(self):
+        """
+        ход всех соперников
+
+        большие рынки считаются пачками в пуле процессов,
+        результат от этого не меняется
+        """
+
+        self.begin_turn()
+        self.step_slice(0, len(self))
+
+    def begin_turn(self):
+        """
+        начинает новый ход рынка (сбрасывает активность хода)
+        """
+
+        self.turn += 1
+        self.started = 0
+        self.sold = 0
+
+    def step_slice(self, start, stop):
+        """
+        ход соперников с номерами [start, stop) в текущем ходе рынка
+
+        ход рынка можно разбить на части (режим реального времени
+        ходит соперниками по очереди) — итог совпадает с step(),
+        так как зерно соперника зависит только от хода и номера
+        """
+
+        tasks = [
+            (self.budgets[i], self.styles[i], self.deals[i],
+             rival_seed(self.seed, self.turn, i))
+            for i in range(start, min(stop, len(self)))
+        ]
+
+        pool = get_pool() if len(tasks) >= PARALLEL_THRESHOLD else None
+
+        if pool is not None:
+            chunks = [
+                tasks[i:i + CHUNK_SIZE]
+                for i in range(0, len(tasks), CHUNK_SIZE)
+            ]
+            results = [r for part in pool.map(step_chunk, chunks) for r in part]
+        else:
+            results = step_chunk(tasks)
+
+        for i, (budget, deals, started, sold) in enumerate(results, start):
+            self.budgets[i] = budget
+            self.deals[i] = deals
+            self.started += started > 0
+            self.sold += sold
+
+    def active_by_type(self):
+        """
+        returns:
+            dict {тип проекта: число активных проектов соперников}
+        """
+
+        counts = {deal_type: 0 for deal_type in get_balance()["branch3"]["project_types"]}
+
+        for deals in self.deals:
+            for deal in deals:
+                counts[deal[0]] += 1
+
+        return counts
+
+    def saturation(self):
+        """
+        множители прибыли игрока по типам проектов
+
+        returns:
+            dict {тип: множитель от 1 - saturation_weight до 1}
+        """
+
+        balance = get_balance()["branch3"]
+
+        if not self.budgets:
+            return {deal_type: 1.0 for deal_type in balance["project_types"]}
+
+        counts = self.active_by_type()
+        size = len(self)
+        weight = balance["saturation_weight"]
+
+        return {
+            deal_type: 1.0 - weight * min(1.0, count / size)
+            for deal_type, count in counts.items()
+        }
+
+    # связь с объектом Rival (видимый соперник ветки)
+
+    def sync_rival(self, rival, index=0):
+        """
+        переносит состояние соперника index в объект Rival
+        """
+
+        rival.budget = self.budgets[index]
+
+        if rival.portfolio is None:
+            attach_portfolio(rival)
+
+        rival.portfolio.deals = []
+
+        for deal_type, buy_price, freeze, passed in self.deals[index]:
+            deal = Deal(
+                deal_type=deal_type,
+                buy_price=buy_price,
+                freeze_turns=freeze
+            )
+            deal.passed = passed
+            deal.bonus_profit = 0
+            deal.owner = rival
+
+            rival.portfolio.deals.append(deal)
+
+    def to_dict(self):
+        return {
+            "seed": self.seed,
+            "turn": self.turn,
+            "budgets": list(self.budgets),
+            "styles": list(self.styles),
+            "deals": [[list(d) for d in deals] for deals in self.deals]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        market = cls(data["seed"])
+        market.turn = data["turn"]
+        market.setup = None
+
+        for budget, style, deals in zip(data["budgets"], data["styles"], data["deals"]):
+            market.add_rival(budget, style, (tuple(d) for d in deals))
+
+        return market
+
+    def to_replay(self):
+        """
+        компактное описание рынка: зерно, отпечаток баланса,
+        начальная расстановка, номер хода и контрольная точка
+
+        контрольная точка (колонки to_dict) обновляется, когда
+        с прошлой прошло REPLAY_CHECKPOINT_EVERY ходов, — размер
+        описания меняется только в эти ходы
+
+        рынок, собранный from_dict, своей расстановки не знает —
+        для него описание недоступно (None)
+        """
+
+        if self.setup is None:
+            return None
+
+        last = self.checkpoint["turn"] if self.checkpoint else 0
+
+        if self.turn - last >= REPLAY_CHECKPOINT_EVERY:
+            self.checkpoint = self.to_dict()
+
+        return {
+            "seed": self.seed,
+            "turn": self.turn,
+            "balance": get_balance()["digest"],
+            "setup": self.setup,
+            "checkpoint": self.checkpoint
+        }
+
+    @classmethod
+    def from_replay(cls, data):
+        """
+        пересчитывает рынок из to_replay(): с контрольной точки
+        (или с расстановки) заново проходятся оставшиеся ходы
+        (ход детерминирован, см. rival_seed)
+
+        raises:
+            ValueError — описание записано при другом балансе:
+                         пересчёт дал бы другой рынок
+        """
+
+        if data.get("balance") != get_balance()["digest"]:
+            raise ValueError("описание рынка записано при другом балансе")
+
+        checkpoint = data.get("checkpoint")
+
+        if checkpoint is not None:
+            market = cls.from_dict(checkpoint)
+            market.setup = data["setup"]
+            market.checkpoint = checkpoint
+
+        else:
+            market = cls(data["seed"])
+
+            for op in data["setup"]:
+                if op[0] == "add":
+                    market.add_rival(op[1], op[2], (tuple(d) for d in op[3]))
+                else:
+                    market.populate(op[1])
+
+        for _ in range(data["turn"] - market.turn):
+            market.step()
+
+        return market
@@ -0,0 +1,175 @@
+"""
+оценка риска банкротства портфеля ветки 3
+
+вопрос:
+    какова вероятность, что бюджет игрока дойдёт до 0
+    (Player.change_budget объявляет банкротство) раньше,
+    чем до win_target, за RUIN_HORIZON ходов — если дальше
+    играть простой стратегией прогонов (simulation.default_policy)
+
+метод — многоуровневое расщепление (splitting):
+    - банкротство — редкое событие, обычный Монте-Карло
+      почти всегда видит ноль
+    - уровни бюджета RUIN_LEVELS (доли текущего бюджета);
+      траектория, впервые опустившаяся ниже очередного уровня,
+      делится на RUIN_SPLIT копий, вес каждой — вес / RUIN_SPLIT
+    - оценка — сумма весов разорившихся траекторий на один
+      корневой прогон; она несмещённая, а корневые прогоны
+      независимы, поэтому доверительный интервал считается
+      по разбросу вкладов корней
+
+остановка:
+    корни запускаются пачками, пока полуширина 95 %-го
+    интервала не станет меньше RUIN_TARGET_HALF_WIDTH
+    или не истечёт бюджет времени (RUIN_TIME_BUDGET, 50 мс);
+    если разорений не было, верхняя граница — «правило трёх» 3 / n
+
+случайность:
+    все траектории одной оценки тянут числа из одного
+    random_pool.RandomPool — оценка воспроизводима по зерну
+
+функции модуля:
+    estimate_ruin  — оценка для Branch3State
+    show_ruin      — строка риска для меню ветки 3
+"""
+
+
+import math
+import time
+
+from balance import get_balance
+from random_pool import RandomPool
+from simulation import fork_branch3, advance_turn, apply_action, default_policy
+
+
+# горизонт оценки в ходах
+RUIN_HORIZON = 20
+
+# уровни расщепления (доли текущего бюджета) и число копий
+RUIN_LEVELS = (0.5, 0.25, 0.1)
+RUIN_SPLIT = 4
+
+# остановка: точность, бюджет времени, размер пачки корней
+RUIN_TARGET_HALF_WIDTH = 0.01
+RUIN_TIME_BUDGET = 0.05
+RUIN_BATCH = 16
+RUIN_MIN_ROOTS = 32
+
+Z_95 = 1.96
+
+
+def _root(state, rng, cfg, win_target, horizon, levels):
+    """
+    один корневой прогон со всеми его копиями
+
+    returns:
+        float — суммарный вес разорившихся траекторий
+    """
+
+    ruined = 0.0
+    stack = [(state, 0, 0, 1.0)]
+
+    while stack:
+        state, turn, level, weight = stack.pop()
+
+        while turn < horizon:
+            state = advance_turn(state, rng, cfg)
+            turn += 1
+
+            if not state.bankrupt:
+                if state.budget >= win_target:
+                    break
+
+                state = apply_action(state, default_policy(state, rng, cfg), rng, cfg)
+
+            if state.bankrupt:
+                ruined += weight
+                break
+
+            # пересечение уровней — расщепление
+            while level < len(levels) and state.budget < levels[level]:
+                level += 1
+                weight /= RUIN_SPLIT
+
+                for _ in range(RUIN_SPLIT - 1):
+                    stack.append((state, turn, level, weight))
+
+    return ruined
+
+
+def estimate_ruin(state, win_target, horizon=RUIN_HORIZON,
+                  time_budget=RUIN_TIME_BUDGET,
+                  target_half_width=RUIN_TARGET_HALF_WIDTH, seed=None):
+    """
+    вероятность банкротства до победы за horizon ходов
+
+    returns:
+        dict {"p": оценка, "half_width": полуширина 95 % интервала,
+              "roots": число корневых прогонов, "ms": затраченное время}
+    """
+
+    start = time.perf_counter()
+    deadline = start + time_budget
+
+    if state.bankrupt:
+        return {"p": 1.0, "half_width": 0.0, "roots": 0, "ms": 0.0}
+
+    cfg = get_balance()["branch3"]
+    rng = RandomPool(seed)
+    levels = tuple(state.budget * share for share in RUIN_LEVELS)
+
+    n = 0
+    total = 0.0
+    total_sq = 0.0
+    half_width = 1.0
+
+    while True:
+        for _ in range(RUIN_BATCH):
+            value = _root(state, rng, cfg, win_target, horizon, levels)
+
+            n += 1
+            total += value
+            total_sq += value * value
+
+            if time.perf_counter() >= deadline:
+                break
+
+        mean = total / n
+
+        if total and n > 1:
+            variance = max(0.0, total_sq / n - mean * mean) * n / (n - 1)
+            half_width = Z_95 * math.sqrt(variance / n)
+        else:
+            half_width = 3.0 / n
+
+        if n >= RUIN_MIN_ROOTS and half_width <= target_half_width:
+            break
+
+        if time.perf_counter() >= deadline:
+            break
+
+    return {
+        "p": mean,
+        "half_width": half_width,
+        "roots": n,
+        "ms": (time.perf_counter() - start) * 1000
+    }
+
+
+def show_ruin(player, rival, market=None):
+    """
+    печатает оценку риска банкротства текущего портфеля
+    """
+
+    state = fork_branch3(player, rival, market)
+    result = estimate_ruin(state, player.win_target)
+
+    if result["p"] == 0:
+        print(f"\n[риск] банкротство за {RUIN_HORIZON} ходов: "
+              f"< {result['half_width'] * 100:.1f} % "
+              f"(прогонов: {result['roots']})")
+        return
+
+    print(f"\n[риск] банкротство за {RUIN_HORIZON} ходов: "
+          f"{result['p'] * 100:.1f} % ± {result['half_width'] * 100:.1f} "
+          f"(прогонов: {result['roots']})")
@@ -1,23 +1,59 @@
 """
 модуль отвечает за сохранение и загрузку
 прогресса игрока через систему артефактов
+и снимки состояния сюжетных веток
 
 основная идея хранения прогресса:
     — у каждого пользователя свой набор артефактов
     — артефакты сохраняются по имени аккаунта
     — при входе они подгружаются и активируются
 
+снимки состояния веток:
+    — сохраняется полное состояние ветки: Player, Rival,
+      Portfolio со сделками Deal и позиция в цикле ветки
+    — формат версионируется (SNAPSHOT_VERSION)
+    — автосохранение пошаговое: первая запись журнала — полный
+      снимок, дальше только изменившиеся поля (дельты)
+    — журнал хранится в storage/session_<username>.jsonl
+    — рынок соперников ветки 3 в журнал не пишется: он
+      детерминирован, поэтому хранится только его зерно,
+      начальная расстановка, номер хода и редкая контрольная
+      точка колонок (RivalMarket.to_replay), а при продолжении
+      рынок пересчитывается с неё ход за ходом
+    — после выхода из ветки через «--» партию можно продолжить
+      ровно с того же запроса ввода
+
 функции модуля:
     load_player_progress   — загрузить артефакты текущего игрока
     save_player_artifacts  — сохранить обновлённый список артефактов
+    snapshot_player / restore_player — снимок игрока
+    snapshot_rival / restore_rival   — снимок соперника
+    SessionJournal         — журнал автосохранения ветки
+    load_session           — последнее состояние ветки (профиль / файл)
+    read_session           — последнее состояние ветки из журнала
 """
 
 
+import os
+import json
+from json import JSONDecodeError
+
 from auth import get_current_username
 from artifact_storage import (
+    STORAGE_DIR,
+    ensure_storage_dir,
     save_artifacts_ids,
     load_player_artifacts_objects
 )
+from player import Deal, DealStats, Portfolio, Rival
+from session_profile import get_profile
+
+
+# версия формата снимков состояния
+SNAPSHOT_VERSION = 4
+
+# после стольких дельт журнал переписывается полным снимком
+COMPACT_EVERY = 50
 
 
 def load_player_progress():
@@ -31,6 +67,12 @@ def load_player_progress():
     if not username:
         return []
 
+    # артефакты уже прочитаны при входе (профиль сессии)
+    profile = get_profile(username)
+
+    if profile is not None:
+        return list(profile.artifacts)
+
     return load_player_artifacts_objects(username)
 
 
@@ -48,7 +90,323 @@ def save_player_artifacts(artifacts):
     if not username:
         return
 
-    ids = [a.id for a in artifacts]
+    ids = [a.artifact_id for a in artifacts]
     save_artifacts_ids(username, ids)
 
     print("\nпрогресс сохранён — артефакты записаны")
+
+
+# СНИМКИ СУЩНОСТЕЙ
+def snapshot_deal(deal):
+    """
+    сделка → список полей
+    владелец не сохраняется: он восстанавливается по портфелю
+    """
+
+    return [
+        deal.type,
+        deal.buy_price,
+        deal.freeze_turns,
+        deal.passed,
+        getattr(deal, "bonus_profit", 0)
+    ]
+
+
+def restore_deal(data, owner):
+    deal_type, buy_price, freeze_turns, passed, bonus = data
+
+    deal = Deal(
+        deal_type=deal_type,
+        buy_price=buy_price,
+        freeze_turns=freeze_turns
+    )
+
+    deal.passed = passed
+    deal.bonus_profit = bonus
+    deal.owner = owner
+
+    return deal
+
+
+def snapshot_portfolio(portfolio):
+    if portfolio is None:
+        return None
+
+    return [snapshot_deal(d) for d in portfolio.deals]
+
+
+def restore_portfolio(data, owner):
+    if data is None:
+        return None
+
+    portfolio = Portfolio()
+
+    for item in data:
+        portfolio.add(restore_deal(item, owner))
+
+    return portfolio
+
+
+def snapshot_player(player):
+    """
+    снимок состояния игрока (без артефактов —
+    они хранятся в отдельном файле артефактов)
+    """
+
+    return {
+        "budget": player.budget,
+        "role": player.role,
+        "is_bankrupt": player.is_bankrupt,
+        "win_target": player.win_target,
+        "deals": player.completed_deals.to_dict(),
+        "portfolio": snapshot_portfolio(getattr(player, "portfolio", None))
+    }
+
+
+def restore_player(data, player):
+    """
+    переносит снимок в существующий объект игрока
+    (имя и артефакты остаются от текущей сессии)
+    """
+
+    player.budget = data["budget"]
+    player.role = data["role"]
+    player.is_bankrupt = data["is_bankrupt"]
+    player.win_target = data["win_target"]
+    player.completed_deals = DealStats.from_dict(data["deals"])
+    player.portfolio = restore_portfolio(data["portfolio"], player)
+
+    return player
+
+
+def snapshot_rival(rival):
+    if rival is None:
+        return None
+
+    return {
+        "name": rival.name,
+        "style": rival.style,
+        "mode": rival.mode,
+        "budget": rival.budget,
+        "state": rival.state,
+        "profit_range": rival.profit_range,
+        "profit": rival.profit,
+        "portfolio": snapshot_portfolio(rival.portfolio)
+    }
+
+
+def restore_rival(data):
+    if data is None:
+        return None
+
+    rival = Rival(
+        name=data["name"],
+        style=data["style"],
+        mode=data["mode"],
+        budget=data["budget"]
+    )
+
+    # поля рынка есть только у соперника ветки 2 (MarketRival)
+    if rival.mode == 2:
+        rival.state = data["state"]
+        rival.profit = data["profit"]
+
+        if data["profit_range"] is not None:
+            rival.profit_range = tuple(data["profit_range"])
+
+    rival.portfolio = restore_portfolio(data["portfolio"], rival)
+
+    return rival
+
+
+# ПЛОСКОЕ ПРЕДСТАВЛЕНИЕ ДЛЯ ДЕЛЬТ
+def _flatten(data, prefix="", out=None):
+    """
+    {"player": {"budget": 1}} → {"player.budget": 1}
+    списки считаются листьями
+    """
+
+    if out is None:
+        out = {}
+
+    for key, value in data.items():
+        path = prefix + key
+
+        if isinstance(value, dict) and value:
+            _flatten(value, path + ".", out)
+        else:
+            out[path] = value
+
+    return out
+
+
+def _unflatten(flat):
+    data = {}
+
+    for path, value in flat.items():
+        node = data
+        *parents, leaf = path.split(".")
+
+        for key in parents:
+            node = node.setdefault(key, {})
+
+        node[leaf] = value
+
+    return data
+
+
+def get_session_file(username):
+    ensure_storage_dir()
+    return os.path.join(STORAGE_DIR, f"session_{username}.jsonl")
+
+
+# ЖУРНАЛ АВТОСОХРАНЕНИЯ
+class SessionJournal:
+    """
+    пошаговое автосохранение ветки
+
+    save(state) — первая запись полная, остальные — дельты:
+        {"set": {поле: значение}, "del": [поля]}
+    clear()     — удалить журнал (ветка завершена)
+
+    если пользователь не вошёл в игру, журнал ничего не делает
+    """
+
+    def __init__(self, username, branch):
+        self.username = username
+        self.branch = branch
+
+        self._last = None
+        self._deltas = 0
+
+    def _touch_profile(self):
+        # журнал меняется — сохранение в профиле сессии устарело
+        profile = get_profile(self.username)
+
+        if profile is not None:
+            profile.session_fresh = False
+
+    def save(self, state):
+        if not self.username:
+            return
+
+        self._touch_profile()
+
+        flat = _flatten(state)
+
+        if self._last is None or self._deltas >= COMPACT_EVERY:
+            record = {
+                "v": SNAPSHOT_VERSION,
+                "branch": self.branch,
+                "full": state
+            }
+            mode = "w"
+            self._deltas = 0
+
+        else:
+            changed = {
+                key: value for key, value in flat.items()
+                if key not in self._last or self._last[key] != value
+            }
+            removed = [key for key in self._last if key not in flat]
+
+            if not changed and not removed:
+                return
+
+            record = {"set": changed}
+
+            if removed:
+                record["del"] = removed
+
+            mode = "a"
+            self._deltas += 1
+
+        with open(get_session_file(self.username), mode, encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+            f.write("\n")
+
+        self._last = flat
+
+    def clear(self):
+        self._last = None
+        self._deltas = 0
+
+        if not self.username:
+            return
+
+        self._touch_profile()
+
+        file_path = get_session_file(self.username)
+
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+
+def load_session(username):
+    """
+    последнее состояние ветки: из профиля сессии, пока журнал
+    не менялся после входа, иначе — из файла (read_session)
+    """
+
+    profile = get_profile(username)
+
+    if profile is not None and profile.session_fresh:
+        return profile.session
+
+    return read_session(username)
+
+
+def read_session(username):
+    """
+    собирает последнее состояние ветки из журнала
+
+    returns:
+        dict {"branch": номер ветки, "state": состояние}
+        None — если сохранения нет, оно повреждено
+               или записано другой версией формата
+    """
+
+    if not username:
+        return None
+
+    file_path = get_session_file(username)
+
+    if not os.path.exists(file_path):
+        return None
+
+    branch = None
+    flat = None
+
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+
+                if not line:
+                    continue
+
+                record = json.loads(line)
+
+                if "full" in record:
+                    if record.get("v") != SNAPSHOT_VERSION:
+                        return None
+
+                    branch = record["branch"]
+                    flat = _flatten(record["full"])
+                    continue
+
+                if flat is None:
+                    return None
+
+                flat.update(record["set"])
+
+                for key in record.get("del", []):
+                    flat.pop(key, None)
+
+    except (OSError, JSONDecodeError, KeyError):
+        return None
+
+    if flat is None:
+        return None
+
+    return {"branch": branch, "state": _unflatten(flat)}
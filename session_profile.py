@@ -0,0 +1,140 @@
+"""
+профиль сессии игрока — всё, что нужно после входа, одним чтением
+
+раньше вход читал хранилище несколько раз:
+    login_user → authenticate_user → load_users (весь users.txt
+    в словарь), затем load_player_artifacts_objects (JSON),
+    затем main снова вызывал load_player_progress (тот же JSON),
+    а «восстановить артефакты» — в третий раз
+
+профиль (SessionProfile):
+    - собирается при входе за один проход по хранилищу:
+      users.txt читается построчно без словаря, файл артефактов
+      и журнал автосохранения — по одному разу
+    - дальше его берут все: auth (вход), save_system
+      (load_player_progress, load_session), main и ветки
+      (give_artifact дополняет профиль вместо повторного чтения)
+    - сохранённая партия в профиле актуальна до первой записи
+      журнала — после неё load_session читает файл заново
+
+функции и классы модуля:
+    SessionProfile  — данные игрока текущей сессии
+    load_profile    — проверка входа и сборка профиля
+    get_profile     — профиль текущей сессии (или None)
+    clear_profile   — сбросить профиль (выход / смена игрока)
+"""
+
+
+from artifacts import get_artifact_by_id
+from auth import USERS_FILE, ensure_users_file
+from artifact_storage import load_artifacts_ids
+from metrics import timed
+
+
+_profile = None
+
+
+class SessionProfile:
+    """
+    данные игрока текущей сессии
+
+    поля:
+        username      — логин
+        artifact_ids  — ID полученных артефактов (как в файле)
+        artifacts     — объекты Artifact тех же ID
+        session       — сохранённая партия (save_system.load_session)
+        session_fresh — session совпадает с журналом на диске
+    """
+
+    def __init__(self, username, artifact_ids, session):
+        self.username = username
+        self.artifact_ids = artifact_ids
+
+        self.artifacts = [
+            art for art in map(get_artifact_by_id, artifact_ids) if art
+        ]
+
+        self.session = session
+        self.session_fresh = True
+
+    def add_artifact(self, artifact):
+        """
+        новый артефакт уже записан в хранилище — отражаем в профиле
+        """
+
+        self.artifact_ids.append(artifact.artifact_id)
+        self.artifacts.append(artifact)
+
+
+def _find_password(login):
+    """
+    пароль логина за один проход по users.txt
+    (как в load_users: при повторах действует последняя строка)
+
+    строки разбираются, только если в них встречается логин
+    """
+
+    ensure_users_file()
+
+    prefix = login + " "
+    password = None
+
+    with open(USERS_FILE, "r", encoding="utf-8") as f:
+        for line in f:
+            if prefix not in line:
+                continue
+
+            parts = line.strip().split(" ")
+
+            if len(parts) == 2 and parts[0] == login:
+                password = parts[1]
+
+    return password
+
+
+@timed("session.load_profile")
+def load_profile(login, password):
+    """
+    проверяет логин и пароль и собирает профиль сессии
+
+    returns:
+        tuple (SessionProfile, None) — вход выполнен
+        tuple (None, str)            — причина отказа
+    """
+
+    global _profile
+
+    from save_system import read_session
+
+    stored = _find_password(login)
+
+    if stored is None:
+        return None, "пользователь не найден"
+
+    if stored != password:
+        return None, "неверный пароль"
+
+    _profile = SessionProfile(login, load_artifacts_ids(login), read_session(login))
+
+    return _profile, None
+
+
+def get_profile(username=None):
+    """
+    профиль текущей сессии; если задан username —
+    только когда профиль принадлежит этому игроку
+    """
+
+    if _profile is None:
+        return None
+
+    if username is not None and _profile.username != username:
+        return None
+
+    return _profile
+
+
+def clear_profile():
+    global _profile
+
+    _profile = None
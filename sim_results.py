@@ -0,0 +1,449 @@
+"""
+хранилище итогов массовых безголовых прогонов по чанкам
+
+зачем:
+    массовый прогон держал все итоги в памяти и при обрыве
+    терял всё; здесь итоги партий пишутся потоком в чанки
+    фиксированного размера, а прогон после сбоя продолжается
+    с последнего записанного чанка
+
+раскладка на диске (папка прогона):
+    manifest.json   — параметры прогона, колонки, список чанков
+    chunk_00000.bin — chunk_size партий: колонки подряд,
+                      каждая — массив фиксированной ширины
+                      (array, порядок байтов платформы)
+
+колонки (COLUMNS):
+    seed      — зерно партии (RandomPool(seed))
+    branch    — ветка
+    policy    — номер стратегии в manifest["policies"]
+    budget    — итоговый бюджет
+    turns     — ходов партии
+    artifacts — маска артефактов (simulation.ARTIFACT_BITS)
+    bankrupt  — банкротство
+    win       — победа
+
+надёжность:
+    чанк пишется во временный файл, сбрасывается на диск
+    и переименовывается, затем так же обновляется manifest;
+    чанк существует для прогона, только если он есть в manifest,
+    поэтому после сбоя недописанный чанк просто считается заново
+    (партии детерминированы зерном)
+
+чтение:
+    ChunkReader отображает чанки в память (mmap) по одному и
+    отдаёт колонки как memoryview без копирования — анализ
+    не загружает прогон целиком (с NumPy — np.frombuffer
+    поверх тех же буферов)
+
+запуск:
+    python sim_results.py run <папка> --branch 2 --games 1000000
+    python sim_results.py summary <папка>
+
+функции и классы модуля:
+    ChunkWriter  — запись чанков и manifest, продолжение прогона
+    ChunkReader  — чтение чанков через mmap
+    run_games    — прогон партий ветки с записью по чанкам
+    summarize    — сводка прогона по колонкам
+"""
+
+
+import json
+import mmap
+import os
+import sys
+import time
+
+from array import array
+
+from simulation import (
+    ARTIFACT_BITS,
+    POLICIES,
+    SIM_VERSION,
+    SIMULATORS,
+    default_config,
+    get_pool
+)
+
+
+MANIFEST_FILE = "manifest.json"
+
+# версия формата папки прогона
+RESULTS_VERSION = 1
+
+# партий в чанке
+CHUNK_SIZE = 4096
+
+COLUMNS = (
+    ("seed", "q"),
+    ("branch", "b"),
+    ("policy", "b"),
+    ("budget", "q"),
+    ("turns", "i"),
+    ("artifacts", "i"),
+    ("bankrupt", "b"),
+    ("win", "b"),
+)
+
+def _chunk_name(number):
+    return f"chunk_{number:05d}.bin"
+
+
+def _write_atomic(path, data):
+    tmp_path = path + ".tmp"
+
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_path, path)
+
+
+# ЗАПИСЬ
+class ChunkWriter:
+    """
+    запись итогов по чанкам
+
+    поля:
+        path     — папка прогона
+        manifest — текущий manifest (параметры и чанки)
+        rows     — партий в записанных чанках
+    """
+
+    def __init__(self, path, params, chunk_size=CHUNK_SIZE):
+        """
+        открывает папку прогона; если manifest уже есть —
+        продолжает его
+
+        raises:
+            ValueError — в папке прогон с другими параметрами
+        """
+
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+        manifest_path = os.path.join(path, MANIFEST_FILE)
+
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+
+        except FileNotFoundError:
+            manifest = {
+                "v": RESULTS_VERSION,
+                "params": params,
+                "chunk_size": chunk_size,
+                "byteorder": sys.byteorder,
+                "columns": [list(column) for column in COLUMNS],
+                "chunks": [],
+                "complete": False
+            }
+
+        if manifest["params"] != params or manifest["v"] != RESULTS_VERSION:
+            raise ValueError(f"{path}: в папке прогон с другими параметрами")
+
+        self.manifest = manifest
+        self.rows = sum(chunk["rows"] for chunk in manifest["chunks"])
+
+    @property
+    def chunk_size(self):
+        return self.manifest["chunk_size"]
+
+    def write_chunk(self, columns):
+        """
+        записывает чанк и отмечает его в manifest
+
+        parameters:
+            columns — {имя колонки: array} одной длины
+        """
+
+        rows = len(columns[COLUMNS[0][0]])
+        data = b"".join(columns[name].tobytes() for name, _ in COLUMNS)
+
+        name = _chunk_name(len(self.manifest["chunks"]))
+        _write_atomic(os.path.join(self.path, name), data)
+
+        self.manifest["chunks"].append({"file": name, "first": self.rows, "rows": rows})
+        self.rows += rows
+
+        self._save_manifest()
+
+    def close(self):
+        """
+        прогон окончен: отмечает manifest как завершённый
+        """
+
+        self.manifest["complete"] = True
+        self._save_manifest()
+
+    def _save_manifest(self):
+        data = json.dumps(self.manifest, ensure_ascii=False, indent=4)
+        _write_atomic(os.path.join(self.path, MANIFEST_FILE), data.encode("utf-8"))
+
+
+# ЧТЕНИЕ
+class ChunkReader:
+    """
+    чтение прогона через отображение чанков в память
+    """
+
+    def __init__(self, path):
+        """
+        raises:
+            ValueError — другой формат или порядок байтов
+        """
+
+        self.path = path
+
+        with open(os.path.join(path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+
+        if self.manifest["v"] != RESULTS_VERSION:
+            raise ValueError(f"{path}: неизвестная версия прогона")
+
+        if self.manifest["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path}: записан на платформе с другим порядком байтов")
+
+        self.columns = [tuple(column) for column in self.manifest["columns"]]
+
+    def __len__(self):
+        return sum(chunk["rows"] for chunk in self.manifest["chunks"])
+
+    def chunks(self, names=None):
+        """
+        колонки чанков по одному
+
+        returns:
+            iterator — {имя: memoryview} — буферы действительны
+                       до перехода к следующему чанку
+        """
+
+        wanted = names or [name for name, _ in self.columns]
+
+        for chunk in self.manifest["chunks"]:
+            rows = chunk["rows"]
+
+            with open(os.path.join(self.path, chunk["file"]), "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+            buffer = memoryview(mapped)
+            views = {}
+            offset = 0
+
+            for name, code in self.columns:
+                size = rows * array(code).itemsize
+
+                if name in wanted:
+                    views[name] = buffer[offset:offset + size].cast(code)
+
+                offset += size
+
+            try:
+                yield views
+            finally:
+                for view in views.values():
+                    view.release()
+
+                buffer.release()
+                mapped.close()
+
+    def column(self, name):
+        """
+        одна колонка по чанкам (memoryview на чанк)
+        """
+
+        for views in self.chunks([name]):
+            yield views[name]
+
+
+def summarize(reader):
+    """
+    сводка прогона: доли побед и банкротств, средние ходы
+    и бюджет, сколько партий получили каждый артефакт
+
+    returns:
+        dict
+    """
+
+    games = wins = bankrupt = turns = budget = 0
+    artifacts = [0] * len(ARTIFACT_BITS)
+
+    for views in reader.chunks(["win", "bankrupt", "turns", "budget", "artifacts"]):
+        games += len(views["win"])
+        wins += sum(views["win"])
+        bankrupt += sum(views["bankrupt"])
+        turns += sum(views["turns"])
+        budget += sum(views["budget"])
+
+        for mask in views["artifacts"]:
+            bit = 0
+
+            while mask:
+                if mask & 1:
+                    artifacts[bit] += 1
+
+                mask >>= 1
+                bit += 1
+
+    if not games:
+        return {"games": 0}
+
+    return {
+        "games": games,
+        "win_rate": wins / games,
+        "bankrupt_rate": bankrupt / games,
+        "mean_turns": turns / games,
+        "mean_budget": budget / games,
+        "artifacts": dict(zip(ARTIFACT_BITS, artifacts))
+    }
+
+
+# ПРОГОН
+def run_chunk(task):
+    """
+    партии одного чанка (выполняется в процессе пула)
+
+    parameters:
+        task — (ветка, имя стратегии, номер стратегии,
+                первое зерно, число партий)
+
+    returns:
+        dict — {имя колонки: array}
+    """
+
+    from random_pool import RandomPool
+
+    branch, policy, policy_id, first_seed, count = task
+
+    config = default_config()
+    simulate = SIMULATORS[branch]
+    argument = POLICIES[branch][policy]
+
+    columns = {name: array(code) for name, code in COLUMNS}
+
+    for seed in range(first_seed, first_seed + count):
+        result = simulate(config, RandomPool(seed), argument)
+
+        columns["seed"].append(seed)
+        columns["budget"].append(result.budget)
+        columns["turns"].append(result.turns)
+        columns["artifacts"].append(result.artifacts)
+        columns["bankrupt"].append(result.bankrupt)
+        columns["win"].append(result.win)
+
+    columns["branch"] = array("b", [branch]) * count
+    columns["policy"] = array("b", [policy_id]) * count
+
+    return columns
+
+
+def run_games(path, branch, games, policy=None, seed=0, chunk_size=CHUNK_SIZE):
+    """
+    прогон games партий ветки с записью по чанкам;
+    если в папке есть незавершённый прогон с теми же
+    параметрами — продолжает его
+
+    returns:
+        ChunkWriter — записанный прогон
+    """
+
+    from balance import get_balance
+    from random_pool import BACKEND
+
+    names = list(POLICIES[branch])
+
+    if policy is None:
+        policy = names[0]
+
+    if policy not in POLICIES[branch]:
+        raise ValueError(f"ветка {branch}: стратегии {', '.join(names)}")
+
+    params = {
+        "branch": branch,
+        "policy": policy,
+        "policies": names,
+        "games": games,
+        "seed": seed,
+        "sim_version": SIM_VERSION,
+        "rng": BACKEND,
+        "balance": get_balance()["digest"]
+    }
+
+    writer = ChunkWriter(path, params, chunk_size)
+    size = writer.chunk_size
+
+    if writer.rows:
+        print(f"продолжение прогона: записано партий {writer.rows} из {games}")
+
+    tasks = [
+        (branch, policy, names.index(policy), seed + first, min(size, games - first))
+        for first in range(writer.rows, games, size)
+    ]
+
+    pool = get_pool() if len(tasks) > 1 else None
+    results = pool.map(run_chunk, tasks) if pool is not None else map(run_chunk, tasks)
+
+    for columns in results:
+        writer.write_chunk(columns)
+        print(f"  чанк {len(writer.manifest['chunks'])}: партий {writer.rows} из {games}")
+
+    writer.close()
+
+    return writer
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="массовый прогон с записью по чанкам")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="прогон (или продолжение) партий")
+    run.add_argument("path")
+    run.add_argument("--branch", type=int, choices=sorted(SIMULATORS), default=2)
+    run.add_argument("--games", type=int, default=100_000)
+    run.add_argument("--policy")
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--chunk", type=int, default=CHUNK_SIZE)
+
+    summary = commands.add_parser("summary", help="сводка записанного прогона")
+    summary.add_argument("path")
+
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "run":
+            start = time.perf_counter()
+            writer = run_games(args.path, args.branch, args.games,
+                               args.policy, args.seed, args.chunk)
+
+            print(f"готово: {writer.rows} партий за {time.perf_counter() - start:.1f} с")
+
+        reader = ChunkReader(args.path)
+
+    except (OSError, ValueError) as error:
+        print("ошибка:", error)
+        return 1
+
+    result = summarize(reader)
+
+    print(f"партий:          {result['games']}")
+
+    if result["games"]:
+        print(f"побед:           {result['win_rate']:.1%}")
+        print(f"банкротств:      {result['bankrupt_rate']:.1%}")
+        print(f"ходов в среднем: {result['mean_turns']:.1f}")
+        print(f"бюджет в среднем: {result['mean_budget']:.0f}")
+
+        for name, value in result["artifacts"].items():
+            print(f"артефакт {name}: {value / result['games']:.1%} партий")
+
+    if not reader.manifest["complete"]:
+        print("прогон не завершён — запустите run с теми же параметрами")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,666 @@
+"""
+модуль безголовой (headless) симуляции веток
+
+назначение:
+    - повторяет правила веток без вывода на экран и без input()
+    - используется советником, оценщиками риска и балансировкой
+    - работает на лёгком неизменяемом состоянии из кортежей
+
+конфигурация баланса (default_config):
+    изменяемая копия таблиц balance.json — разделы branch1 /
+    branch2 / branch3; симуляторы целых партий читают таблицы
+    только из неё, поэтому балансировка может подменять любые
+    значения; функции ветки 3 получают раздел branch3 (cfg),
+    без него берутся текущие таблицы (balance.get_balance)
+
+случайность:
+    rng — random_pool.RandomPool (или random.Random): с тем же
+    зерном безголовая партия тянет из каждого диапазона те же
+    значения, что и интерактивная
+
+    rng может быть и random_pool.RandomStreams — тогда партии
+    веток 2 и 3 берут каждое назначение случайности из своего
+    потока (_stream): объявления, рынок, сделки, прибыль,
+    прибыль соперника, проекты, решения стратегии; так две стратегии с одним
+    зерном видят одни и те же события (common random numbers)
+
+контрольная величина (GameResult.control):
+    сумма отклонений выпавшей прибыли сделок от её среднего
+    по таблицам (середина диапазона calc_profit / project_types),
+    в ветке 3 — ещё и цен покупки проектов (со знаком минус);
+    её ожидание — ноль при любой стратегии, а с итогом партии
+    она коррелирует, поэтому снижает дисперсию сравнений
+    (policy_compare)
+
+состояние ветки 3 (Branch3State):
+    budget      — бюджет игрока
+    deals       — кортеж проектов игрока
+    rival_budget / rival_deals — то же для соперника
+    saturation  — множители прибыли игрока по типам проектов
+                  (насыщение рынка соперниками, на прогон не меняется)
+
+    проект — кортеж (type, buy_price, freeze_turns, passed, bonus)
+
+    форк состояния бесплатный: кортежи разделяются между
+    копиями, при изменении создаётся только новый кортеж
+    изменившейся части (copy-on-write), deepcopy не нужен
+
+функции модуля:
+    get_pool           — общий пул процессов для массовых прогонов
+    warm_pool          — запустить процессы пула заранее
+    default_config     — изменяемая копия таблиц баланса
+    simulate_branch1/2/3 — целая партия ветки до победы / банкротства
+    fork_branch3       — снять состояние с живых Player / Rival
+    start_project      — запуск проекта в состоянии
+    abandon_project    — досрочная продажа проекта
+    advance_turn       — один ход (продвижение + завершение)
+    default_policy     — простая стратегия игрока для прогонов
+    cautious_policy    — осторожная стратегия (один проект за раз)
+    POLICIES           — стратегии веток по именам
+    rollout_branch3    — прогон партии до победы / банкротства / горизонта
+"""
+
+
+import atexit
+import os
+
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from balance import get_balance, thaw, publish_shared, attach_shared
+from negotiation import get_negotiation, play_equilibrium
+
+
+Branch3State = namedtuple(
+    "Branch3State",
+    ["budget", "deals", "rival_budget", "rival_deals", "bankrupt", "saturation"]
+)
+
+# версия правил симуляции (входит в ключ кэша балансировки)
+SIM_VERSION = 6
+
+# итог безголовой партии (artifacts — маска битов ниже,
+# control — контрольная величина прибыли, см. выше)
+GameResult = namedtuple(
+    "GameResult",
+    ["win", "bankrupt", "turns", "budget", "artifacts", "control"],
+    defaults=(0, 0.0)
+)
+
+# артефакты, которые отмечают безголовые партии (бит маски)
+FIRST_DEAL, TEN_DEALS, BIG_PROFIT, LONG_PROJECT = (1 << i for i in range(4))
+ARTIFACT_BITS = ("first_deal", "ten_deals", "big_profit", "long_project")
+
+# индексы полей проекта
+TYPE, BUY, FREEZE, PASSED, BONUS = range(5)
+
+# действия игрока ветки 3
+WAIT = ("wait", 0)
+
+
+_pool = None
+_pool_failed = False
+
+
+def get_pool():
+    """
+    общий пул процессов (создаётся при первом вызове)
+
+    таблицы баланса передаются процессам через разделяемую
+    память один раз, а не с каждой задачей
+
+    returns:
+        ProcessPoolExecutor | None — None, если пул недоступен
+    """
+
+    global _pool, _pool_failed
+
+    if _pool is None and not _pool_failed:
+        try:
+            _pool = ProcessPoolExecutor(
+                initializer=attach_shared,
+                initargs=(publish_shared(),)
+            )
+            atexit.register(_pool.shutdown, cancel_futures=True)
+        except (OSError, NotImplementedError):
+            _pool_failed = True
+
+    return _pool
+
+
+def _ready():
+    return True
+
+
+def warm_pool():
+    """
+    запускает процессы пула заранее (например, при входе
+    в ветку 3), чтобы первая подсказка советника не тратила
+    свой бюджет времени на старт процессов
+
+    не ждёт процессы — они стартуют, пока игрок читает экран
+    """
+
+    pool = get_pool()
+
+    if pool is not None:
+        for _ in range(os.cpu_count() or 1):
+            pool.submit(_ready)
+
+
+def _stream(rng, name):
+    """
+    поток назначения name, если rng — RandomStreams, иначе сам rng
+    """
+
+    stream = getattr(rng, "stream", None)
+
+    return rng if stream is None else stream(name)
+
+
+def _deal_tuple(deal):
+    return (
+        deal.type,
+        deal.buy_price,
+        deal.freeze_turns,
+        deal.passed,
+        getattr(deal, "bonus_profit", 0)
+    )
+
+
+def fork_branch3(player, rival, market=None):
+    """
+    снимает неизменяемое состояние с живых объектов ветки
+
+    parameters:
+        market — rival_engine.RivalMarket (для насыщения рынка)
+
+    returns:
+        Branch3State
+    """
+
+    rival_deals = ()
+
+    if rival is not None and rival.portfolio is not None:
+        rival_deals = tuple(_deal_tuple(d) for d in rival.portfolio.deals)
+
+    return Branch3State(
+        budget=player.budget,
+        deals=tuple(_deal_tuple(d) for d in player.portfolio.deals),
+        rival_budget=rival.budget if rival is not None else 0,
+        rival_deals=rival_deals,
+        bankrupt=player.is_bankrupt,
+        saturation=market.saturation() if market is not None else None
+    )
+
+
+def _spend(state, amount):
+    """
+    изменение бюджета с проверкой банкротства (как Player.change_budget)
+    """
+
+    budget = state.budget + amount
+
+    if budget <= 0:
+        return state._replace(budget=0, bankrupt=True)
+
+    return state._replace(budget=budget)
+
+
+def start_project(state, project_type, rng, cfg):
+    """
+    покупка машины под проект и розыгрыш события (roll_event)
+    """
+
+    info = cfg["project_types"][project_type]
+    events = cfg["events"]
+
+    price = rng.randint(*info["buy"])
+    freeze = rng.randint(*info["freeze"])
+    bonus = 0
+
+    roll = rng.random()
+
+    if roll < events["boost_chance"]:
+        freeze = max(1, freeze - 1)
+        bonus = rng.randint(*events["boost_bonus"])
+
+    elif roll < events["delay_chance"]:
+        freeze += 1
+        bonus = -rng.randint(*events["delay_penalty"])
+
+    state = _spend(state, -price)
+
+    deal = (project_type, price, freeze, 0, bonus)
+
+    return state._replace(deals=state.deals + (deal,))
+
+
+def abandon_project(state, index, rng, cfg):
+    """
+    досрочная продажа проекта с убытком
+    """
+
+    deals = state.deals[:index] + state.deals[index + 1:]
+    state = state._replace(deals=deals)
+
+    return _spend(state, -rng.randint(*cfg["abandon_loss"]))
+
+
+def _advance_deals(deals, rng, types, saturation=None, control=None):
+    """
+    продвигает проекты на ход и продаёт готовые
+
+    parameters:
+        control — список: в него дописываются отклонения
+                  выпавшей прибыли от середины диапазона
+
+    returns:
+        tuple (новые проекты, суммарная прибыль)
+    """
+
+    kept = []
+    income = 0
+
+    for deal in deals:
+        passed = deal[PASSED] + 1
+
+        if passed >= deal[FREEZE]:
+            low, high = types[deal[TYPE]]["profit"]
+            profit = rng.randint(low, high)
+
+            if control is not None:
+                control.append(profit - (low + high) / 2)
+
+            if saturation is not None:
+                profit = int(profit * saturation[deal[TYPE]])
+
+            income += profit + deal[BONUS]
+        else:
+            kept.append(deal[:PASSED] + (passed,) + deal[PASSED + 1:])
+
+    return tuple(kept), income
+
+
+def advance_turn(state, rng, cfg, control=None, rival_rng=None):
+    """
+    один ход ветки: продвижение проектов игрока и соперника
+
+    parameters:
+        control   — список отклонений прибыли игрока (_advance_deals)
+        rival_rng — поток прибыли соперника (None — rng); свой
+                    поток не даёт числу проектов игрока сдвигать
+                    броски соперника (common random numbers)
+    """
+
+    types = cfg["project_types"]
+
+    deals, income = _advance_deals(state.deals, rng, types, state.saturation, control)
+    rival_deals, rival_income = _advance_deals(
+        state.rival_deals, rng if rival_rng is None else rival_rng, types
+    )
+
+    state = state._replace(
+        deals=deals,
+        rival_deals=rival_deals,
+        rival_budget=state.rival_budget + rival_income
+    )
+
+    if income:
+        state = _spend(state, income)
+
+    return state
+
+
+def apply_action(state, action, rng, cfg):
+    """
+    применяет действие игрока:
+        ("wait", 0)         — ждать
+        ("start", тип)      — начать проект
+        ("abandon", индекс) — продать проект
+    """
+
+    kind, arg = action
+
+    if kind == "start":
+        return start_project(state, arg, rng, cfg)
+
+    if kind == "abandon":
+        return abandon_project(state, arg, rng, cfg)
+
+    return state
+
+
+def default_policy(state, rng, cfg, max_active=3):
+    """
+    стратегия игрока в прогонах:
+        запускает случайный проект, если после самой дорогой
+        покупки этого типа остаётся запас, иначе ждёт
+    """
+
+    if len(state.deals) >= max_active:
+        return WAIT
+
+    project_type = rng.randint(1, 3)
+    high = cfg["project_types"][project_type]["buy"][1]
+
+    if state.budget - high > high // 2:
+        return ("start", project_type)
+
+    return WAIT
+
+
+def cautious_policy(state, rng, cfg):
+    """
+    осторожная стратегия: как default_policy, но не больше
+    одного проекта одновременно
+    """
+
+    return default_policy(state, rng, cfg, max_active=1)
+
+
+def rollout_branch3(state, first_action, rng, win_target, horizon=20, cfg=None):
+    """
+    прогон партии ветки 3 после выбранного действия
+
+    returns:
+        tuple (итоговый бюджет, банкротство: bool)
+    """
+
+    if cfg is None:
+        cfg = get_balance()["branch3"]
+
+    state = apply_action(state, first_action, rng, cfg)
+
+    for _ in range(horizon):
+
+        if state.bankrupt:
+            return 0, True
+
+        state = advance_turn(state, rng, cfg)
+
+        if state.bankrupt:
+            return 0, True
+
+        if state.budget >= win_target:
+            break
+
+        state = apply_action(state, default_policy(state, rng, cfg), rng, cfg)
+
+    return state.budget, state.bankrupt
+
+
+# КОНФИГУРАЦИЯ БАЛАНСА
+def default_config():
+    """
+    изменяемая копия текущих таблиц баланса (balance.json)
+
+    returns:
+        dict — ключи таблиц целые, диапазоны — кортежи
+    """
+
+    return thaw(get_balance())
+
+
+def normalize_config(data):
+    """
+    приводит конфигурацию после JSON к виду симуляторов:
+    строковые числовые ключи → int, списки → кортежи
+    """
+
+    if isinstance(data, dict):
+        return {
+            (int(k) if isinstance(k, str) and k.lstrip("-").isdigit() else k):
+                normalize_config(v)
+            for k, v in data.items()
+        }
+
+    if isinstance(data, list):
+        return tuple(normalize_config(v) for v in data)
+
+    return data
+
+
+# ЦЕЛЫЕ ПАРТИИ
+def _deal_artifacts(deals):
+    """
+    маска артефактов за число завершённых сделок
+    """
+
+    mask = 0
+
+    if deals >= 1:
+        mask |= FIRST_DEAL
+
+    if deals >= 10:
+        mask |= TEN_DEALS
+
+    return mask
+
+
+def simulate_branch1(config, rng, policy="random", max_turns=500):
+    """
+    партия ветки 1 (переговоры)
+
+    policy:
+        "random" — случайная стратегия каждый раунд
+        1..4     — всегда одна и та же стратегия
+
+    сумма исхода — торг по решению за обе стороны
+    (negotiation.play_equilibrium)
+    """
+
+    config = config["branch1"]
+
+    matrix = config["outcome_matrix"]
+    budget = config["start_budget"]
+    target = config["win_target"]
+
+    deals = 0
+
+    for turn in range(1, max_turns + 1):
+        style = rng.randint(0, 2)
+        action = rng.randint(1, 4) if policy == "random" else policy
+
+        outcome = matrix[action][style]
+
+        if outcome != 0:
+            amount = play_equilibrium(get_negotiation(outcome, style, config), rng)
+
+            if amount is not None:
+                budget += amount
+                deals += 1
+
+        if budget <= 0:
+            return GameResult(False, True, turn, 0, _deal_artifacts(deals))
+
+        if budget >= target:
+            return GameResult(True, False, turn, budget, _deal_artifacts(deals))
+
+    return GameResult(False, False, max_turns, budget, _deal_artifacts(deals))
+
+
+def simulate_branch2(config, rng, policy="affordable", max_turns=500):
+    """
+    партия ветки 2 (перепродажа) — каждый поиск и каждый ход
+    заморозки считается ходом
+
+    policy:
+        "affordable" — покупать машину, если хватает денег, и ждать
+        "all"        — покупать каждую машину
+
+    рынок — ценовой индекс уровней (market_index): цена машины,
+    шанс заморозки и диапазон прибыли читаются из него, каждый
+    ход индекс сдвигается спросом игрока и случайным спросом
+    соперников (MarketIndex.skip, заморозка — одним шагом
+    на все её ходы); объявления идут из конвейера
+    listing_pipeline пачками, а цену и шанс заморозки по
+    индексу объявление получает в момент показа
+
+    книга заявок (calc_profit) — упрощённо: машина покупается
+    по цене объявления, продаётся после заморозки по цене
+    индекса уровня на этот момент, к прибыли добавляется
+    доля price_weight разницы цен
+    """
+
+    from listing_pipeline import QUALITY, items, random_source
+    from market_index import MarketIndex
+
+    config = config["branch2"]
+
+    budget = config["start_budget"]
+    target = config["win_target"]
+
+    index = MarketIndex(config)
+    price_weight = config["order_book"]["price_weight"]
+
+    market_rng = _stream(rng, "market")
+    deal_rng = _stream(rng, "deals")
+    profit_rng = _stream(rng, "profit")
+
+    deals = 0
+    earned = 0
+    control = 0.0
+
+    listings = items(random_source(_stream(rng, "listings"), config, limit=max_turns))
+
+    turn = 0
+
+    while turn < max_turns:
+        turn += 1
+        index.skip(1, market_rng, config)
+
+        # цена и шанс заморозки — по индексу на момент показа
+        quality = next(listings)[QUALITY]
+        price = index.price(quality, config)
+
+        if policy == "affordable" and price >= budget:
+            continue
+
+        budget -= price
+        index.record(quality, 1)
+
+        if budget <= 0:
+            return GameResult(False, True, turn, 0,
+                              earned | _deal_artifacts(deals), control)
+
+        rival_budget = deal_rng.randint(*config["rival_budget"])
+
+        if deal_rng.random() <= index.freeze_chance(quality, config):
+            frozen = deal_rng.randint(*config["freeze_durations"][quality])
+
+            turn += frozen
+            index.skip(frozen, market_rng, config)
+
+            if frozen >= 3:
+                earned |= LONG_PROJECT
+
+        # продажа лучшему покупателю — по текущей цене уровня
+        sale_price = index.price(quality, config)
+        index.record(quality, -1)
+
+        low, high = index.profit_range(quality, config)
+        amount = profit_rng.randint(low, high)
+        control += amount - (low + high) / 2
+
+        amount += int((sale_price - price) * price_weight)
+        deals += 1
+
+        if amount >= 100_000:
+            earned |= BIG_PROFIT
+
+        # влияние соперника (apply_profit)
+        if rival_budget > budget:
+            amount = int(amount * 0.85)
+        elif rival_budget < budget:
+            amount = int(amount * 1.10)
+
+        budget += amount
+
+        if budget <= 0:
+            return GameResult(False, True, turn, 0,
+                              earned | _deal_artifacts(deals), control)
+
+        if budget >= target:
+            return GameResult(True, False, turn, budget,
+                              earned | _deal_artifacts(deals), control)
+
+    return GameResult(False, False, turn, budget,
+                      earned | _deal_artifacts(deals), control)
+
+
+def simulate_branch3(config, rng, policy=default_policy, max_turns=200):
+    """
+    партия ветки 3 (портфель) без рынка соперников
+    """
+
+    config = config["branch3"]
+    target = config["win_target"]
+
+    state = Branch3State(
+        budget=config["start_budget"],
+        deals=(),
+        rival_budget=0,
+        rival_deals=(),
+        bankrupt=False,
+        saturation=None
+    )
+
+    policy_rng = _stream(rng, "policy")
+    project_rng = _stream(rng, "projects")
+    profit_rng = _stream(rng, "profit")
+    rival_rng = _stream(rng, "rival_profit")
+
+    deals = 0
+    earned = 0
+    control = []
+
+    for turn in range(1, max_turns + 1):
+
+        # проекты, которые завершатся на этом ходу
+        for deal in state.deals:
+            if deal[PASSED] + 1 >= deal[FREEZE]:
+                deals += 1
+
+                if deal[TYPE] == 3:
+                    earned |= LONG_PROJECT
+
+        state = advance_turn(state, profit_rng, config, control, rival_rng)
+
+        if state.bankrupt:
+            return GameResult(False, True, turn, 0,
+                              earned | _deal_artifacts(deals), sum(control))
+
+        if state.budget >= target:
+            return GameResult(True, False, turn, state.budget,
+                              earned | _deal_artifacts(deals), sum(control))
+
+        active = len(state.deals)
+        state = apply_action(state, policy(state, policy_rng, config), project_rng, config)
+
+        # новый проект: отклонение цены покупки от средней по таблице
+        if len(state.deals) > active:
+            deal = state.deals[-1]
+            low, high = config["project_types"][deal[TYPE]]["buy"]
+            control.append((low + high) / 2 - deal[BUY])
+
+        if state.bankrupt:
+            return GameResult(False, True, turn, 0,
+                              earned | _deal_artifacts(deals), sum(control))
+
+    return GameResult(False, False, max_turns, state.budget,
+                      earned | _deal_artifacts(deals), sum(control))
+
+
+SIMULATORS = {
+    1: simulate_branch1,
+    2: simulate_branch2,
+    3: simulate_branch3
+}
+
+# стратегии веток: имя → аргумент policy симулятора
+POLICIES = {
+    1: {"random": "random", "1": 1, "2": 2, "3": 3, "4": 4},
+    2: {"affordable": "affordable", "all": "all"},
+    3: {"default": default_policy, "cautious": cautious_policy},
+}
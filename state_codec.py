@@ -0,0 +1,696 @@
+"""
+компактный кодек состояния сущностей для процессов пула и снимков
+
+зачем:
+    start_project задаёт deal.owner = player, поэтому граф
+    сущностей замкнут: Player → Portfolio → Deal → Player;
+    pickle такого графа по умолчанию пишет для каждого объекта
+    путь класса и словарь слотов с именами полей, а циклы
+    держит в memo — получается медленно и объёмно
+
+формат (все числа — little-endian):
+    - заголовок HEADER: CODEC_VERSION, флаги ширины, число
+      сущностей набора, всех сущностей, всех сделок
+    - столбцы сущностей фиксированной ширины: вид, номер имени,
+      бюджет, роль и биты, стиль, режим, число сделок портфеля
+    - столбцы сделок: type, buy_price, freeze_turns, passed,
+      bonus_profit — сделки портфелей идут подряд в порядке
+      сущностей
+    - все столбцы — одна запись struct, формат которой зависит
+      только от числа сущностей и сделок (и кэшируется), поэтому
+      и маленький набор, и большой пишутся и читаются одним вызовом
+    - редкие поля одним блоком marshal: таблица имён,
+      непустая статистика, win_target и поля рынка, артефакты
+      (номера в каталоге artifacts.ARTIFACTS), владельцы-исключения
+      и ссылки на повторные вхождения
+
+    деньги (бюджет, цена, бонус) пишутся 32-битными, если
+    влезают, иначе все денежные столбцы 64-битные (WIDE_MONEY);
+    так же расширяются номера имён и размеры портфелей
+
+владельцы и ссылки:
+    у сущностей набора есть номера (ID) — позиции в наборе;
+    владелец сделки по умолчанию — хозяин портфеля, поэтому
+    номер пишется только для исключений; циклов в кодировке нет;
+    владелец, которого нет в наборе, добавляется в его конец
+    и восстанавливается вместе с остальными
+
+    каждый объект (сущность, портфель, сделка) интернируется
+    по id: первое вхождение — основное, повторное пишется так же
+    (раскладка столбцов от этого не меняется), но со ссылкой
+    на первое, и decode подставляет один и тот же объект —
+    сделка, переданная и отдельно, и в портфеле, остаётся одной
+
+ограничения:
+    формат marshal зависит от версии Python — кодек для
+    передачи состояния между процессами одной установки
+    и временных снимков; долговременные сохранения остаются
+    в JSON (save_system)
+
+    советник ветки 3 (advisor) шлёт в пул не сущности,
+    а плоский simulation.Branch3State: кортеж чисел меньше
+    любого снимка сущностей и не требует декодирования
+
+запуск замера:
+    python state_codec.py [соперников]
+
+    замер печатает, выполнена ли цель (в TARGET_GAIN раз против
+    pickle) по размеру, записи и чтению; у маленького набора
+    (игрок и соперник) скорость цель не выполняет — разбор
+    заголовка и marshal стоят сравнимо со всем pickle.loads;
+    у большого чтение быстрее в 5 раз, пока pickle платит за
+    сборку мусора, и примерно в 2 раза без неё: каждый объект
+    собирается в Python по полю, а pickle делает это в C
+
+функции модуля:
+    encode — сущности → bytes
+    decode — bytes → сущности (с восстановленными владельцами)
+"""
+
+
+import marshal
+import struct
+
+from functools import lru_cache
+
+from artifacts import ARTIFACTS, get_artifact_by_id
+from player import RIVAL_CLASSES, Deal, DealStats, MarketRival, Player, Portfolio, Rival
+
+
+# версия раскладки
+CODEC_VERSION = 3
+
+# версия, флаги, сущностей набора, всех сущностей, сделок
+HEADER = struct.Struct("<BBIII")
+
+# флаги ширины
+WIDE_NAMES = 1
+WIDE_MONEY = 2
+WIDE_SIZES = 4
+WIDE_TURNS = 8
+
+# виды сущностей
+PLAYER, RIVAL, PORTFOLIO, DEAL = range(4)
+
+# биты сущности (роль — в старших битах того же байта)
+BANKRUPT = 1
+HAS_PORTFOLIO = 2
+EMPTY_STATS = 4
+ROLE_SHIFT = 3
+
+# номер владельца, которого нет
+NO_OWNER = -1
+
+# места объектов для ссылок: слот набора, портфель слота, строка сделки
+ENTITY_AT, PORTFOLIO_AT, DEAL_AT = range(3)
+
+# артефакт → номер в каталоге
+ARTIFACT_IDS = tuple(ARTIFACTS)
+_ARTIFACT_NUMBERS = {artifact_id: i for i, artifact_id in enumerate(ARTIFACT_IDS)}
+
+
+@lru_cache(maxsize=64)
+def _layout(entities, deals, flags):
+    """
+    запись struct всех столбцов для данного размера набора
+    """
+
+    name = "I" if flags & WIDE_NAMES else "H"
+    money = "q" if flags & WIDE_MONEY else "i"
+    size = "I" if flags & WIDE_SIZES else "H"
+    turns = "H" if flags & WIDE_TURNS else "B"
+
+    entity_codes = ("B", name, money, "B", "b", "B", size)
+    deal_codes = ("B", money, turns, turns, money)
+
+    return struct.Struct("<" + "".join(
+        [f"{entities}{code}" for code in entity_codes]
+        + [f"{deals}{code}" for code in deal_codes]
+    ))
+
+
+# КОДИРОВАНИЕ
+_STAT_FIELDS = ("count", "total", "min_amount", "max_amount", "mean", "_m2", "wins", "losses")
+
+
+def _replayed(amounts):
+    """
+    поля _STAT_FIELDS после record() каждой суммы по порядку —
+    та же арифметика, что в DealStats.record
+    """
+
+    count = total = wins = losses = 0
+    mean = m2 = 0.0
+
+    for amount in amounts:
+        count += 1
+        total += amount
+
+        delta = amount - mean
+        mean += delta / count
+        m2 += delta * (amount - mean)
+
+        if amount > 0:
+            wins += 1
+        elif amount < 0:
+            losses += 1
+
+    if not count:
+        return (0, 0, None, None, 0.0, 0.0, 0, 0)
+
+    return (count, total, min(amounts), max(amounts), mean, m2, wins, losses)
+
+
+def _pack_stats(stats):
+    totals = tuple(getattr(stats, field) for field in _STAT_FIELDS)
+
+    if stats.recent is not None and stats.count == len(stats.recent):
+        # вся история — в recent: пишутся только суммы сделок,
+        # decode пересчитывает остальное (проверено здесь же)
+        branches = tuple(stats.by_branch) if stats.by_branch is not None else ()
+        amounts = tuple(stats.recent)
+
+        if len(branches) <= 1 and _replayed(amounts) == totals and \
+                all(_pack_stats(sub) == totals + (None, None) for sub in (stats.by_branch or {}).values()):
+            return (stats.recent.maxlen, amounts, branches[0] if branches else None) \
+                if stats.by_branch is not None else (stats.recent.maxlen, amounts)
+
+    recent = None if stats.recent is None else (stats.recent.maxlen, tuple(stats.recent))
+    by_branch = None
+
+    if stats.by_branch is not None:
+        by_branch = []
+
+        for branch, sub in stats.by_branch.items():
+            if sub.recent is None and sub.by_branch is None and \
+                    tuple(getattr(sub, field) for field in _STAT_FIELDS) == totals:
+                # вся статистика — одной ветки: только номер
+                by_branch.append((branch,))
+            else:
+                by_branch.append((branch, _pack_stats(sub)))
+
+        by_branch = tuple(by_branch)
+
+    return totals + (recent, by_branch)
+
+
+def _is_empty(stats):
+    """
+    статистика как у свежего DealStats() — не пишется
+    """
+
+    return stats.count == 0 and stats.recent is None and stats.by_branch is None
+
+
+def encode(objects):
+    """
+    кодирует набор сущностей
+
+    parameters:
+        objects — Player / Rival / Portfolio / Deal (в любом
+                  сочетании); владельцы сделок, которых нет
+                  в наборе, добавляются в него
+
+    returns:
+        bytes
+
+    raises:
+        TypeError — в наборе объект другого типа или нецелые деньги
+    """
+
+    objects = list(objects)
+    count = len(objects)
+
+    ids = {}
+
+    for i, obj in enumerate(objects):
+        ids.setdefault(id(obj), i)
+
+    # id(портфель / сделка) → первое место
+    seen = {}
+    links = {}
+
+    names = {}
+    kinds, name_ids, budgets, bits, styles, modes, sizes = ([] for _ in range(7))
+    types, prices, freezes, passes, bonuses = ([] for _ in range(5))
+
+    stats = {}
+    extras = {}
+    artifact_numbers = {}
+    owners = {}
+
+    # список растёт, пока встречаются новые владельцы
+    i = 0
+
+    while i < len(objects):
+        obj = objects[i]
+        holder = None
+        deals = ()
+        portfolio = None
+
+        if ids[id(obj)] != i:
+            links[ENTITY_AT, i] = (ENTITY_AT, ids[id(obj)])
+
+        if isinstance(obj, Player):
+            rival = isinstance(obj, Rival)
+            holder = obj
+            portfolio = obj.portfolio
+            flag = (BANKRUPT if obj.is_bankrupt else 0) | obj.role << ROLE_SHIFT
+
+            if portfolio is not None:
+                flag |= HAS_PORTFOLIO
+                deals = portfolio.deals
+
+            if _is_empty(obj.completed_deals):
+                flag |= EMPTY_STATS
+            else:
+                stats[i] = _pack_stats(obj.completed_deals)
+
+            if obj.win_target is not None or type(obj) is MarketRival:
+                extras[i] = (obj.win_target, obj.state, obj.profit_range, obj.profit) \
+                    if rival else (obj.win_target,)
+
+            if obj.artifacts:
+                artifact_numbers[i] = tuple(
+                    _ARTIFACT_NUMBERS.get(a.artifact_id, a.artifact_id) for a in obj.artifacts
+                )
+
+            name_ids.append(names.setdefault(obj.name, len(names)))
+            kinds.append(RIVAL if rival else PLAYER)
+            budgets.append(obj.budget)
+            bits.append(flag)
+            styles.append(obj.style if rival else 0)
+            modes.append(obj.mode if rival else 0)
+
+        elif isinstance(obj, (Portfolio, Deal)):
+            if isinstance(obj, Portfolio):
+                kinds.append(PORTFOLIO)
+                portfolio = obj
+                deals = obj.deals
+            else:
+                kinds.append(DEAL)
+                deals = (obj,)
+
+            name_ids.append(0)
+            budgets.append(0)
+            bits.append(0)
+            styles.append(0)
+            modes.append(0)
+
+        else:
+            raise TypeError(f"кодек не знает тип {type(obj).__name__}")
+
+        if portfolio is not None:
+            first = seen.setdefault(id(portfolio), (PORTFOLIO_AT, i))
+
+            if first != (PORTFOLIO_AT, i):
+                links[PORTFOLIO_AT, i] = first
+
+        sizes.append(len(deals))
+
+        for deal in deals:
+            row = len(types)
+            first = seen.setdefault(id(deal), (DEAL_AT, row))
+
+            if first != (DEAL_AT, row):
+                links[DEAL_AT, row] = first
+
+            owner = deal.owner
+
+            if owner is not holder:
+                if owner is None:
+                    number = NO_OWNER
+                else:
+                    number = ids.get(id(owner))
+
+                    if number is None:
+                        # владелец вне набора — едет в конце набора
+                        number = ids[id(owner)] = len(objects)
+                        objects.append(owner)
+
+                owners[row] = number
+
+            types.append(deal.type)
+            prices.append(deal.buy_price)
+            freezes.append(deal.freeze_turns)
+            passes.append(deal.passed)
+            bonuses.append(deal.bonus_profit)
+
+        i += 1
+
+    flags = (WIDE_NAMES if len(names) > 0xFFFF else 0) | \
+        (WIDE_SIZES if sizes and max(sizes) > 0xFFFF else 0) | \
+        (WIDE_TURNS if types and max(max(freezes), max(passes)) > 0xFF else 0)
+
+    values = (*kinds, *name_ids, *budgets, *bits, *styles, *modes, *sizes,
+              *types, *prices, *freezes, *passes, *bonuses)
+
+    try:
+        body = _layout(len(objects), len(types), flags).pack(*values)
+    except struct.error:
+        # деньги не влезли в 32 бита (или не целые)
+        flags |= WIDE_MONEY
+
+        try:
+            body = _layout(len(objects), len(types), flags).pack(*values)
+        except struct.error as error:
+            raise TypeError(f"кодек: поле сущности не целое или вне диапазона ({error})") from None
+
+    # пустой словарь — None (байт вместо двух)
+    rare = marshal.dumps((tuple(names),) + tuple(
+        part or None for part in (stats, extras, artifact_numbers, owners, links)
+    ))
+
+    return HEADER.pack(CODEC_VERSION, flags, count, len(objects), len(types)) + body + rare
+
+
+# ДЕКОДИРОВАНИЕ
+def _fill_stats(stats, totals):
+    (stats.count, stats.total, stats.min_amount, stats.max_amount,
+     stats.mean, stats._m2, stats.wins, stats.losses) = totals
+
+
+def _unpack_stats(data):
+    if len(data) <= 3:
+        # история целиком: (maxlen, суммы[, ветка])
+        stats = DealStats(recent_size=data[0], track_branches=len(data) == 3)
+        totals = _replayed(data[1])
+        _fill_stats(stats, totals)
+        stats.recent.extend(data[1])
+
+        if len(data) == 3 and data[2] is not None:
+            stats.by_branch[data[2]] = DealStats()
+            _fill_stats(stats.by_branch[data[2]], totals)
+
+        return stats
+
+    totals, (recent, by_branch) = data[:8], data[8:]
+
+    stats = DealStats(
+        recent_size=recent[0] if recent is not None else 0,
+        track_branches=by_branch is not None
+    )
+
+    _fill_stats(stats, totals)
+
+    if recent is not None:
+        stats.recent.extend(recent[1])
+
+    if by_branch is not None:
+        for branch, *sub in by_branch:
+            if sub:
+                stats.by_branch[branch] = _unpack_stats(sub[0])
+            else:
+                stats.by_branch[branch] = DealStats()
+                _fill_stats(stats.by_branch[branch], totals)
+
+    return stats
+
+
+def _artifacts(numbers):
+    found = []
+
+    for number in numbers:
+        artifact = get_artifact_by_id(
+            ARTIFACT_IDS[number] if isinstance(number, int) and number < len(ARTIFACT_IDS) else number
+        )
+
+        if artifact:
+            found.append(artifact)
+
+    return found
+
+
+def decode(data):
+    """
+    восстанавливает набор сущностей из encode()
+
+    returns:
+        list — сущности в порядке encode() (добавленные
+               владельцы не возвращаются, но сделки ссылаются
+               на них)
+
+    raises:
+        ValueError — данные другой версии кодека или повреждены
+    """
+
+    try:
+        version, flags, count, total, deal_count = HEADER.unpack_from(data)
+    except struct.error as error:
+        raise ValueError(f"повреждённые данные состояния: {error}") from None
+
+    if version != CODEC_VERSION:
+        raise ValueError(f"версия кодека {version}, ожидалась {CODEC_VERSION}")
+
+    layout = _layout(total, deal_count, flags)
+
+    try:
+        values = layout.unpack_from(data, HEADER.size)
+        names, *parts = marshal.loads(data[HEADER.size + layout.size:])
+        stats, extras, artifact_numbers, owners, links = (part or {} for part in parts)
+    except (struct.error, EOFError, ValueError, TypeError) as error:
+        raise ValueError(f"повреждённые данные состояния: {error}") from None
+
+    columns = [values[k * total:(k + 1) * total] for k in range(7)]
+    base = 7 * total
+    deal_rows = zip(*(values[base + k * deal_count:base + (k + 1) * deal_count] for k in range(5)))
+
+    if sum(columns[-1]) != deal_count:
+        raise ValueError("повреждённые данные состояния: число сделок не сходится")
+
+    new = object.__new__
+
+    entities = []
+    flat = []
+
+    for i, (kind, name, budget, flag, style, mode, size) in enumerate(zip(*columns)):
+        if kind == PLAYER or kind == RIVAL:
+            if kind == RIVAL:
+                entity = new(RIVAL_CLASSES.get(mode, Rival))
+                entity.style = style
+                entity.mode = mode
+                entity.artifacts = ()
+            else:
+                entity = new(Player)
+                entity.artifacts = _artifacts(artifact_numbers.get(i, ()))
+
+            entity.name = names[name]
+            entity.budget = budget
+            entity.role = flag >> ROLE_SHIFT
+            entity.is_bankrupt = bool(flag & BANKRUPT)
+            entity.completed_deals = DealStats() if flag & EMPTY_STATS else _unpack_stats(stats[i])
+
+            extra = extras.get(i)
+            entity.win_target = extra[0] if extra else None
+
+            if extra and len(extra) > 1 and mode == 2:
+                entity.state, entity.profit_range, entity.profit = extra[1:]
+
+            holder = entity
+            portfolio = entity.portfolio = Portfolio() if flag & HAS_PORTFOLIO else None
+
+        elif kind == PORTFOLIO:
+            holder = None
+            portfolio = entity = Portfolio()
+
+        elif kind == DEAL:
+            holder = portfolio = None
+            entity = None
+
+        else:
+            raise ValueError(f"неизвестный вид сущности: {kind}")
+
+        deals = []
+
+        for _ in range(size):
+            deal = new(Deal)
+            deal.type, deal.buy_price, deal.freeze_turns, deal.passed, deal.bonus_profit = next(deal_rows)
+            deal.owner = holder
+            deals.append(deal)
+
+        flat.extend(deals)
+
+        if portfolio is not None:
+            portfolio.deals = deals
+        elif entity is None:
+            entity = deals[0]
+
+        entities.append(entity)
+
+    for row, number in owners.items():
+        flat[row].owner = None if number == NO_OWNER else entities[number]
+
+    if links:
+        _resolve_links(entities, flat, columns[0], columns[-1], links)
+
+    return entities[:count]
+
+
+def _resolve_links(entities, flat, kinds, sizes, links):
+    """
+    повторные вхождения → первые объекты (см. «владельцы и ссылки»)
+    """
+
+    def portfolio_of(i):
+        entity = entities[i]
+        return entity if kinds[i] == PORTFOLIO else entity.portfolio
+
+    # строка сделки → (список портфеля или None, позиция)
+    slots = []
+    deal_rows = {}
+
+    for i, kind in enumerate(kinds):
+        if kind == DEAL:
+            deal_rows[i] = len(slots)
+            slots.append((None, 0))
+        elif sizes[i]:
+            deals = portfolio_of(i).deals
+            slots.extend((deals, slot) for slot in range(sizes[i]))
+
+    for (place, index), (_, first) in links.items():
+        if place == DEAL_AT:
+            deal = flat[index] = flat[first]
+            deals, slot = slots[index]
+
+            if deals is not None:
+                deals[slot] = deal
+
+    for i, row in deal_rows.items():
+        entities[i] = flat[row]
+
+    for (place, index), (_, first) in links.items():
+        if place == PORTFOLIO_AT:
+            if kinds[index] == PORTFOLIO:
+                entities[index] = portfolio_of(first)
+            else:
+                entities[index].portfolio = portfolio_of(first)
+
+    for (place, index), (_, first) in links.items():
+        if place == ENTITY_AT:
+            entities[index] = entities[first]
+
+
+# ЗАМЕР
+def _sample_world(rivals, deals_each=3):
+    """
+    игрок ветки 3 и rivals соперников (имена — стили из баланса,
+    как в create_rival, каждый десятый — рыночный), у всех —
+    портфели со сделками, владельцы сделок заданы (как в start_project)
+    """
+
+    from balance import get_balance
+
+    styles = get_balance()["branch3"]["rival_styles"]
+
+    player = Player("bench_player", budget=450_000, role=3)
+    player.win_target = 900_000
+    player.artifacts = [get_artifact_by_id("first_deal"), get_artifact_by_id("big_profit")]
+
+    for amount in (12_000, -4_000, 30_500, 8_000):
+        player.completed_deals.record(amount, branch=3)
+
+    world = [player]
+    world.extend(
+        Rival(name=styles[i % 3], style=i % 3, mode=2 if i % 10 == 9 else 3,
+              budget=300_000 + i)
+        for i in range(rivals)
+    )
+
+    for entity in world:
+        entity.portfolio = Portfolio()
+
+        for k in range(deals_each):
+            deal = Deal(k % 3 + 1, 90_000 + 1000 * k, 2 + k)
+            deal.passed = k % 2
+            deal.bonus_profit = -5000 if k == 2 else 0
+            deal.owner = entity
+            entity.portfolio.add(deal)
+
+    return world
+
+
+# цель кодека: во столько раз меньше и быстрее pickle
+TARGET_GAIN = 5
+
+
+def _time(func, repeats):
+    import time
+
+    best = None
+
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def benchmark(rivals=10_000):
+    """
+    размер и скорость кодека против pickle (протокол по умолчанию)
+    на двух наборах: состояние ветки 3 (игрок и соперник)
+    и рынок из rivals соперников
+    """
+
+    import pickle
+
+    cases = (
+        ("игрок + соперник (ветка 3)", _sample_world(1), 2000),
+        (f"рынок: {rivals} соперников", _sample_world(rivals), 5),
+    )
+
+    print("кодек состояния против pickle (лучшее из повторов)")
+
+    for title, world, repeats in cases:
+        pickled = pickle.dumps(world)
+        packed = encode(world)
+
+        # проверка: тот же граф после круга
+        restored = decode(packed)
+        assert pickle.dumps(restored) == pickled
+        assert all(d.owner is restored[0] for d in restored[0].portfolio.deals)
+
+        # сделка и отдельно, и в портфеле — один объект
+        deal = world[-1].portfolio.deals[0]
+        shared = decode(encode([deal, world[-1]]))
+        assert shared[0] is shared[1].portfolio.deals[0] and shared[0].owner is shared[1]
+
+        times = {
+            "pickle": (
+                _time(lambda: pickle.dumps(world), repeats),
+                _time(lambda: pickle.loads(pickled), repeats)
+            ),
+            "кодек": (
+                _time(lambda: encode(world), repeats),
+                _time(lambda: decode(packed), repeats)
+            ),
+        }
+
+        print(f"\n  {title}")
+        print(f"    {'':<8} {'байт':>10} {'запись, мкс':>13} {'чтение, мкс':>13}")
+
+        for name, size in (("pickle", len(pickled)), ("кодек", len(packed))):
+            dump, load = times[name]
+            print(f"    {name:<8} {size:>10} {dump * 1e6:>13.1f} {load * 1e6:>13.1f}")
+
+        (pickle_dump, pickle_load), (codec_dump, codec_load) = times["pickle"], times["кодек"]
+
+        gains = (
+            ("размер", len(pickled) / len(packed)),
+            ("запись", pickle_dump / codec_dump),
+            ("чтение", pickle_load / codec_load),
+        )
+
+        print(f"    меньше в {gains[0][1]:.1f} раза, запись быстрее "
+              f"в {gains[1][1]:.1f}, чтение — в {gains[2][1]:.1f}")
+        print(f"    цель ×{TARGET_GAIN}: " + ", ".join(
+            f"{name} — {'да' if gain >= TARGET_GAIN else 'нет'}" for name, gain in gains
+        ))
+
+
+if __name__ == "__main__":
+    import sys
+
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
@@ -0,0 +1,40 @@
+"""
+общие фикстуры тестов
+"""
+
+
+import os
+import sys
+
+import pytest
+
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    """
+    пустая папка storage во временном каталоге
+    (пути хранилища в модулях относительные)
+    """
+
+    import artifact_storage
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(artifact_storage, "_storage_ready", False)
+
+    return tmp_path / "storage"
+
+
+@pytest.fixture
+def serial(monkeypatch):
+    """
+    без пула процессов: задачи считаются в этом процессе
+    """
+
+    import sim_results
+    import simulation
+
+    monkeypatch.setattr(simulation, "get_pool", lambda: None)
+    monkeypatch.setattr(sim_results, "get_pool", lambda: None)
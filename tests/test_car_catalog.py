@@ -0,0 +1,131 @@
+"""
+каталог объявлений: запросы по индексу совпадают с перебором,
+продажи переживают перезапуск
+"""
+
+
+import random
+
+import pytest
+
+import car_catalog
+
+from car_catalog import generate, load_csv, save_csv
+
+
+def _scan(catalog, min_quality=None, max_quality=None, min_price=None,
+          max_price=None, max_risk=None, style=None):
+    found = []
+
+    for i in range(len(catalog)):
+        q, price = catalog.quality[i], catalog.price[i]
+
+        if catalog.sold[i]:
+            continue
+        if min_quality is not None and q < min_quality or max_quality is not None and q > max_quality:
+            continue
+        if min_price is not None and price < min_price or max_price is not None and price > max_price:
+            continue
+        if max_risk is not None and catalog.risk[i] > max_risk:
+            continue
+        if style is not None and catalog.style[i] != style:
+            continue
+
+        found.append(i)
+
+    return found
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    catalog = generate(3000, random.Random(1))
+    rng = random.Random(2)
+
+    for i in rng.sample(range(len(catalog)), 700):
+        catalog.mark_sold(i)
+
+    return catalog
+
+
+FILTERS = [
+    {},
+    {"min_quality": 1, "max_quality": 2},
+    {"min_price": 100_000, "max_price": 130_000},
+    {"max_quality": 1, "max_price": 90_000, "style": 2},
+    {"max_risk": 0.4},
+    {"min_quality": 1, "max_risk": 0.5, "style": 0},
+]
+
+
+@pytest.mark.parametrize("bounds", FILTERS)
+def test_count_and_find_equal_scan(catalog, bounds):
+    expected = _scan(catalog, **bounds)
+
+    assert catalog.count(**bounds) == len(expected)
+    assert set(catalog.find(limit=len(catalog), **bounds)) == set(expected)
+
+
+@pytest.mark.parametrize("bounds", FILTERS)
+def test_draw_returns_matching(catalog, bounds):
+    expected = set(_scan(catalog, **bounds))
+    rng = random.Random(3)
+
+    assert expected
+
+    for _ in range(50):
+        assert catalog.draw(rng, **bounds) in expected
+
+
+def test_draw_fallback_is_uniform(catalog, monkeypatch):
+    import car_catalog
+
+    # без случайных попыток выбор идёт только через перебор
+    monkeypatch.setattr(car_catalog, "DRAW_ATTEMPTS", 0)
+
+    bounds = {"min_quality": 1, "max_quality": 1, "max_price": 88_724, "style": 2}
+    expected = _scan(catalog, **bounds)
+    rng = random.Random(4)
+
+    draws = 200 * len(expected)
+    hits = {i: 0 for i in expected}
+
+    for _ in range(draws):
+        hits[catalog.draw(rng, **bounds)] += 1
+
+    # каждое объявление — около 200 раз, а не только дешёвые
+    assert min(hits.values()) > 120 and max(hits.values()) < 290
+
+
+def test_csv_keeps_sold_flags(catalog, tmp_path):
+    path = str(tmp_path / "catalog.csv")
+    save_csv(catalog, path)
+
+    loaded = load_csv(path)
+
+    assert loaded.sold == catalog.sold
+    assert loaded.count() == catalog.count()
+
+
+def test_csv_without_sold_column(tmp_path):
+    path = tmp_path / "catalog.csv"
+    path.write_text("quality,price,risk,style\n1,90000,0.45,0\n2,120000,0.55,2\n", encoding="utf-8")
+
+    loaded = load_csv(str(path))
+
+    assert len(loaded) == 2 and loaded.sold_count == 0
+
+
+def test_game_sales_survive_restart(storage, monkeypatch):
+    monkeypatch.setattr(car_catalog, "CATALOG_SIZE", 500)
+    monkeypatch.setattr(car_catalog, "_catalog", None)
+
+    for i in (3, 17, 17, 250):
+        car_catalog.sell_listing(i)
+
+    # новый запуск: журнал продаж переносится в файл каталога
+    monkeypatch.setattr(car_catalog, "_catalog", None)
+    restored = car_catalog.get_catalog()
+
+    assert [i for i in range(len(restored)) if restored.sold[i]] == [3, 17, 250]
+    assert not (storage / "catalog_sold.txt").exists()
+    assert load_csv(car_catalog.CATALOG_FILE).sold == restored.sold
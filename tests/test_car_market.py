@@ -0,0 +1,111 @@
+"""
+книга заявок: приоритет цены, затем времени; сделка
+по цене стоящей заявки
+"""
+
+
+import random
+
+from car_market import BUY, SELL, OrderBook
+
+
+def _book():
+    return OrderBook({0: 100, 1: 200})
+
+
+def test_price_then_time_priority():
+    book = _book()
+
+    book.submit("a", SELL, 0, 105, ttl=0)
+    book.submit("b", SELL, 0, 101)
+    book.submit("c", SELL, 0, 101)
+
+    trades = book.submit("buyer", BUY, 0, 110, qty=3)
+
+    assert trades == [(101, 1, "buyer", "b"), (101, 1, "buyer", "c"), (105, 1, "buyer", "a")]
+    assert book.last[0] == 105 and book.volume[0] == 3
+    assert book.take_flow() == [3, 0]
+
+
+def test_limit_and_rest():
+    book = _book()
+
+    book.submit("s", SELL, 1, 220, qty=2)
+
+    assert book.submit("b", BUY, 1, 210) == []
+    assert book.best(BUY, 1) == 210
+    assert book.depth(1) == (1, 2)
+
+    # продажа по рынку исполняется по цене стоящей покупки
+    assert book.sell_car("me", 1) == 210
+    assert book.best(BUY, 1) is None
+
+
+def test_player_orders_do_not_rest():
+    book = _book()
+
+    assert book.buy_car("me", 0, 150) is None
+    assert book.depth(0) == (0, 0)
+
+    book.submit("s", SELL, 0, 140)
+    assert book.buy_car("me", 0, 130) is None
+    assert book.buy_car("me", 0, 150) == 140
+
+
+def test_cancel_and_expiry():
+    book = _book()
+
+    book.submit("s1", SELL, 0, 90, ttl=2)
+    book.submit("s2", SELL, 0, 95)
+    book.submit("s3", SELL, 0, 80)
+
+    assert book.cancel(book.seq)
+
+    # s1 живёт 2 заявки: к покупке (4-я заявка) она истекла
+    assert book.buy_car("me", 0, 100) == 95
+    assert book.best(SELL, 0) is None
+
+
+def test_matching_equals_naive_book():
+    rng = random.Random(3)
+    book = _book()
+
+    # наивная книга: список живых заявок, лучшая ищется перебором
+    naive = []
+    naive_trades = []
+
+    for seq in range(1, 3001):
+        side = BUY if rng.random() < 0.5 else SELL
+        price = rng.randint(90, 110)
+        qty = rng.randint(1, 3)
+        owner = f"o{seq}"
+
+        trades = book.submit(owner, side, 0, price, qty=qty)
+
+        before = len(naive_trades)
+        left = qty
+
+        while left:
+            live = [o for o in naive if o[1] != side and (
+                o[2] <= price if side == BUY else o[2] >= price)]
+
+            if not live:
+                break
+
+            best = min(live, key=lambda o: (o[2] if side == BUY else -o[2], o[4]))
+            fill = min(left, best[3])
+            left -= fill
+            best[3] -= fill
+
+            buyer, seller = (owner, best[0]) if side == BUY else (best[0], owner)
+            naive_trades.append((best[2], fill, buyer, seller))
+
+            if not best[3]:
+                naive.remove(best)
+
+        if left:
+            naive.append([owner, side, price, left, seq])
+
+        assert trades == naive_trades[before:]
+
+    assert sum(book.volume.values()) == sum(t[1] for t in naive_trades)
@@ -0,0 +1,51 @@
+"""
+аналитика журнала: сводка по сегментам равна сводке
+одним сегментом
+"""
+
+
+import json
+
+import pytest
+
+from event_analytics import Query, analyze
+
+
+def _write_log(directory):
+    directory.mkdir()
+    lines = []
+
+    for i in range(400):
+        record = {
+            "ts": 1_700_000_000 + i,
+            "user": f"user{i % 3}",
+            "kind": ("project_done", "deal", "project_start")[i % 3 if i % 7 else 0],
+            "branch": 2 + i % 2,
+            "type": i % 4,
+            "amount": (i * 37) % 1000 - 300
+        }
+        lines.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+
+        # оборванная запись
+        if i % 53 == 0:
+            lines.append('{"kind":"deal","amount":')
+
+    (directory / "events_2026-10-01.jsonl").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+@pytest.mark.parametrize("query", [
+    Query(by=("kind",)),
+    Query(kind="project_done", by=("type",)),
+    Query(kind="deal", user="user1", by=("branch",)),
+    Query(kind="project_start", where=(("type", "3"),), by=("user",)),
+])
+@pytest.mark.parametrize("segment_size", [7, 37, 1000, 4096])
+def test_segmented_scan_equals_serial(tmp_path, serial, query, segment_size):
+    directory = tmp_path / "events"
+    _write_log(directory)
+
+    whole = analyze(query, str(directory), segment_size=1 << 30)
+    segmented = analyze(query, str(directory), segment_size=segment_size)
+
+    assert segmented == whole
+    assert whole["lines"] > 0
@@ -0,0 +1,92 @@
+"""
+ценовой индекс: ленивый сдвиг (skip / _catch_up) совпадает
+с пошаговым ходом — точно без шума и по среднему и дисперсии
+с шумом; чтение оценок не трогает индекс игры
+"""
+
+
+import random
+import statistics
+
+import pytest
+
+import market_index
+
+from balance import get_balance, thaw
+from listing_pipeline import random_source, score_listings
+from market_index import MarketIndex
+
+
+TURNS = 12
+START = 1.3
+FLOW = 15
+
+
+def _cfg(**price_index):
+    cfg = thaw(get_balance())["branch2"]
+    cfg["price_index"].update(price_index)
+
+    return cfg
+
+
+def _stepwise(cfg, rng):
+    index = MarketIndex(cfg, [START] * len(cfg["quality_names"]))
+    index.record(0, FLOW, cfg)
+
+    spread = cfg["price_index"]["rival_flow"]
+    width = 2 * spread + 1
+
+    for _ in range(TURNS):
+        flows = [int(rng.random() * width) - spread for _ in index.levels]
+        index.step(rng, cfg, flows)
+
+    return index.levels[0]
+
+
+def _skipped(cfg, rng):
+    index = MarketIndex(cfg, [START] * len(cfg["quality_names"]))
+    index.record(0, FLOW, cfg)
+    index.skip(TURNS, rng, cfg)
+    index.sync(cfg)
+
+    return index.levels[0]
+
+
+def test_catch_up_is_exact_without_noise():
+    cfg = _cfg(volatility=0.0, rival_flow=0)
+    rng = random.Random(1)
+
+    assert _skipped(cfg, rng) == pytest.approx(_stepwise(cfg, rng), abs=1e-12)
+
+
+def test_catch_up_matches_stepwise_moments():
+    cfg = _cfg()
+    rng = random.Random(2)
+    runs = 3000
+
+    stepwise = [_stepwise(cfg, rng) for _ in range(runs)]
+    skipped = [_skipped(cfg, rng) for _ in range(runs)]
+
+    keep = 1.0 - cfg["price_index"]["reversion"]
+    impact = cfg["price_index"]["impact"]
+    mean = 1.0 + keep ** TURNS * (START - 1.0) + keep ** (TURNS - 1) * impact * FLOW
+
+    # стандартная ошибка среднего — около 0.001
+    assert statistics.fmean(stepwise) == pytest.approx(mean, abs=0.005)
+    assert statistics.fmean(skipped) == pytest.approx(mean, abs=0.005)
+
+    assert statistics.variance(skipped) == pytest.approx(statistics.variance(stepwise), rel=0.15)
+
+
+def test_scoring_leaves_game_index_alone(storage, monkeypatch):
+    monkeypatch.setattr(market_index, "_index", None)
+
+    cfg = get_balance()["branch2"]
+
+    default = list(score_listings(random_source(random.Random(3), cfg, limit=200), cfg))
+    fresh = list(score_listings(random_source(random.Random(3), cfg, limit=200), cfg,
+                                MarketIndex(cfg)))
+
+    assert default == fresh
+    assert market_index._index is None
+    assert not (storage / "market_index.json").exists()
@@ -0,0 +1,105 @@
+"""
+торг ветки 1: решатель совпадает с ответами, посчитанными
+вручную, и с перебором дерева без таблицы транспозиций
+"""
+
+
+import random
+
+import pytest
+
+from negotiation import PLAYER, RIVAL, Negotiation, play_equilibrium
+
+
+def test_single_round_is_ultimatum():
+    # один раунд: соперник предлагает худший для игрока уровень,
+    # игроку отказ даёт столько же (0) — он соглашается
+    game = Negotiation(0, 100, rounds=1, levels=3,
+                       player_patience=1.0, rival_patience=1.0, walk_chance=0.0)
+
+    assert game.solve() == (0.0, 1.0)
+    assert game.offer(game.root()) == 0
+
+
+def test_last_word_takes_everything():
+    # два раунда без дисконта: последним предлагает игрок и берёт всё,
+    # поэтому в первом раунде он согласен только на верхний уровень
+    game = Negotiation(0, 100, rounds=2, levels=3,
+                       player_patience=1.0, rival_patience=0.9, walk_chance=0.0)
+
+    assert game.solve() == (1.0, 0.0)
+    assert game.accepts(game.root(), 2)
+    assert not game.accepts(game.root(), 1)
+
+
+@pytest.mark.parametrize("patience, walk", [(0.5, 0.0), (1.0, 0.5)])
+def test_discount_splits_in_half(patience, walk):
+    # продолжение торга стоит игроку половину (дисконт или уход
+    # соперника), поэтому первое предложение — середина диапазона
+    game = Negotiation(0, 100, rounds=2, levels=3,
+                       player_patience=patience, rival_patience=1.0, walk_chance=walk)
+
+    assert game.solve() == pytest.approx((0.5, 0.5))
+    assert game.offer(game.root()) == 1
+    assert game.accepts(game.root(), 1)
+    assert not game.accepts(game.root(), 0)
+
+    if walk == 0.0:
+        assert play_equilibrium(game, random.Random(1)) == 50
+
+
+def test_breakdown_of_losing_range():
+    # убыточный диапазон: срыв стоит нижнюю границу
+    game = Negotiation(-100, 100, rounds=1, levels=3,
+                       player_patience=1.0, rival_patience=1.0, walk_chance=0.0)
+
+    assert game.breakdown == -100
+    assert game.solve() == (0.0, 1.0)
+    assert game.amount(game.offer(game.root())) == -100
+
+
+def _brute(game, node):
+    """
+    обратная индукция перебором всех путей (без таблицы)
+    """
+
+    r, side, kp, kr = node
+    other = 1 - side
+    offers = range(kr, kp + 1) if side == RIVAL else range(kp, kr - 1, -1)
+    best = None
+
+    for k in offers:
+        accepted = (game._value[PLAYER][k], game._value[RIVAL][k])
+
+        if r + 1 >= game.rounds:
+            rejected = (0.0, 0.0)
+        else:
+            following = (r + 1, PLAYER, kp, k) if side == RIVAL else (r + 1, RIVAL, k, kr)
+            player, rival = _brute(game, following)
+            stay = 1 - game.walk_chance
+            rejected = (stay * game._patience[PLAYER] * player,
+                        stay * game._patience[RIVAL] * rival)
+
+        result = accepted if accepted[other] >= rejected[other] else rejected
+
+        if best is None or result[side] > best[side]:
+            best = result
+
+    return best
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_transpositions_match_full_tree(seed):
+    rng = random.Random(seed)
+
+    # с четырёх раундов в один узел ведут разные пути
+    game = Negotiation(
+        rng.randint(-20_000, 0), rng.randint(10_000, 60_000),
+        rounds=rng.randint(4, 5), levels=rng.randint(3, 6),
+        player_patience=rng.uniform(0.7, 1.0),
+        rival_patience=rng.uniform(0.7, 1.0),
+        walk_chance=rng.uniform(0.0, 0.3)
+    )
+
+    assert game.solve() == pytest.approx(_brute(game, game.root()))
+    assert game.hits > 0
@@ -0,0 +1,84 @@
+"""
+статистика сделок: агрегаты совпадают с расчётом по списку,
+слияние — с записью всех сделок подряд, снимок — с оригиналом
+"""
+
+
+import json
+import random
+import statistics
+
+import pytest
+
+from player import DealStats
+
+
+def _amounts(seed, count):
+    rng = random.Random(seed)
+    return [rng.randint(-50_000, 80_000) for _ in range(count)]
+
+
+def _recorded(amounts, branches=(1, 2, 3)):
+    stats = DealStats(recent_size=5, track_branches=True)
+
+    for k, amount in enumerate(amounts):
+        stats.record(amount, branch=branches[k % len(branches)])
+
+    return stats
+
+
+def _assert_same(stats, amounts):
+    assert stats.count == len(amounts)
+    assert stats.total == sum(amounts)
+    assert stats.min_amount == min(amounts)
+    assert stats.max_amount == max(amounts)
+    assert stats.wins == sum(a > 0 for a in amounts)
+    assert stats.losses == sum(a < 0 for a in amounts)
+    assert stats.mean == pytest.approx(statistics.fmean(amounts))
+    assert stats.variance() == pytest.approx(statistics.variance(amounts))
+
+
+def test_record_matches_list():
+    amounts = _amounts(1, 500)
+    _assert_same(_recorded(amounts), amounts)
+
+
+@pytest.mark.parametrize("split", [0, 1, 137, 499, 500])
+def test_merge_equals_recording_in_order(split):
+    amounts = _amounts(2, 500)
+
+    # ветки чередуются по номеру сделки во всём списке
+    branches = [1 + k % 3 for k in range(len(amounts))]
+    head = DealStats(recent_size=5, track_branches=True)
+    tail = DealStats(recent_size=5, track_branches=True)
+
+    for k, amount in enumerate(amounts):
+        (head if k < split else tail).record(amount, branch=branches[k])
+
+    merged = head.merge(tail)
+
+    _assert_same(merged, amounts)
+    assert list(merged.recent) == amounts[-5:]
+
+    for branch in (1, 2, 3):
+        own = [a for a, b in zip(amounts, branches) if b == branch]
+        _assert_same(merged.by_branch[branch], own)
+
+
+def test_snapshot_round_trip():
+    stats = _recorded(_amounts(3, 40))
+
+    restored = DealStats.from_dict(json.loads(json.dumps(stats.to_dict())))
+
+    assert restored.to_dict() == stats.to_dict()
+    assert restored.variance() == stats.variance()
+    assert list(restored.recent) == list(stats.recent)
+    assert set(restored.by_branch) == {1, 2, 3}
+
+
+def test_empty_snapshot_round_trip():
+    stats = DealStats()
+    restored = DealStats.from_dict(stats.to_dict())
+
+    assert restored.to_dict() == stats.to_dict()
+    assert len(restored) == 0 and restored.recent is None and restored.by_branch is None
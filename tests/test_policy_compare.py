@@ -0,0 +1,76 @@
+"""
+сравнение стратегий: моменты по пачкам равны расчёту
+по всем выборкам сразу
+"""
+
+
+import math
+import random
+import statistics
+
+import pytest
+
+from policy_compare import Moments, estimate
+
+
+def _samples(count, seed=1):
+    rng = random.Random(seed)
+    samples = []
+
+    for _ in range(count):
+        control = rng.gauss(0, 3)
+        a = (rng.gauss(10, 4) + control, rng.gauss(10, 4) - control)
+        b = (rng.gauss(9, 4) + control, rng.gauss(9, 4) - control)
+        samples.append(((a[0] + a[1] - b[0] - b[1]) / 2 + 0.5 * control, control, a, b))
+
+    return samples
+
+
+def test_batches_equal_one_pass():
+    samples = _samples(1000)
+
+    moments = Moments()
+
+    for start in range(0, len(samples), 137):
+        moments.add(samples[start:start + 137])
+
+    batched = moments.estimate()
+    whole = estimate(samples)
+
+    assert batched.keys() == whole.keys()
+
+    for key, value in whole.items():
+        assert batched[key] == pytest.approx(value, rel=1e-9)
+
+
+def test_estimate_matches_textbook_formulas():
+    samples = _samples(500, seed=2)
+    d = [s[0] for s in samples]
+    c = [s[1] for s in samples]
+    n = len(samples)
+
+    result = estimate(samples, confidence=0.95)
+
+    mean_d, mean_c = statistics.fmean(d), statistics.fmean(c)
+    beta = statistics.covariance(d, c) / statistics.variance(c)
+    adjusted = [x - beta * y for x, y in zip(d, c)]
+
+    z = statistics.NormalDist().inv_cdf(0.975)
+
+    assert result["beta"] == pytest.approx(beta, rel=1e-9)
+    assert result["difference"] == pytest.approx(mean_d - beta * mean_c, rel=1e-9)
+    assert result["half_width"] == pytest.approx(z * math.sqrt(statistics.variance(adjusted) / n), rel=1e-9)
+
+    values_a = [v for s in samples for v in s[2]]
+    assert result["mean_a"] == pytest.approx(statistics.fmean(values_a), rel=1e-9)
+    assert result["games"] == 2 * len(values_a)
+
+
+def test_without_control():
+    samples = _samples(200, seed=3)
+    d = [s[0] for s in samples]
+
+    result = estimate(samples, control=False)
+
+    assert result["beta"] == 0.0
+    assert result["difference"] == pytest.approx(statistics.fmean(d), rel=1e-9)
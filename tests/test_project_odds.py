@@ -0,0 +1,116 @@
+"""
+точные распределения проектов ветки 3: совпадают с полным
+перебором исходов и с формулами средних
+"""
+
+
+from fractions import Fraction
+from itertools import product
+
+import pytest
+
+from balance import get_balance
+from project_odds import completion_turns, net_profit, project_odds
+
+
+SMALL = {"buy": [3, 5], "profit": [10, 12], "freeze": [1, 3]}
+SMALL_EVENTS = {
+    "boost_chance": 0.25,
+    "delay_chance": 0.5,
+    "boost_bonus": [1, 2],
+    "delay_penalty": [2, 4]
+}
+
+
+def _span(bounds):
+    return range(bounds[0], bounds[1] + 1)
+
+
+def _enumerate(info, events):
+    """
+    все исходы проекта с точными весами (перебор)
+    """
+
+    boost = Fraction(events["boost_chance"])
+    delay = Fraction(events["delay_chance"]) - boost
+    plain = 1 - boost - delay
+
+    turns = {}
+    profit = {}
+
+    def add(table, key, weight):
+        table[key] = table.get(key, 0) + weight
+
+    for freeze in _span(info["freeze"]):
+        share = Fraction(1, len(_span(info["freeze"])))
+
+        add(turns, max(1, freeze - 1), share * boost)
+        add(turns, freeze + 1, share * delay)
+        add(turns, freeze, share * plain)
+
+    base = [p - b for p, b in product(_span(info["profit"]), _span(info["buy"]))]
+    share = Fraction(1, len(base))
+
+    for value in base:
+        add(profit, value, share * plain)
+
+        for bonus in _span(events["boost_bonus"]):
+            add(profit, value + bonus, share * boost / len(_span(events["boost_bonus"])))
+
+        for penalty in _span(events["delay_penalty"]):
+            add(profit, value - penalty, share * delay / len(_span(events["delay_penalty"])))
+
+    return turns, profit
+
+
+def test_small_project_equals_enumeration():
+    turns, profit = _enumerate(SMALL, SMALL_EVENTS)
+
+    computed = completion_turns(SMALL, SMALL_EVENTS)
+    assert computed.keys() == turns.keys()
+
+    for turn, weight in turns.items():
+        assert computed[turn] == pytest.approx(float(weight))
+
+    dist = net_profit(SMALL, SMALL_EVENTS)
+    low, high = dist.support()
+
+    assert (low, high) == (min(profit), max(profit))
+
+    for value in range(low, high + 1):
+        assert dist.probs[value - low] == pytest.approx(float(profit.get(value, 0)))
+
+
+@pytest.mark.parametrize("project_type", [1, 2, 3])
+def test_balance_means_are_exact(project_type):
+    cfg = get_balance()["branch3"]
+    info = cfg["project_types"][project_type]
+    events = cfg["events"]
+
+    boost = events["boost_chance"]
+    delay = events["delay_chance"] - boost
+    plain = 1 - boost - delay
+
+    def mid(bounds):
+        return (bounds[0] + bounds[1]) / 2
+
+    odds = project_odds(project_type)
+
+    expected_profit = (
+        mid(info["profit"]) - mid(info["buy"])
+        + boost * mid(events["boost_bonus"]) - delay * mid(events["delay_penalty"])
+    )
+
+    assert sum(odds["profit"].probs) == pytest.approx(1.0)
+    assert odds["profit"].mean() == pytest.approx(expected_profit, abs=1e-6)
+
+    freezes = _span(info["freeze"])
+    expected_turns = sum(
+        boost * max(1, f - 1) + delay * (f + 1) + plain * f for f in freezes
+    ) / len(freezes)
+
+    assert sum(odds["turns"].values()) == pytest.approx(1.0)
+    assert sum(t * p for t, p in odds["turns"].items()) == pytest.approx(expected_turns)
+
+    # повторный запрос при тех же таблицах — из кэша
+    assert project_odds(project_type) is odds
@@ -0,0 +1,64 @@
+"""
+расщепление в оценке банкротства: веса копий сохраняют
+вес корня, а оценка совпадает с прогонами без расщепления
+"""
+
+
+import random
+import statistics
+
+import pytest
+
+import ruin
+
+
+class _State:
+    """
+    бюджет со случайными шагами вместо хода ветки 3
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.bankrupt = budget <= 0
+
+
+@pytest.fixture
+def walk(monkeypatch):
+    def set_drift(low, high):
+        def advance_turn(state, rng, cfg):
+            return _State(state.budget + rng.randint(low, high))
+
+        monkeypatch.setattr(ruin, "advance_turn", advance_turn)
+
+    monkeypatch.setattr(ruin, "default_policy", lambda state, rng, cfg: None)
+    monkeypatch.setattr(ruin, "apply_action", lambda state, action, rng, cfg: state)
+
+    return set_drift
+
+
+def test_split_weights_sum_to_one(walk):
+    # бюджет только падает: разоряется каждая копия,
+    # и их веса вместе дают ровно вес корня
+    walk(-30, -1)
+    rng = random.Random(1)
+    levels = (50, 25, 10)
+
+    for _ in range(200):
+        assert ruin._root(_State(100), rng, None, float("inf"), 1000, levels) == 1.0
+
+
+def test_splitting_is_unbiased(walk):
+    walk(-12, 10)
+    rng = random.Random(2)
+    roots = 4000
+
+    split = [ruin._root(_State(100), rng, None, 160, 30, (50, 25, 10)) for _ in range(roots)]
+    plain = [ruin._root(_State(100), rng, None, 160, 30, ()) for _ in range(roots)]
+
+    error = (statistics.variance(split) / roots + statistics.variance(plain) / roots) ** 0.5
+
+    assert 0 < statistics.fmean(plain) < 0.5
+    assert statistics.fmean(split) == pytest.approx(statistics.fmean(plain), abs=4 * error)
+
+    # ради этого и расщепление: разброс вкладов корней меньше
+    assert statistics.variance(split) < statistics.variance(plain)
@@ -0,0 +1,145 @@
+"""
+журнал автосохранения: последнее состояние из дельт
+совпадает с полным снимком; рынок соперников пересчитывается
+с контрольной точки и только при том же балансе
+"""
+
+
+import json
+
+import pytest
+
+import save_system
+
+from player import Deal, Player, Portfolio, Rival
+from rival_engine import REPLAY_CHECKPOINT_EVERY, RivalMarket
+from save_system import (
+    COMPACT_EVERY,
+    SessionJournal,
+    read_session,
+    restore_player,
+    restore_rival,
+    snapshot_player,
+    snapshot_rival
+)
+
+
+def _world():
+    player = Player("tester", budget=500_000, role=3)
+    player.win_target = 1_000_000
+    player.portfolio = Portfolio()
+
+    rival = Rival(name="rival", style=1, mode=3, budget=400_000)
+    rival.portfolio = Portfolio()
+
+    market = RivalMarket(seed=11)
+    market.populate(40)
+    market.add_rival(250_000, 2, [(1, 90_000, 3, 0)])
+
+    return player, rival, market
+
+
+def _state(player, rival, market, cycle):
+    return {
+        "player": snapshot_player(player),
+        "rival": snapshot_rival(rival),
+        "market": market.to_replay(),
+        "cycle": cycle
+    }
+
+
+def _play_turn(player, rival, market, cycle):
+    if cycle % 3 == 0:
+        deal = Deal(cycle % 3 + 1, 80_000 + cycle, 2)
+        deal.owner = player
+        player.portfolio.add(deal)
+    elif player.portfolio.deals:
+        deal = player.portfolio.deals.pop(0)
+        player.completed_deals.record(10_000 - cycle * 700, branch=3)
+
+    player.budget += 1_500 * cycle
+    rival.budget -= 900
+    market.step()
+
+
+def test_replay_equals_full_snapshot(storage):
+    player, rival, market = _world()
+    journal = SessionJournal("tester", branch=3)
+
+    # больше COMPACT_EVERY ходов — журнал успевает переписаться
+    for cycle in range(1, COMPACT_EVERY + 15):
+        _play_turn(player, rival, market, cycle)
+        state = _state(player, rival, market, cycle)
+        journal.save(state)
+
+        session = read_session("tester")
+
+        assert session["branch"] == 3
+        assert session["state"] == json.loads(json.dumps(state))
+
+
+def test_session_restores_entities_and_market(storage):
+    player, rival, market = _world()
+    journal = SessionJournal("tester", branch=3)
+
+    for cycle in range(1, 8):
+        _play_turn(player, rival, market, cycle)
+        journal.save(_state(player, rival, market, cycle))
+
+    state = read_session("tester")["state"]
+
+    restored = restore_player(state["player"], Player("tester"))
+    assert snapshot_player(restored) == snapshot_player(player)
+    assert all(d.owner is restored for d in restored.portfolio.deals)
+
+    assert snapshot_rival(restore_rival(state["rival"])) == snapshot_rival(rival)
+
+    replayed = RivalMarket.from_replay(state["market"])
+    assert replayed.to_dict() == market.to_dict()
+    assert replayed.to_replay() == market.to_replay()
+
+
+def test_other_snapshot_version_is_ignored(storage, monkeypatch):
+    player, rival, market = _world()
+    SessionJournal("tester", branch=3).save(_state(player, rival, market, 1))
+
+    monkeypatch.setattr(save_system, "SNAPSHOT_VERSION", save_system.SNAPSHOT_VERSION + 1)
+
+    assert read_session("tester") is None
+
+
+def test_replay_starts_from_checkpoint(monkeypatch):
+    market = RivalMarket(seed=5)
+    market.populate(30)
+
+    for _ in range(REPLAY_CHECKPOINT_EVERY + 7):
+        market.step()
+
+    data = json.loads(json.dumps(market.to_replay()))
+    assert data["checkpoint"]["turn"] == REPLAY_CHECKPOINT_EVERY + 7
+
+    for _ in range(4):
+        market.step()
+
+    data = json.loads(json.dumps(market.to_replay()))
+
+    steps = []
+    step = RivalMarket.step
+    monkeypatch.setattr(RivalMarket, "step", lambda self: steps.append(1) or step(self))
+
+    replayed = RivalMarket.from_replay(data)
+
+    assert len(steps) == 4
+    assert replayed.to_dict() == market.to_dict()
+
+
+def test_replay_rejects_other_balance():
+    market = RivalMarket(seed=5)
+    market.populate(10)
+    market.step()
+
+    data = market.to_replay()
+    data["balance"] = "другой баланс"
+
+    with pytest.raises(ValueError):
+        RivalMarket.from_replay(data)
@@ -0,0 +1,62 @@
+"""
+массовый прогон: продолженный после обрыва прогон совпадает
+с прогоном без обрыва
+"""
+
+
+import pytest
+
+import sim_results
+
+from sim_results import ChunkReader, ChunkWriter, run_games
+
+
+def _chunks(path):
+    reader = ChunkReader(str(path))
+    return [{name: view.tobytes() for name, view in views.items()} for views in reader.chunks()]
+
+
+def test_resumed_run_equals_uninterrupted(tmp_path, serial, monkeypatch):
+    games, size = 50, 16
+
+    run_games(str(tmp_path / "whole"), branch=3, games=games, seed=5, chunk_size=size)
+
+    # обрыв после второго чанка: запись следующего падает
+    write_chunk = ChunkWriter.write_chunk
+
+    def failing(writer, columns):
+        if len(writer.manifest["chunks"]) == 2:
+            raise KeyboardInterrupt
+
+        write_chunk(writer, columns)
+
+    monkeypatch.setattr(ChunkWriter, "write_chunk", failing)
+
+    try:
+        run_games(str(tmp_path / "resumed"), branch=3, games=games, seed=5, chunk_size=size)
+    except KeyboardInterrupt:
+        pass
+
+    assert not ChunkReader(str(tmp_path / "resumed")).manifest["complete"]
+
+    monkeypatch.setattr(ChunkWriter, "write_chunk", write_chunk)
+    writer = run_games(str(tmp_path / "resumed"), branch=3, games=games, seed=5, chunk_size=size)
+
+    assert writer.manifest["complete"] and writer.rows == games
+    assert _chunks(tmp_path / "resumed") == _chunks(tmp_path / "whole")
+
+
+def test_other_params_are_rejected(tmp_path, serial):
+    run_games(str(tmp_path / "run"), branch=3, games=4, seed=1, chunk_size=4)
+
+    with pytest.raises(ValueError):
+        run_games(str(tmp_path / "run"), branch=3, games=4, seed=2, chunk_size=4)
+
+
+def test_summary_counts_games(tmp_path, serial):
+    run_games(str(tmp_path / "run"), branch=3, games=10, seed=1, chunk_size=4)
+
+    summary = sim_results.summarize(ChunkReader(str(tmp_path / "run")))
+
+    assert summary["games"] == 10
+    assert 0.0 <= summary["win_rate"] <= 1.0
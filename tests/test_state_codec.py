@@ -0,0 +1,95 @@
+"""
+кодек состояния: decode(encode(x)) — тот же граф объектов
+"""
+
+
+import pickle
+
+import pytest
+
+from artifacts import get_artifact_by_id
+from player import Deal, DealStats, Player, Portfolio, Rival
+from state_codec import _sample_world, decode, encode
+
+
+def _same(a, b):
+    # pickle пишет поля и общие объекты (memo) — равенство байтов
+    # означает одинаковые значения и одинаковую структуру ссылок
+    return pickle.dumps(a) == pickle.dumps(b)
+
+
+@pytest.mark.parametrize("rivals", [0, 1, 25, 200])
+def test_round_trip(rivals):
+    world = _sample_world(rivals)
+    assert _same(decode(encode(world)), world)
+
+
+def test_owners_are_restored():
+    player, rival = _sample_world(1)
+    stranger = Player("stranger", budget=1)
+
+    rival.portfolio.deals[0].owner = player
+    rival.portfolio.deals[1].owner = None
+    rival.portfolio.deals[2].owner = stranger
+
+    restored_player, restored_rival = decode(encode([player, rival]))
+    deals = restored_rival.portfolio.deals
+
+    assert deals[0].owner is restored_player
+    assert deals[1].owner is None
+    assert deals[2].owner.name == "stranger"
+    assert all(d.owner is restored_player for d in restored_player.portfolio.deals)
+
+
+def test_every_object_is_interned():
+    player, rival = _sample_world(1)
+    deal = rival.portfolio.deals[1]
+    loose = Deal(2, 70_000, 1)
+
+    objects = [deal, player, rival, rival.portfolio, player, loose, loose]
+    restored = decode(encode(objects))
+
+    assert _same(restored, objects)
+    assert restored[0] is restored[2].portfolio.deals[1]
+    assert restored[0].owner is restored[2]
+    assert restored[3] is restored[2].portfolio
+    assert restored[4] is restored[1]
+    assert restored[6] is restored[5] and restored[5].owner is None
+
+
+def test_stats_and_wide_fields():
+    player = Player("игрок", budget=10 ** 12, role=2)
+    player.artifacts = [get_artifact_by_id("first_deal")]
+    player.portfolio = Portfolio()
+
+    stats = DealStats(recent_size=3, track_branches=True)
+
+    for amount, branch in ((5, 2), (-1, 3), (7, 2), (9, 2)):
+        stats.record(amount, branch)
+
+    player.completed_deals = stats
+
+    deal = Deal(1, 3 * 10 ** 10, 300)
+    deal.owner = player
+    player.portfolio.add(deal)
+
+    assert _same(decode(encode([player])), [player])
+
+
+def test_market_rival_fields():
+    rival = Rival(name="market", style=2, mode=2, budget=50_000)
+    rival.state = "selling"
+    rival.profit = 1200
+
+    assert _same(decode(encode([rival])), [rival])
+
+
+def test_rejects_foreign_data():
+    with pytest.raises(TypeError):
+        encode([object()])
+
+    with pytest.raises(ValueError):
+        decode(b"\x00")
+
+    with pytest.raises(ValueError):
+        decode(encode([Player("x")])[:-3])